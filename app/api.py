@@ -1,35 +1,86 @@
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+import asyncio
+import random
+import time
+from concurrent.futures import Future
+from functools import partial
 import app.state as global_state
+from app.batching import WriteBatcher
+from app.failure_detector import failure_detector
 from app.logger import setup_logger
+from app.metrics import metrics
+from app.replication import replicator
 from app.state import NodeInfo
+from app.wal import journal
 import requests
-import time
-from app.config import NODE_ID
-from app.socket_client import send_socket_message
+from app.config import ELECTION_BACKOFF, NODE_ID, READ_LEASE_DURATION, SET_BATCH_MAX, SET_BATCH_WINDOW
+from app.scheduler import scheduler
+from app.socket_client import SingleFlight, send_socket_message_async
+from app.socket_server import (
+    adopt_decided_round,
+    commit_shared_values,
+    handle_election,
+    handle_get_key,
+    handle_mget_keys,
+    handle_mset_keys,
+    handle_set_key,
+    launch_election,
+)
 
 router = APIRouter()
 logger = setup_logger(NODE_ID)
 
+# Concurrent GET /variable forwards to the same leader share one GET_VAR.
+get_var_flights = SingleFlight()
+election_triggers = SingleFlight()
+
+# Failed forwards are observed too: a leader timeout is where the time went.
+VARIABLE_SECONDS = metrics.histogram(
+    "dsva_variable_request_seconds",
+    "Latency of /variable requests, split by where they were served",
+    ("method", "route")
+)
+
 
 _UNSET = object()
 
 
-def send_with_delay(url, json=None, timeout=2):
+def _current_delay() -> float:
     state = getattr(global_state, "state", None)
-    delay = state.delay if state else 0.0
-    if delay > 0:
-        time.sleep(delay)
+    return state.delay if state else 0.0
+
+
+def post_later(url, json=None, timeout=2) -> Future:
+    """POST after the artificial delay, run by the scheduler; failures are logged.
+
+    Nothing blocks on the delay: callers may drop the future, await it with
+    ``asyncio.wrap_future`` or chain on it.
+    """
+    delay = _current_delay()
     effective_timeout = timeout + max(delay * 3, 2.0)
-    return requests.post(url, json=json, timeout=effective_timeout)
+    future = scheduler.defer(
+        delay,
+        partial(requests.post, url, json=json, timeout=effective_timeout)
+    )
+    future.add_done_callback(partial(_log_post_failure, url))
+    return future
 
 
-def get_with_delay(url, timeout=2):
-    state = getattr(global_state, "state", None)
-    delay = state.delay if state else 0.0
-    if delay > 0:
-        time.sleep(delay)
+def _log_post_failure(url: str, future: Future):
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("POST %s failed: %s", url, exc)
+
+
+def get_later(url, timeout=2) -> Future:
+    """GET after the artificial delay, run by the scheduler; await or chain on the future."""
+    delay = _current_delay()
     effective_timeout = timeout + max(delay * 3, 2.0)
-    return requests.get(url, timeout=effective_timeout)
+    return scheduler.defer(
+        delay,
+        partial(requests.get, url, timeout=effective_timeout)
+    )
 
 
 def _serialize_neighbor(prefix: str, node: NodeInfo | None) -> dict:
@@ -53,8 +104,11 @@ def _send_neighbor_update(
     prev=_UNSET,
     next=_UNSET,
     next_next=_UNSET,
+    next_successors=_UNSET,
+    decided_epoch=_UNSET,
+    leader=_UNSET,
     timeout: int = 2
-):
+) -> Future | None:
     payload: dict = {}
 
     if prev is not _UNSET:
@@ -66,14 +120,22 @@ def _send_neighbor_update(
     if next_next is not _UNSET:
         payload.update(_serialize_neighbor("next_next", next_next))
 
+    if next_successors is not _UNSET:
+        payload["next_successors"] = [node.to_dict() for node in next_successors]
+
+    if decided_epoch is not _UNSET:
+        payload["decided_epoch"] = decided_epoch
+        payload["leader"] = leader.to_dict() if leader else None
+
     if not payload:
-        return
+        return None
+
+    return post_later(f"{target.host}/update_neighbors", json=payload, timeout=timeout)
 
-    send_with_delay(
-        f"{target.host}/update_neighbors",
-        json=payload,
-        timeout=timeout
-    )
+
+async def _update_neighbor(target: NodeInfo, **pointers):
+    """Send the update and wait for the neighbour's answer without holding a thread."""
+    await asyncio.wrap_future(_send_neighbor_update(target, **pointers))
 
 
 def _node_info_from_parts(
@@ -106,7 +168,7 @@ def _node_info_from_dict(data: dict | None) -> NodeInfo | None:
     return _node_info_from_parts(node_id, host, socket_port)
 
 
-def _refresh_next_successors():
+async def _refresh_next_successors():
     state = global_state.state
 
     if not state.next_node:
@@ -114,7 +176,7 @@ def _refresh_next_successors():
         return
 
     try:
-        response = get_with_delay(f"{state.next_node.host}/health", timeout=2)
+        response = await asyncio.wrap_future(get_later(f"{state.next_node.host}/health", timeout=2))
         data = response.json()
         candidate = _node_info_from_dict(data.get("next"))
 
@@ -122,18 +184,21 @@ def _refresh_next_successors():
             state.set_next_next(candidate)
         else:
             state.set_next_next(state.self_info())
+
+        if data.get("successors"):
+            state.adopt_successors(state.next_node, data["successors"])
     except requests.exceptions.RequestException:
         state.set_next_next(None)
     except ValueError:
         state.set_next_next(None)
 
 
-def _fetch_next_of(node: NodeInfo | None) -> NodeInfo | None:
+async def _fetch_next_of(node: NodeInfo | None) -> NodeInfo | None:
     if not node:
         return None
 
     try:
-        response = get_with_delay(f"{node.host}/health", timeout=2)
+        response = await asyncio.wrap_future(get_later(f"{node.host}/health", timeout=2))
         data = response.json()
         return _node_info_from_dict(data.get("next"))
     except requests.exceptions.RequestException:
@@ -143,7 +208,7 @@ def _fetch_next_of(node: NodeInfo | None) -> NodeInfo | None:
 
 
 @router.post("/update_neighbors")
-def update_neighbors(payload: dict = Body(...)):
+async def update_neighbors(payload: dict = Body(...)):
     state = global_state.state
 
     prev_fields = {"prev_id", "prev_host", "prev_socket_port"}
@@ -192,7 +257,13 @@ def update_neighbors(payload: dict = Body(...)):
             if nnext_info:
                 state.set_next_next(nnext_info)
 
-    _refresh_next_successors()
+    if payload.get("next_successors") and state.next_node:
+        state.adopt_successors(state.next_node, payload["next_successors"])
+
+    if "decided_epoch" in payload:
+        _adopt_ring_round(payload)
+
+    await _refresh_next_successors()
 
     logger.info(
         "Neighbors updated: prev=%s, next=%s, next_next=%s",
@@ -204,73 +275,8 @@ def update_neighbors(payload: dict = Body(...)):
     return {"message": "Neighbors updated"}
 
 
-def get_next_alive_node():
-    state = global_state.state
-    current = state.next_node
-    visited = set()
-
-    while current and current.node_id not in visited:
-        visited.add(current.node_id)
-        try:
-            response = requests.get(f"{current.host}/health", timeout=1)
-            data = response.json()
-
-            if data.get("status") == "alive":
-                return current
-
-            next_info = data.get("next")
-            if not next_info:
-                return None
-
-            current = NodeInfo(
-                next_info["node_id"],
-                next_info["host"],
-                next_info.get("socket_port", current.socket_port),
-            )
-        except requests.exceptions.RequestException:
-            return None
-
-    return None
-
-
-def broadcast_leader(leader_id: int):
-    state = global_state.state
-    current = state.next_node
-
-    if not current:
-        return
-
-    visited = set()
-    payload = {
-        "leader_id": leader_id,
-        "leader_host": state.self_host,
-        "leader_socket_port": state.socket_port,
-    }
-
-    while current and current.node_id not in visited:
-        visited.add(current.node_id)
-        try:
-            send_with_delay(f"{current.host}/leader", json=payload, timeout=1)
-        except requests.exceptions.RequestException:
-            logger.warning("Leader broadcast failed")
-
-        try:
-            response = requests.get(f"{current.host}/health", timeout=1)
-            next_info = response.json().get("next")
-            if not next_info:
-                break
-
-            current = NodeInfo(
-                next_info["node_id"],
-                next_info["host"],
-                next_info.get("socket_port", state.socket_port),
-            )
-        except Exception:
-            break
-
-
 @router.post("/join")
-def join(node_id: int = Body(...), host: str = Body(...), socket_port: int = Body(...)):
+async def join(node_id: int = Body(...), host: str = Body(...), socket_port: int = Body(...)):
     state = global_state.state
     logger.info(f"Join request from node {node_id}")
 
@@ -283,48 +289,70 @@ def join(node_id: int = Body(...), host: str = Body(...), socket_port: int = Bod
     new_node = NodeInfo(node_id, host, socket_port)
 
     if state.next_node is None:
+        state.membership.joined(new_node.to_dict(), state.node_id)
         state.set_next(new_node)
         state.set_prev(new_node)
         state.set_next_next(state.self_info())
 
-        _send_neighbor_update(
+        await _update_neighbor(
             new_node,
             prev=state.self_info(),
             next=state.self_info(),
-            next_next=state.self_info()
+            next_next=state.self_info(),
+            decided_epoch=state.decided_epoch,
+            leader=state.leader_node
         )
 
-        _refresh_next_successors()
+        await _refresh_next_successors()
 
-        return {"message": "Joined as second node"}
+        return {"message": "Joined as second node", **_ring_round()}
 
     old_next = state.next_node
+    old_successors = list(state.successors)
+    state.membership.joined(new_node.to_dict(), old_next.node_id)
     state.set_next(new_node)
     state.set_next_next(old_next)
 
-    old_next_next = _fetch_next_of(old_next) or state.self_info()
+    old_next_next = await _fetch_next_of(old_next) or state.self_info()
 
-    _send_neighbor_update(
+    await _update_neighbor(
         new_node,
         prev=state.self_info(),
         next=old_next,
-        next_next=old_next_next
+        next_next=old_next_next,
+        next_successors=old_successors[1:],
+        decided_epoch=state.decided_epoch,
+        leader=state.leader_node
     )
 
-    _send_neighbor_update(
+    await _update_neighbor(
         old_next,
         prev=new_node
     )
 
     if state.prev_node and state.prev_node.node_id != state.node_id:
-        _send_neighbor_update(
+        await _update_neighbor(
             state.prev_node,
             next_next=new_node
         )
 
-    _refresh_next_successors()
+    await _refresh_next_successors()
+
+    return {"message": "Node joined", **_ring_round()}
+
+
+def _ring_round() -> dict:
+    """The newest decided election round, so a joining node does not open an older one."""
+    state = global_state.state
+    return {
+        "decided_epoch": state.decided_epoch,
+        "leader": state.leader_node.to_dict() if state.leader_node else None,
+    }
+
 
-    return {"message": "Node joined"}
+def _adopt_ring_round(payload: dict):
+    leader = payload.get("leader")
+    adopt_decided_round(int(payload["decided_epoch"]), NodeInfo.from_dict(leader) if leader else None)
 
 
 @router.post("/leave")
@@ -350,13 +378,72 @@ def leave():
     state.set_next(None)
     state.set_prev(None)
     state.set_next_next(None)
+    state.membership.mark_dead([state.node_id])
     state.leader_id = None
     state.in_election = False
     state.leader_node = None
+    state.read_lease.clear()
 
     return {"message": "Left ring"}
 
 
+async def rejoin_ring():
+    """Take back the ring position this node held before it restarted.
+
+    The restored predecessor is asked to insert us again; if the ring
+    already healed around us, that splices us back between it and its
+    current successor. Should it be gone too, the restored successor's
+    current predecessor takes its place. A node that was the leader gives
+    the role up and starts an election, since its replication lineage
+    did not survive the restart.
+    """
+    state = global_state.state
+    me = state.self_info()
+
+    was_leader = state.leader_id == state.node_id
+    if was_leader:
+        state.leader_id = None
+        state.leader_node = None
+
+    for anchor in await _rejoin_anchors(state):
+        try:
+            response = await asyncio.wrap_future(post_later(f"{anchor.host}/join", json=me.to_dict(), timeout=2))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as exc:
+            logger.warning("Rejoin via node %s failed: %s", anchor.node_id, exc)
+            continue
+
+        logger.info("Rejoined ring after node %s: %s", anchor.node_id, response.json().get("message"))
+        break
+    else:
+        logger.warning("Rejoin: no former neighbour reachable, keeping restored pointers")
+
+    await _refresh_next_successors()
+
+    if was_leader and state.next_node and state.next_node.node_id != state.node_id:
+        logger.info("Former leader restarted - starting election")
+        launch_election()
+
+
+async def _rejoin_anchors(state) -> list[NodeInfo]:
+    anchors = []
+
+    if state.prev_node and state.prev_node.node_id != state.node_id:
+        anchors.append(state.prev_node)
+
+    if state.next_node and state.next_node.node_id != state.node_id:
+        try:
+            data = (await asyncio.wrap_future(get_later(f"{state.next_node.host}/health", timeout=2))).json()
+            candidate = _node_info_from_dict(data.get("prev"))
+        except (requests.exceptions.RequestException, ValueError):
+            candidate = None
+
+        if candidate and candidate.node_id != state.node_id and all(a.node_id != candidate.node_id for a in anchors):
+            anchors.append(candidate)
+
+    return anchors
+
+
 
 @router.get("/health")
 def health():
@@ -378,6 +465,8 @@ def health():
         "next": state.next_node.to_dict() if state.next_node else None,
         "prev": state.prev_node.to_dict() if state.prev_node else None,
         "next_next": state.next_next_node.to_dict() if state.next_next_node else None,
+        "successors": [node.to_dict() for node in state.successors],
+        "view_epoch": state.membership.epoch,
     }
 
 
@@ -388,6 +477,7 @@ def kill():
     state.leader_id = None
     state.in_election = False
     state.leader_node = None
+    state.read_lease.clear()
     logger.info("Node killed (communication disabled)")
     return {"message": "Node killed", "node_id": state.node_id}
 
@@ -399,6 +489,7 @@ def revive():
     state.leader_id = None
     state.in_election = False
     state.leader_node = None
+    state.read_lease.clear()
     logger.info("Node revived (communication restored)")
     return {"message": "Node revived"}
 
@@ -411,14 +502,91 @@ def set_delay(delay: float = Body(..., embed=True)):
     return {"message": "Delay updated", "delay": delay}
 
 
+@router.get("/electionStats")
+def election_stats():
+    state = global_state.state
+    return {
+        "node_id": state.node_id,
+        "epoch": state.election_epoch,
+        "participant": state.participating(),
+        "leader_id": state.leader_id,
+        **state.election_stats.snapshot(),
+    }
+
+
+@router.post("/electionStats/reset")
+def reset_election_stats():
+    global_state.state.election_stats.reset()
+    return {"message": "Election stats reset"}
+
+
+@router.get("/variableStats")
+def variable_stats():
+    state = global_state.state
+    return {
+        "node_id": state.node_id,
+        "version": state.shared_version,
+        "lease_holders": len(state.lease_holders),
+        "read_lease": state.read_lease.snapshot(),
+        "get_var_coalescing": get_var_flights.snapshot(),
+        "local_write_batches": local_writes.snapshot(),
+        "forwarded_write_batches": forwarded_writes.snapshot(),
+    }
+
+
+@router.post("/variableStats/reset")
+def reset_variable_stats():
+    get_var_flights.reset()
+    local_writes.reset()
+    forwarded_writes.reset()
+    return {"message": "Variable stats reset"}
+
+
+@router.get("/replicationStats")
+def replication_stats():
+    return {
+        "node_id": global_state.state.node_id,
+        **replicator.snapshot_stats(),
+    }
+
+
+@router.get("/detectorStats")
+def detector_stats():
+    return {
+        "node_id": global_state.state.node_id,
+        **failure_detector.snapshot(),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/membership")
+def membership():
+    return {
+        "node_id": global_state.state.node_id,
+        **global_state.state.membership.snapshot(),
+    }
+
+
+@router.get("/walStats")
+def wal_stats():
+    return {
+        "node_id": global_state.state.node_id,
+        **journal.snapshot_stats(),
+    }
+
+
 @router.post("/startElection")
-def start_election():
+async def start_election():
     state = global_state.state
 
     if not state.alive:
         raise HTTPException(status_code=503, detail="Node is killed")
 
-    if state.in_election:
+    if state.participating():
         return {"message": "Election already running"}
 
     if not state.next_node:
@@ -427,32 +595,37 @@ def start_election():
     if state.next_node.node_id == state.node_id:
         return {"error": "Single-node ring"}
 
-    logger.info("Starting election")
-    state.in_election = True
-    state.leader_id = None
-    state.leader_node = None
+    failure = _election_launch_failure(await asyncio.wrap_future(launch_election()))
+    if failure:
+        raise HTTPException(status_code=503, detail=failure)
 
-    ip, port = state.next_node.socket_addr()
+    return {"message": "Election started"}
 
-    response = send_socket_message(
-        host=ip,
-        port=port,
-        message={
-            "type": "ELECTION",
-            "candidate_id": state.node_id
-        }
-    )
 
-    if isinstance(response, dict) and response.get("error") == "SOCKET_COMM_ERROR":
-        state.in_election = False
-        raise HTTPException(status_code=503, detail="Failed to reach next node via socket")
+def _election_launch_failure(replies: list) -> str | None:
+    """Why no first hop took the round, or None while one direction carries it."""
+    state = global_state.state
 
-    return {"message": "Election started"}
+    stale = [reply for reply in replies if isinstance(reply, dict) and reply.get("status") == "STALE"]
+    unreachable = [reply for reply in replies if isinstance(reply, dict) and reply.get("error") == "SOCKET_COMM_ERROR"]
+
+    # A bidirectional round still makes progress while one direction is reachable.
+    if replies and len(stale) + len(unreachable) < len(replies):
+        return None
+
+    if stale:
+        detail = f"Neighbours rejected the election as stale (epoch {state.election_epoch})"
+    else:
+        detail = "Failed to reach neighbours via socket"
+
+    state.in_election = False
+    return detail
 
 
 
 @router.post("/election")
-def election(candidate_id: int = Body(..., embed=True)):
+def election(candidate_id: int = Body(...), epoch: int | None = Body(None)):
+    """HTTP entry into the socket election; the round continues over sockets."""
     state = global_state.state
 
     if not state.alive:
@@ -460,32 +633,12 @@ def election(candidate_id: int = Body(..., embed=True)):
 
     logger.info(f"Election message received: {candidate_id}")
 
-    if candidate_id > state.node_id:
-        forward_id = candidate_id
-    elif candidate_id < state.node_id:
-        forward_id = state.node_id
-    else:
-        logger.info("I am the leader")
-        state.leader_id = state.node_id
-        state.in_election = False
-        state.leader_node = state.self_info()
-        broadcast_leader(state.node_id)
-        return {"message": "Leader elected"}
-
-    next_alive = get_next_alive_node()
-    if not next_alive:
-        state.in_election = False
-        return {"error": "No alive nodes to continue election"}
-
-    try:
-        send_with_delay(
-            f"{next_alive.host}/election",
-            json={"candidate_id": forward_id}
-        )
-    except requests.exceptions.RequestException:
-        logger.warning("Election forwarding failed")
-
-    return {"message": "Election forwarded"}
+    return handle_election({
+        "type": "ELECTION",
+        "candidate_id": candidate_id,
+        # Without an epoch the candidate joins the open round, or starts one after a decided round.
+        "epoch": max(state.election_epoch, state.decided_epoch + 1) if epoch is None else epoch
+    })
 
 
 @router.post("/leader")
@@ -505,11 +658,21 @@ def leader(
     elif leader_id == state.node_id:
         state.leader_node = state.self_info()
     state.in_election = False
+    state.read_lease.clear()
     logger.info(f"Leader set to {leader_id}")
     return {"message": "Leader acknowledged"}
 
 
-def _trigger_election(reason: str):
+async def _trigger_election(reason: str):
+    """Start an election for a failed leader unless another node beats us to it.
+
+    Requests failing on this node at the same time share one trigger.
+    The trigger waits a random backoff of up to ``ELECTION_BACKOFF``
+    seconds first; if meanwhile an ELECTION or LEADER of a newer epoch
+    arrived (most likely the round the failure detector started next to
+    the dead leader), this node joins that round instead of starting
+    its own, so a leader failure under load costs one round, not N.
+    """
     state = global_state.state
 
     if not state.alive:
@@ -521,25 +684,63 @@ def _trigger_election(reason: str):
     if state.next_node.node_id == state.node_id:
         return False, "Single-node ring"
 
-    if state.in_election:
+    if state.participating():
         logger.info(f"{reason} - election already running")
         return True, None
 
-    logger.warning(f"{reason} - triggering election")
+    failed_leader = state.leader_id
+    seen_epoch = state.election_epoch
+
+    def start() -> Future:
+        # Forget the failed leader before the trigger can run, however short the backoff.
+        logger.warning(f"{reason} - triggering election")
+        with state.election_lock:
+            if state.leader_id == failed_leader:
+                state.leader_id = None
+                state.leader_node = None
+
+        return scheduler.defer(
+            random.uniform(0, ELECTION_BACKOFF),
+            _elect_unless_superseded,
+            reason,
+            seen_epoch,
+            failed_leader
+        )
 
-    state.leader_id = None
-    state.leader_node = None
+    future, owner = election_triggers.do("election", start)
+    if not owner:
+        state.election_stats.inc("triggers_coalesced")
 
-    try:
-        start_election()
+    return await asyncio.wrap_future(future)
+
+
+def _elect_unless_superseded(reason: str, seen_epoch: int, failed_leader: int | None):
+    state = global_state.state
+
+    with state.election_lock:
+        # Only a leader other than the one that failed means another round already succeeded.
+        new_leader = state.leader_id is not None and state.leader_id != failed_leader
+        superseded = state.election_epoch > seen_epoch or state.participating() or new_leader
+
+    if superseded:
+        state.election_stats.inc("suppressed")
+        logger.info(f"{reason} - epoch {state.election_epoch} already under way, not starting another election")
         return True, None
-    except HTTPException as exc:
-        logger.warning(f"Election trigger failed: {exc.detail}")
-        return False, exc.detail
+
+    detail = _election_launch_failure(launch_election().result())
+    if detail:
+        logger.warning(f"Election trigger failed: {detail}")
+        return False, detail
+
+    return True, None
 
 
-def _raise_with_election(status_code: int, base_detail: str, reason: str):
-    success, failure_detail = _trigger_election(reason)
+def _raise_recovering():
+    raise HTTPException(status_code=503, detail="Leader is recovering replicated state - retry shortly")
+
+
+async def _raise_with_election(status_code: int, base_detail: str, reason: str):
+    success, failure_detail = await _trigger_election(reason)
     if success:
         raise HTTPException(status_code=status_code, detail=f"{base_detail} - election restarted")
 
@@ -547,8 +748,9 @@ def _raise_with_election(status_code: int, base_detail: str, reason: str):
     raise HTTPException(status_code=status_code, detail=f"{base_detail} - election failed: {failure_msg}")
 
 @router.get("/variable")
-def get_variable():
+async def get_variable():
     state = global_state.state
+    started = time.perf_counter()
 
     if not state.alive:
         logger.info("GET /variable rejected - node killed")
@@ -559,12 +761,29 @@ def get_variable():
         return {"error": "No leader elected"}
 
     if state.leader_id == state.node_id:
+        if replicator.recovering():
+            _raise_recovering()
+
         logger.info(
             "GET /variable served locally - value=%s",
             state.shared_value
         )
+        VARIABLE_SECONDS.observe(time.perf_counter() - started, "GET", "local")
         return {
             "value": state.shared_value,
+            "version": state.shared_version,
+            "served_by": state.node_id
+        }
+
+    cached = state.read_lease.read()
+    if cached is not None:
+        value, version = cached
+        logger.info("GET /variable served from read lease - value=%s version=%s", value, version)
+        VARIABLE_SECONDS.observe(time.perf_counter() - started, "GET", "lease")
+        return {
+            "value": value,
+            "leader_id": state.leader_id,
+            "version": version,
             "served_by": state.node_id
         }
 
@@ -572,29 +791,84 @@ def get_variable():
         "GET /variable forwarding to leader %s",
         state.leader_id
     )
-    response = send_socket_message(
-        *state.leader_node.socket_addr(),
-        {"type": "GET_VAR"}
+    message = {"type": "GET_VAR"}
+    if READ_LEASE_DURATION > 0:
+        message.update(lease_id=state.node_id, lease_host=state.self_host, lease_port=state.socket_port)
+
+    # The lease counts from before the request left, so it ends no later than the leader's record of it.
+    requested_at = time.monotonic()
+    leader_addr = state.leader_node.socket_addr()
+    future, owner = get_var_flights.do(
+        (state.leader_id, leader_addr),
+        partial(send_socket_message_async, *leader_addr, message)
     )
+    response = await asyncio.wrap_future(future)
+    VARIABLE_SECONDS.observe(time.perf_counter() - started, "GET", "forwarded")
 
     if response is None:
-        _raise_with_election(504, "Leader did not respond", "Leader timeout during GET_VAR")
+        await _raise_with_election(504, "Leader did not respond", "Leader timeout during GET_VAR")
 
     if isinstance(response, dict):
         error_code = response.get("error")
         if error_code == "SOCKET_COMM_ERROR":
-            _raise_with_election(503, "Leader socket unreachable", "Leader socket unreachable during GET_VAR")
+            await _raise_with_election(503, "Leader socket unreachable", "Leader socket unreachable during GET_VAR")
+
+        if error_code == "RECOVERING":
+            _raise_recovering()
 
         if error_code in {"NODE_KILLED", "NOT_LEADER"}:
-            _raise_with_election(503, "Leader unavailable", f"Leader responded with {error_code} during GET_VAR")
+            await _raise_with_election(503, "Leader unavailable", f"Leader responded with {error_code} during GET_VAR")
+
+        # Joiners started later than the request; only its owner knows when the lease began.
+        if owner and "lease_ms" in response and response.get("leader_id") == state.leader_id:
+            state.read_lease.store(
+                response["value"],
+                response["version"],
+                requested_at + response["lease_ms"] / 1000
+            )
 
     return response
 
 
 
+def _forward_write_batch(values: list[int]) -> Future:
+    """Send a window of follower writes to the leader as one SET_VAR_BATCH frame."""
+    state = global_state.state
+    result: Future = Future()
+
+    leader = state.leader_node
+    if leader is None:
+        result.set_result({"error": "NOT_LEADER", "leader_id": None})
+        return result
+
+    def split(sent: Future):
+        reply = sent.result()
+        if not (isinstance(reply, dict) and isinstance(reply.get("versions"), list)):
+            result.set_result(reply)
+            return
+
+        result.set_result([
+            {"status": "OK", "value": value, "leader_id": reply["leader_id"], "version": version}
+            for value, version in zip(values, reply["versions"])
+        ])
+
+    send_socket_message_async(
+        *leader.socket_addr(),
+        {"type": "SET_VAR_BATCH", "values": values}
+    ).add_done_callback(split)
+    return result
+
+
+# Writes are group-committed: the leader applies a window of local writes in
+# one step, followers ship theirs to the leader in one frame.
+local_writes = WriteBatcher(SET_BATCH_WINDOW, SET_BATCH_MAX, commit_shared_values)
+forwarded_writes = WriteBatcher(SET_BATCH_WINDOW, SET_BATCH_MAX, _forward_write_batch)
+
+
 @router.post("/variable")
-def set_variable(value: int = Body(..., embed=True)):
+async def set_variable(value: int = Body(..., embed=True)):
     state = global_state.state
+    started = time.perf_counter()
 
     if not state.alive:
         logger.info("POST /variable rejected - node killed")
@@ -605,14 +879,20 @@ def set_variable(value: int = Body(..., embed=True)):
         return {"error": "No leader elected"}
 
     if state.leader_id == state.node_id:
-        state.shared_value = value
+        if replicator.recovering():
+            _raise_recovering()
+
+        version = await asyncio.wrap_future(local_writes.submit(value))
+        VARIABLE_SECONDS.observe(time.perf_counter() - started, "POST", "local")
         logger.info(
-            "POST /variable applied locally - value=%s",
-            value
+            "POST /variable applied locally - value=%s version=%s",
+            value,
+            version
         )
         return {
             "status": "OK",
             "value": value,
+            "version": version,
             "set_by": state.node_id
         }
 
@@ -621,24 +901,22 @@ def set_variable(value: int = Body(..., embed=True)):
         value,
         state.leader_id
     )
-    response = send_socket_message(
-        *state.leader_node.socket_addr(),
-        {
-            "type": "SET_VAR",
-            "value": value
-        }
-    )
+    response = await asyncio.wrap_future(forwarded_writes.submit(value))
+    VARIABLE_SECONDS.observe(time.perf_counter() - started, "POST", "forwarded")
 
     if response is None:
-        _raise_with_election(504, "Leader did not respond", "Leader timeout during SET_VAR")
+        await _raise_with_election(504, "Leader did not respond", "Leader timeout during SET_VAR")
 
     if isinstance(response, dict):
         error_code = response.get("error")
         if error_code == "SOCKET_COMM_ERROR":
-            _raise_with_election(503, "Leader socket unreachable", "Leader socket unreachable during SET_VAR")
+            await _raise_with_election(503, "Leader socket unreachable", "Leader socket unreachable during SET_VAR")
+
+        if error_code == "RECOVERING":
+            _raise_recovering()
 
         if error_code in {"NODE_KILLED", "NOT_LEADER"}:
-            _raise_with_election(503, "Leader unavailable", f"Leader responded with {error_code} during SET_VAR")
+            await _raise_with_election(503, "Leader unavailable", f"Leader responded with {error_code} during SET_VAR")
 
     logger.info(
         "POST /variable acknowledged by leader %s",
@@ -659,3 +937,121 @@ def set_variable(value: int = Body(..., embed=True)):
 
 
 
+
+
+def _kv_unavailable():
+    state = global_state.state
+
+    if not state.alive:
+        logger.info("KV request rejected - node killed")
+        raise HTTPException(status_code=503, detail="Node is killed")
+
+    if state.leader_node is None:
+        logger.info("KV request rejected - no leader elected")
+        return {"error": "No leader elected"}
+
+    return None
+
+
+def _kv_local(reply: dict, **extra):
+    if reply.get("error") == "INVALID_KEY":
+        raise HTTPException(status_code=400, detail="Invalid key")
+    return reply | extra
+
+
+async def _ask_leader(message: dict, kind: str):
+    state = global_state.state
+
+    logger.info("%s forwarding to leader %s", kind, state.leader_id)
+    response = await asyncio.wrap_future(send_socket_message_async(
+        *state.leader_node.socket_addr(),
+        message
+    ))
+
+    if response is None:
+        await _raise_with_election(504, "Leader did not respond", f"Leader timeout during {kind}")
+
+    if isinstance(response, dict):
+        error_code = response.get("error")
+        if error_code == "SOCKET_COMM_ERROR":
+            await _raise_with_election(503, "Leader socket unreachable", f"Leader socket unreachable during {kind}")
+
+        if error_code == "RECOVERING":
+            _raise_recovering()
+
+        if error_code in {"NODE_KILLED", "NOT_LEADER"}:
+            await _raise_with_election(503, "Leader unavailable", f"Leader responded with {error_code} during {kind}")
+
+        if error_code == "INVALID_KEY":
+            raise HTTPException(status_code=400, detail="Invalid key")
+
+    return response
+
+
+@router.get("/kv/{key}")
+async def kv_get(key: str):
+    state = global_state.state
+
+    unavailable = _kv_unavailable()
+    if unavailable:
+        return unavailable
+
+    if state.leader_id == state.node_id:
+        if replicator.recovering():
+            _raise_recovering()
+
+        return _kv_local(handle_get_key({"key": key}), served_by=state.node_id)
+
+    return await _ask_leader({"type": "GET_KEY", "key": key}, "GET_KEY")
+
+
+@router.post("/kv/{key}")
+async def kv_set(key: str, value=Body(..., embed=True)):
+    state = global_state.state
+
+    unavailable = _kv_unavailable()
+    if unavailable:
+        return unavailable
+
+    if state.leader_id == state.node_id:
+        if replicator.recovering():
+            _raise_recovering()
+
+        reply = await asyncio.to_thread(handle_set_key, {"key": key, "value": value})
+        return _kv_local(reply, set_by=state.node_id)
+
+    return await _ask_leader({"type": "SET_KEY", "key": key, "value": value}, "SET_KEY")
+
+
+@router.get("/kv")
+async def kv_mget(keys: list[str] = Query(...)):
+    state = global_state.state
+
+    unavailable = _kv_unavailable()
+    if unavailable:
+        return unavailable
+
+    if state.leader_id == state.node_id:
+        if replicator.recovering():
+            _raise_recovering()
+
+        return _kv_local(handle_mget_keys({"keys": keys}))
+
+    return await _ask_leader({"type": "MGET_KEYS", "keys": keys}, "MGET_KEYS")
+
+
+@router.post("/kv")
+async def kv_mset(entries: dict = Body(..., embed=True)):
+    state = global_state.state
+
+    unavailable = _kv_unavailable()
+    if unavailable:
+        return unavailable
+
+    if state.leader_id == state.node_id:
+        if replicator.recovering():
+            _raise_recovering()
+
+        return _kv_local(await asyncio.to_thread(handle_mset_keys, {"entries": entries}))
+
+    return await _ask_leader({"type": "MSET_KEYS", "entries": entries}, "MSET_KEYS")
@@ -0,0 +1,186 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import app.state as global_state
+from app.config import (
+    LEADER_ANNOUNCE_MODE,
+    SOCKET_SERVER_IDLE_TIMEOUT,
+    SOCKET_SERVER_MAX_CONCURRENCY,
+    SOCKET_SERVER_WORKERS,
+)
+from app.messages import FRAME_HEADER, JSON_CODEC, MAX_FRAME_SIZE, decode_payload
+from app.socket_server import accept_hello, encode_reply, logger, process_message
+
+# Handlers that never block on other nodes (ELECTION and LEADER only queue their
+# onward hop); they are served on the event loop without a worker pool hop.
+# Writes (SET_VAR, SET_KEY, ...) are left to the executor: the leader waits there
+# until read leases are revoked and, with REPLICATION_ACK=one, a replica has acked.
+INLINE_MESSAGE_TYPES = {
+    "PING",
+    "HEARTBEAT",
+    "GET_VAR",
+    "VAR_INVALIDATE",
+    "GET_KEY",
+    "MGET_KEYS",
+    "ELECTION",
+    "HS_PROBE",
+    "HS_REPLY",
+    "LEADER",
+}
+
+if LEADER_ANNOUNCE_MODE == "fanout":
+    # A fanned-out LEADER is acknowledged only after our replica is offered to the leader.
+    INLINE_MESSAGE_TYPES.discard("LEADER")
+
+# Applying a replication message can fsync the WAL under the replicator lock,
+# so these run on the executor, but one at a time per connection and in the
+# order they arrived: an append must not overtake the snapshot before it.
+SERIAL_MESSAGE_TYPES = frozenset({"REPL_APPEND", "REPL_SNAPSHOT"})
+
+WRITE_BUFFER_LIMIT = 64 * 1024
+
+
+class AsyncSocketServer:
+    def __init__(self, max_concurrency: int, workers: int):
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="socket-async"
+        )
+        self._slots: asyncio.Semaphore | None = None
+
+    async def serve(self, host: str, port: int):
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+
+        logger.info(
+            f"node={global_state.state.node_id if global_state.state else '?'}: "
+            f"asyncio server listening on {host}:{port}"
+        )
+
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername") or ("?", 0)
+        pending: set[asyncio.Task] = set()
+        serial_tail: asyncio.Task | None = None
+        loop = asyncio.get_running_loop()
+        last_activity = loop.time()
+
+        # A resettable timer is much cheaper than wrapping every read in wait_for.
+        def close_if_idle():
+            nonlocal idle_timer
+            remaining = last_activity + SOCKET_SERVER_IDLE_TIMEOUT - loop.time()
+            if remaining <= 0 and not pending:
+                writer.close()
+                return
+            idle_timer = loop.call_later(remaining if remaining > 0 else SOCKET_SERVER_IDLE_TIMEOUT, close_if_idle)
+
+        idle_timer = loop.call_later(SOCKET_SERVER_IDLE_TIMEOUT, close_if_idle)
+        codec = JSON_CODEC
+        first_frame = True
+
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                last_activity = loop.time()
+
+                length, request_id = FRAME_HEADER.unpack(header)
+                if length > MAX_FRAME_SIZE:
+                    raise ValueError(f"frame too large ({length} bytes)")
+
+                payload = await reader.readexactly(length)
+
+                if first_frame:
+                    first_frame = False
+                    hello = accept_hello(request_id, payload)
+                    if hello:
+                        codec, reply = hello
+                        writer.write(reply)
+                        continue
+
+                try:
+                    message = decode_payload(payload, codec)
+                except ValueError:
+                    message = None
+
+                if not isinstance(message, dict):
+                    writer.write(encode_reply(request_id, {"error": "MALFORMED_MESSAGE"}, codec))
+                    continue
+
+                if message.get("type") in INLINE_MESSAGE_TYPES:
+                    writer.write(encode_reply(request_id, process_message(message, peer[0]), codec))
+                    if writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+                        await writer.drain()
+                    continue
+
+                # Stop reading from this connection until a slot frees up.
+                await self._slots.acquire()
+                serial = message.get("type") in SERIAL_MESSAGE_TYPES
+                task = asyncio.create_task(
+                    self._serve(writer, peer[0], request_id, message, codec, serial_tail if serial else None)
+                )
+                if serial:
+                    serial_tail = task
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        except Exception as e:
+            logger.warning(
+                "node=%s: socket error from host=%s error=%s",
+                global_state.state.node_id,
+                peer[0],
+                e
+            )
+
+        finally:
+            idle_timer.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+    async def _serve(
+        self,
+        writer: asyncio.StreamWriter,
+        peer_host: str,
+        request_id: int,
+        message: dict,
+        codec,
+        after: asyncio.Task | None = None
+    ):
+        try:
+            if after is not None:
+                # The previous message of this connection's serial lane goes first.
+                await asyncio.wait({after})
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self.executor,
+                process_message,
+                message,
+                peer_host
+            )
+        finally:
+            self._slots.release()
+
+        if writer.is_closing():
+            return
+
+        writer.write(encode_reply(request_id, response, codec))
+        try:
+            await writer.drain()
+        except ConnectionError as e:
+            logger.warning(
+                "node=%s: failed to reply to host=%s error=%s",
+                global_state.state.node_id,
+                peer_host,
+                e
+            )
+
+
+def start_async_socket_server(host: str, port: int):
+    server = AsyncSocketServer(SOCKET_SERVER_MAX_CONCURRENCY, SOCKET_SERVER_WORKERS)
+    asyncio.run(server.serve(host, port))
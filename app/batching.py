@@ -0,0 +1,101 @@
+import threading
+from concurrent.futures import Future
+from functools import partial
+
+from app.scheduler import scheduler
+
+
+class WriteBatcher:
+    """Group writes that arrive within ``window`` seconds into one flush.
+
+    ``flush(items)`` returns a future that resolves either to one reply per
+    item, in order, or to a single dict (typically an error) that every
+    item of the batch receives. A batch is flushed when the window closes
+    or as soon as it holds ``max_size`` items; a window of 0 flushes every
+    write on its own.
+    """
+
+    def __init__(self, window: float, max_size: int, flush):
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._flush = flush
+        self._lock = threading.Lock()
+        self._pending: list[tuple[object, Future]] = []
+        self._timer = None
+        self._counts = {"writes": 0, "batches": 0, "largest": 0}
+
+    def submit(self, item) -> Future:
+        future: Future = Future()
+
+        with self._lock:
+            self._pending.append((item, future))
+            self._counts["writes"] += 1
+
+            if self.window <= 0 or len(self._pending) >= self.max_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = scheduler.schedule(self.window, self._flush_due)
+
+        if batch:
+            self._send(batch)
+
+        return future
+
+    def _take(self) -> list[tuple[object, Future]]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            self._counts["batches"] += 1
+            self._counts["largest"] = max(self._counts["largest"], len(batch))
+        return batch
+
+    def _flush_due(self):
+        with self._lock:
+            self._timer = None
+            batch = self._take()
+
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: list[tuple[object, Future]]):
+        try:
+            outcome = self._flush([item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        outcome.add_done_callback(partial(self._settle, batch))
+
+    @staticmethod
+    def _settle(batch: list[tuple[object, Future]], outcome: Future):
+        exc = outcome.exception()
+        if exc is not None:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        replies = outcome.result()
+        if isinstance(replies, list) and len(replies) == len(batch):
+            for (_, future), reply in zip(batch, replies):
+                future.set_result(reply)
+            return
+
+        for _, future in batch:
+            future.set_result(replies)
+
+    def reset(self):
+        with self._lock:
+            self._counts = {"writes": 0, "batches": 0, "largest": 0}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+
+        counts["average"] = round(counts["writes"] / counts["batches"], 3) if counts["batches"] else None
+        return counts
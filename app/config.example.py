@@ -21,5 +21,130 @@ SOCKET_PORT = 9001
 LOG_AGGREGATOR_HOST = "192.168.56.103"
 LOG_AGGREGATOR_PORT = 9020
 
+# Kapacita fronty logovacích záznamů; záznamy zapisuje na konzoli, do souboru
+# a agregátoru jedno vlákno na pozadí, při plné frontě se záznam zahodí
+LOG_QUEUE_SIZE = 10000
+
+# Formát dávek posílaných agregátoru: "json" (JSON řádky) nebo "msgpack"
+# (vyžaduje balíček msgpack, jinak se použije JSON); komprese "zlib" nebo "none"
+LOG_SHIP_FORMAT = "json"
+LOG_SHIP_COMPRESSION = "zlib"
+
+# Dávka se odešle po LOG_SHIP_BATCH záznamech nebo po LOG_SHIP_INTERVAL sekundách
+LOG_SHIP_BATCH = 500
+LOG_SHIP_INTERVAL = 0.2
+
+# Kam se dávky ukládají, když je agregátor nedostupný (prázdné = zahodit);
+# po obnovení spojení se odešlou jako první
+LOG_SPOOL_DIR = "logs/spool"
+LOG_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
 # Lze nastavit zpoždění odesílání zpráv
 MESSAGE_DELAY = 0.0
+
+# Po kolika sekundách se nedokončené volby považují za ztracené
+ELECTION_ROUND_TIMEOUT = 60.0
+
+# Algoritmus voleb: "chang-roberts" nebo "hirschberg-sinclair"
+# (všechny uzly jednoho nasazení musí používat stejný)
+ELECTION_ALGORITHM = "chang-roberts"
+
+# Náhodné čekání (0 až ELECTION_BACKOFF s) před volbami, které spustil
+# nedostupný vůdce; dorazí-li mezitím volby novější epochy, uzel vlastní nespustí
+ELECTION_BACKOFF = 0.3
+
+# Počet vláken, která odesílají zpožděné zprávy z plánovací fronty
+DELAY_WORKERS = 16
+
+# Pool perzistentních socket spojení k sousedům (spojení na souseda,
+# počet souběžných požadavků na jednom spojení)
+SOCKET_POOL_SIZE = 2
+SOCKET_PIPELINE_DEPTH = 64
+SOCKET_POOL_IDLE_TIMEOUT = 30.0
+
+# Po jaké době nečinnosti socket server uzavře spojení
+SOCKET_SERVER_IDLE_TIMEOUT = 120.0
+
+# Počet vláken, která obsluhují přijaté socket zprávy
+SOCKET_SERVER_WORKERS = 32
+
+# Kodeky socket zpráv v pořadí preference (vyjednávají se pro každé spojení)
+SOCKET_CODECS = ["binary", "json"]
+
+# Implementace socket serveru: "threaded" (vlákno na spojení) nebo "asyncio"
+SOCKET_SERVER_MODE = "threaded"
+
+# Max. počet rozpracovaných požadavků v asyncio serveru
+SOCKET_SERVER_MAX_CONCURRENCY = 1024
+
+# Jak dlouho (s) smí follower obsluhovat čtení proměnné z lokální kopie
+# bez dotazu na vůdce; 0 čtecí lease vypne
+READ_LEASE_DURATION = 2.0
+
+# Rezerva (s) na rozdílný chod hodin uzlů: nový vůdce potvrdí první zápis
+# až po READ_LEASE_DURATION + LEASE_DRIFT_MARGIN od svého zvolení
+LEASE_DRIFT_MARGIN = 0.25
+
+# Zápisy proměnné přijaté během okna (s) se odešlou/aplikují jako jedna dávka
+# (nejvýše SET_BATCH_MAX zápisů); 0 dávkování vypne
+SET_BATCH_WINDOW = 0.002
+SET_BATCH_MAX = 256
+
+# Počet shardů (samostatně zamykaných částí) key-value úložiště
+KV_SHARDS = 16
+
+# Replikace stavu vůdce na následníky: počet replik (0 = vypnuto) a režim
+# potvrzení zápisu: "async" (nečeká se) nebo "one" (čeká se na jednu repliku,
+# nejdéle REPL_ACK_TIMEOUT sekund)
+REPLICATION_FACTOR = 2
+REPLICATION_ACK = "async"
+
+# Velikost dávky replikačního logu, počet dávek na cestě k jedné replice
+# a počet posledních záznamů, které vůdce drží pro dohnání zpožděné repliky
+REPL_BATCH_MAX = 256
+REPL_PIPELINE_DEPTH = 4
+REPL_LOG_SIZE = 10000
+REPL_ACK_TIMEOUT = 2.0
+
+# Jak dlouho nový vůdce čeká na stav od replik, než začne přijímat zápisy,
+# a jak často kontroluje následníky a opakuje neúspěšné přenosy
+REPL_RECOVERY_TIMEOUT = 2.0
+REPL_SYNC_INTERVAL = 1.0
+
+# Trvalé uložení stavu: adresář pro write-ahead log a snapshoty (prázdný =
+# vypnuto). WAL_FSYNC určuje, kdy se zápis vynutí na disk: "always" (po každém
+# zápisu), "batch" (jeden společný fsync pro všechny zápisy, které přišly během
+# předchozího fsync a dalších WAL_FSYNC_INTERVAL sekund) nebo "none" (jen do
+# bufferu OS). Po WAL_SNAPSHOT_EVERY záznamech se log zkomprimuje do snapshotu;
+# kontrola běží každých WAL_CHECKPOINT_INTERVAL sekund
+DATA_DIR = ""
+WAL_FSYNC = "batch"
+WAL_FSYNC_INTERVAL = 0.0
+WAL_SNAPSHOT_EVERY = 10000
+WAL_CHECKPOINT_INTERVAL = 0.5
+
+# Detektor selhání: jak často (s) uzel posílá HEARTBEAT sousedům prev, next
+# a next_next (0 = vypnuto) a od jaké hodnoty phi (phi accrual) souseda
+# považuje za mrtvého a začne opravovat kruh
+HEARTBEAT_INTERVAL = 0.5
+HEARTBEAT_PHI_THRESHOLD = 8.0
+
+# Délka seznamu následníků (jako v Chordu, min. 2): kruh přežije výpadek
+# SUCCESSOR_LIST_SIZE - 1 po sobě jdoucích uzlů bez prohledávání NODE_REGISTRY
+SUCCESSOR_LIST_SIZE = 4
+
+# Oprava kruhu: kolik kandidátů na nového následníka se testuje současně
+# a jak dlouho (s) se čeká na odpověď jednoho z nich
+REPAIR_PROBE_PARALLELISM = 8
+REPAIR_PROBE_TIMEOUT = 1.0
+
+# Oznámení nového vůdce: "ring" (zpráva LEADER obejde kruh uzel po uzlu)
+# nebo "fanout" (vůdce ji pošle všem členům z pohledu na členství najednou)
+LEADER_ANNOUNCE_MODE = "ring"
+
+# Rozesílání všem členům (fanout oznámení vůdce, změny členství): kolik
+# zpráv je na cestě současně, kolikrát se zopakuje zpráva uzlu, který
+# neodpověděl, a jak dlouho (s) se na odpověď čeká
+FANOUT_PARALLELISM = 16
+FANOUT_RETRIES = 2
+FANOUT_TIMEOUT = 2.0
@@ -41,8 +41,104 @@ def _resolve_aggregator():
 
 LOG_AGGREGATOR_HOST, LOG_AGGREGATOR_PORT = _resolve_aggregator()
 
+LOG_QUEUE_SIZE = _as_int(os.getenv("LOG_QUEUE_SIZE"), 10000) or 10000
+
+LOG_SHIP_FORMAT = os.getenv("LOG_SHIP_FORMAT", "json").lower()
+
+LOG_SHIP_COMPRESSION = os.getenv("LOG_SHIP_COMPRESSION", "zlib").lower()
+
+LOG_SHIP_BATCH = _as_int(os.getenv("LOG_SHIP_BATCH"), 500) or 500
+
+LOG_SHIP_INTERVAL = _as_float(os.getenv("LOG_SHIP_INTERVAL"), 0.2)
+
+LOG_SPOOL_DIR = os.getenv("LOG_SPOOL_DIR", "logs/spool")
+
+LOG_SPOOL_MAX_BYTES = _as_int(os.getenv("LOG_SPOOL_MAX_BYTES"), 64 * 1024 * 1024) or 64 * 1024 * 1024
+
 MESSAGE_DELAY = _as_float(os.getenv("MESSAGE_DELAY"), 0.0)
 
+ELECTION_ROUND_TIMEOUT = _as_float(os.getenv("ELECTION_ROUND_TIMEOUT"), 60.0)
+
+ELECTION_ALGORITHM = os.getenv("ELECTION_ALGORITHM", "chang-roberts").lower()
+
+ELECTION_BACKOFF = _as_float(os.getenv("ELECTION_BACKOFF"), 0.3)
+
+DELAY_WORKERS = _as_int(os.getenv("DELAY_WORKERS"), 16) or 16
+
+SOCKET_POOL_SIZE = _as_int(os.getenv("SOCKET_POOL_SIZE"), 2) or 2
+
+SOCKET_PIPELINE_DEPTH = _as_int(os.getenv("SOCKET_PIPELINE_DEPTH"), 64) or 64
+
+SOCKET_POOL_IDLE_TIMEOUT = _as_float(os.getenv("SOCKET_POOL_IDLE_TIMEOUT"), 30.0)
+
+SOCKET_SERVER_IDLE_TIMEOUT = _as_float(os.getenv("SOCKET_SERVER_IDLE_TIMEOUT"), 120.0)
+
+SOCKET_SERVER_WORKERS = _as_int(os.getenv("SOCKET_SERVER_WORKERS"), 32) or 32
+
+SOCKET_CODECS = [
+    name.strip().lower()
+    for name in os.getenv("SOCKET_CODECS", "binary,json").split(",")
+    if name.strip()
+]
+
+SOCKET_SERVER_MODE = os.getenv("SOCKET_SERVER_MODE", "threaded").lower()
+
+SOCKET_SERVER_MAX_CONCURRENCY = _as_int(os.getenv("SOCKET_SERVER_MAX_CONCURRENCY"), 1024) or 1024
+
+READ_LEASE_DURATION = _as_float(os.getenv("READ_LEASE_DURATION"), 2.0)
+
+LEASE_DRIFT_MARGIN = _as_float(os.getenv("LEASE_DRIFT_MARGIN"), 0.25)
+
+SET_BATCH_WINDOW = _as_float(os.getenv("SET_BATCH_WINDOW"), 0.002)
+
+SET_BATCH_MAX = _as_int(os.getenv("SET_BATCH_MAX"), 256) or 256
+
+KV_SHARDS = _as_int(os.getenv("KV_SHARDS"), 16) or 16
+
+REPLICATION_FACTOR = _as_int(os.getenv("REPLICATION_FACTOR"), 2)
+
+REPLICATION_ACK = os.getenv("REPLICATION_ACK", "async").lower()
+
+REPL_BATCH_MAX = _as_int(os.getenv("REPL_BATCH_MAX"), 256) or 256
+
+REPL_PIPELINE_DEPTH = _as_int(os.getenv("REPL_PIPELINE_DEPTH"), 4) or 4
+
+REPL_LOG_SIZE = _as_int(os.getenv("REPL_LOG_SIZE"), 10000) or 10000
+
+REPL_ACK_TIMEOUT = _as_float(os.getenv("REPL_ACK_TIMEOUT"), 2.0)
+
+REPL_RECOVERY_TIMEOUT = _as_float(os.getenv("REPL_RECOVERY_TIMEOUT"), 2.0)
+
+REPL_SYNC_INTERVAL = _as_float(os.getenv("REPL_SYNC_INTERVAL"), 1.0)
+
+DATA_DIR = os.getenv("DATA_DIR", "")
+
+WAL_FSYNC = os.getenv("WAL_FSYNC", "batch").lower()
+
+WAL_FSYNC_INTERVAL = _as_float(os.getenv("WAL_FSYNC_INTERVAL"), 0.0)
+
+WAL_SNAPSHOT_EVERY = _as_int(os.getenv("WAL_SNAPSHOT_EVERY"), 10000) or 10000
+
+WAL_CHECKPOINT_INTERVAL = _as_float(os.getenv("WAL_CHECKPOINT_INTERVAL"), 0.5)
+
+HEARTBEAT_INTERVAL = _as_float(os.getenv("HEARTBEAT_INTERVAL"), 0.5)
+
+HEARTBEAT_PHI_THRESHOLD = _as_float(os.getenv("HEARTBEAT_PHI_THRESHOLD"), 8.0)
+
+SUCCESSOR_LIST_SIZE = _as_int(os.getenv("SUCCESSOR_LIST_SIZE"), 4) or 4
+
+REPAIR_PROBE_PARALLELISM = _as_int(os.getenv("REPAIR_PROBE_PARALLELISM"), 8) or 8
+
+REPAIR_PROBE_TIMEOUT = _as_float(os.getenv("REPAIR_PROBE_TIMEOUT"), 1.0)
+
+LEADER_ANNOUNCE_MODE = os.getenv("LEADER_ANNOUNCE_MODE", "ring").lower()
+
+FANOUT_PARALLELISM = _as_int(os.getenv("FANOUT_PARALLELISM"), 16) or 16
+
+FANOUT_RETRIES = _as_int(os.getenv("FANOUT_RETRIES"), 2)
+
+FANOUT_TIMEOUT = _as_float(os.getenv("FANOUT_TIMEOUT"), 2.0)
+
 try:  
     from app.config_local import *  # type: ignore # noqa
 except ImportError:
@@ -0,0 +1,272 @@
+import threading
+
+FORWARD = "FORWARD"
+SWALLOW = "SWALLOW"
+ELECTED = "ELECTED"
+
+
+def chang_roberts_step(node_id: int, participant: bool, candidate_id: int) -> tuple[str, int | None]:
+    """Decide what a node does with an incoming candidate id.
+
+    A node that already takes part in the round swallows candidates smaller
+    than itself: it has either forwarded its own id or a larger one, so the
+    smaller candidate can never win.
+    """
+    if candidate_id > node_id:
+        return FORWARD, candidate_id
+
+    if candidate_id < node_id:
+        if participant:
+            return SWALLOW, None
+        return FORWARD, node_id
+
+    return ELECTED, node_id
+
+
+NEXT = "next"
+PREV = "prev"
+
+
+def opposite(direction: str) -> str:
+    return PREV if direction == NEXT else NEXT
+
+
+class Decision:
+    """Outcome of one election step: the reply status plus messages to send on."""
+
+    def __init__(self, status: str = "OK"):
+        self.status = status
+        self.sends: list[tuple[str, dict]] = []
+        self.participate = False
+        self.swallowed = False
+        self.elected = False
+
+    def send(self, direction: str, message: dict) -> "Decision":
+        self.sends.append((direction, message))
+        return self
+
+
+class ElectionStrategy:
+    """Ring election algorithm, independent of how messages travel.
+
+    A strategy only decides; the caller delivers ``Decision.sends`` to the
+    successor or predecessor and owns epochs, locking and stats. The same
+    objects therefore drive the socket plane and the benchmark simulation.
+    """
+
+    name = ""
+    message_types: tuple[str, ...] = ()
+
+    def __init__(self, node_id: int):
+        self.node_id = node_id
+
+    def reset(self):
+        """Forget per-round state; called whenever a newer epoch is adopted."""
+
+    def start(self, epoch: int) -> Decision:
+        raise NotImplementedError
+
+    def on_message(self, msg: dict, participant: bool, epoch: int) -> Decision:
+        raise NotImplementedError
+
+
+class ChangRobertsElection(ElectionStrategy):
+    """Unidirectional ring election; O(n log n) messages on average, O(n^2) worst case."""
+
+    name = "chang-roberts"
+    message_types = ("ELECTION",)
+
+    def __init__(self, node_id: int, participant_rule: bool = True):
+        super().__init__(node_id)
+        self.participant_rule = participant_rule
+
+    def _candidate(self, candidate_id: int, epoch: int) -> dict:
+        return {"type": "ELECTION", "candidate_id": candidate_id, "epoch": epoch}
+
+    def start(self, epoch: int) -> Decision:
+        decision = Decision("STARTED")
+        decision.participate = True
+        return decision.send(NEXT, self._candidate(self.node_id, epoch))
+
+    def on_message(self, msg: dict, participant: bool, epoch: int) -> Decision:
+        action, forward_id = chang_roberts_step(
+            self.node_id,
+            participant and self.participant_rule,
+            msg["candidate_id"]
+        )
+
+        if action == SWALLOW:
+            decision = Decision("SWALLOWED")
+            decision.swallowed = True
+            return decision
+
+        if action == FORWARD:
+            decision = Decision("FORWARDED")
+            decision.participate = True
+            return decision.send(NEXT, self._candidate(forward_id, epoch))
+
+        decision = Decision("LEADER")
+        decision.elected = True
+        return decision
+
+
+class HirschbergSinclairElection(ElectionStrategy):
+    """Bidirectional ring election with O(n log n) messages in the worst case.
+
+    In phase k a candidate probes 2^k hops along both ``next`` and ``prev``.
+    A larger id on the way kills the probe; the node at distance 2^k sends a
+    reply back. Only a candidate that gets both replies moves to phase k+1,
+    and the one whose probe comes all the way around wins. A node woken up
+    by a smaller probe joins as a candidate itself, so a single starter is
+    enough.
+    """
+
+    name = "hirschberg-sinclair"
+    message_types = ("HS_PROBE", "HS_REPLY")
+
+    def __init__(self, node_id: int):
+        super().__init__(node_id)
+        self.reset()
+
+    def reset(self):
+        self.started = False
+        self.candidate = False
+        self.elected = False
+        self.phase = 0
+        self.replies = 0
+
+    def _probe_both(self, decision: Decision, epoch: int) -> Decision:
+        for direction in (NEXT, PREV):
+            decision.send(direction, {
+                "type": "HS_PROBE",
+                "candidate_id": self.node_id,
+                "phase": self.phase,
+                "hop": 1,
+                "direction": direction,
+                "epoch": epoch
+            })
+        return decision
+
+    def start(self, epoch: int) -> Decision:
+        self.reset()
+        self.started = True
+        self.candidate = True
+
+        decision = Decision("STARTED")
+        decision.participate = True
+        return self._probe_both(decision, epoch)
+
+    def on_message(self, msg: dict, participant: bool, epoch: int) -> Decision:
+        if msg["type"] == "HS_PROBE":
+            return self._on_probe(msg, epoch)
+        return self._on_reply(msg, epoch)
+
+    def _on_probe(self, msg: dict, epoch: int) -> Decision:
+        candidate_id = msg["candidate_id"]
+        direction = msg["direction"]
+
+        if candidate_id == self.node_id:
+            # Both probes of the winning phase come home; only the first one counts.
+            if self.elected or not self.candidate:
+                return Decision("IGNORED")
+            self.elected = True
+            decision = Decision("LEADER")
+            decision.elected = True
+            return decision
+
+        if candidate_id < self.node_id:
+            decision = Decision("SWALLOWED")
+            decision.swallowed = True
+            if not self.started:
+                self.started = True
+                self.candidate = True
+                decision.participate = True
+                self._probe_both(decision, epoch)
+            return decision
+
+        self.started = True
+        self.candidate = False
+
+        decision = Decision()
+        decision.participate = True
+
+        if msg["hop"] < 2 ** msg["phase"]:
+            decision.status = "FORWARDED"
+            return decision.send(direction, {**msg, "hop": msg["hop"] + 1, "epoch": epoch})
+
+        decision.status = "REPLIED"
+        return decision.send(opposite(direction), {
+            "type": "HS_REPLY",
+            "candidate_id": candidate_id,
+            "phase": msg["phase"],
+            "direction": opposite(direction),
+            "epoch": epoch
+        })
+
+    def _on_reply(self, msg: dict, epoch: int) -> Decision:
+        if msg["candidate_id"] != self.node_id:
+            decision = Decision("FORWARDED")
+            return decision.send(msg["direction"], {**msg, "epoch": epoch})
+
+        if not self.candidate or self.elected or msg["phase"] != self.phase:
+            return Decision("IGNORED")
+
+        self.replies += 1
+        if self.replies < 2:
+            return Decision()
+
+        self.phase += 1
+        self.replies = 0
+        return self._probe_both(Decision("NEXT_PHASE"), epoch)
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (ChangRobertsElection, HirschbergSinclairElection)
+}
+
+
+def make_strategy(name: str, node_id: int) -> ElectionStrategy:
+    try:
+        return STRATEGIES[name](node_id)
+    except KeyError:
+        raise ValueError(f"Unknown election algorithm {name!r} (choose from {', '.join(STRATEGIES)})") from None
+
+
+class ElectionStats:
+    FIELDS = (
+        "rounds_started",
+        "election_received",
+        "election_sent",
+        "swallowed",
+        "stale_dropped",
+        "stale_restarts",
+        "leader_received",
+        "leader_sent",
+        "elected",
+        "suppressed",
+        "triggers_coalesced",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+        self._announcement: dict | None = None
+
+    def inc(self, field: str, amount: int = 1):
+        with self._lock:
+            self._counts[field] = self._counts.get(field, 0) + amount
+
+    def announced(self, report: dict):
+        """Keep the completion report of the last fanned-out leader announcement."""
+        with self._lock:
+            self._announcement = report
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self._counts, "last_announcement": self._announcement}
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+            self._announcement = None
@@ -0,0 +1,259 @@
+import math
+import threading
+import time
+from collections import deque
+from functools import partial
+
+import app.state as global_state
+from app.config import HEARTBEAT_INTERVAL, HEARTBEAT_PHI_THRESHOLD, NODE_ID
+from app.logger import setup_logger
+from app.scheduler import scheduler
+from app.socket_client import send_socket_message_async
+
+logger = setup_logger(NODE_ID)
+
+HEARTBEAT_WINDOW = 100
+
+
+class PhiAccrual:
+    """Suspicion level of one peer from the arrival times of its heartbeats.
+
+    Inter-arrival times are modelled as a normal distribution over the
+    last ``window`` samples; ``phi`` is -log10 of the probability that a
+    heartbeat still arrives after the time already waited. The history
+    starts with one nominal interval, so a fresh peer is not suspected
+    before it had a chance to answer.
+    """
+
+    def __init__(self, interval: float, window: int = HEARTBEAT_WINDOW):
+        self._intervals: deque[float] = deque([interval], maxlen=window)
+        self._min_std = interval / 4
+        self.last = time.monotonic()
+
+    def heartbeat(self, now: float):
+        self._intervals.append(now - self.last)
+        self.last = now
+
+    def phi(self, now: float) -> float:
+        mean = sum(self._intervals) / len(self._intervals)
+        variance = sum((sample - mean) ** 2 for sample in self._intervals) / len(self._intervals)
+        std = max(math.sqrt(variance), self._min_std)
+
+        # Logistic approximation of the normal CDF (as in Akka's detector).
+        y = (now - self.last - mean) / std
+        e = math.exp(-y * (1.5976 + 0.070566 * y * y))
+        if y > 0:
+            return -math.log10(e / (1.0 + e))
+        return -math.log10(1.0 - 1.0 / (1.0 + e))
+
+
+class PeerMonitor:
+    def __init__(self, node, interval: float):
+        self.node = node
+        self.detector = PhiAccrual(interval)
+        self.in_flight = False
+        self.syncing = False
+        self.suspected = False
+        self.last_rtt_ms: float | None = None
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "node_id": self.node.node_id,
+            "phi": round(self.detector.phi(now), 3),
+            "suspected": self.suspected,
+            "since_heartbeat_ms": round((now - self.detector.last) * 1000, 1),
+            "rtt_ms": self.last_rtt_ms,
+        }
+
+
+class FailureDetector:
+    """Heartbeats ``prev``, ``next`` and ``next_next`` over the socket plane.
+
+    Every ``interval`` seconds each neighbour gets a HEARTBEAT; a reply
+    counts as a heartbeat arrival. The reply of ``next`` also carries its
+    successor list, which keeps ours current, and a neighbour whose
+    membership digest differs from ours gets its view pulled. Once a neighbour's phi passes
+    ``threshold`` it is suspected and the registered ``on_suspect``
+    callbacks run on a worker, so the ring is repaired before traffic
+    runs into the dead node. A suspected node that answers again is
+    cleared. Heartbeats skip the artificial ``/setDelay`` delay: phi
+    expects an answer within a few intervals, so a delayed but live
+    neighbour would be suspected and cut out of the ring.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._monitors: dict[int, PeerMonitor] = {}
+        self._listeners = []
+        self._tick = None
+        self._counts = {
+            "heartbeats_sent": 0,
+            "heartbeats_missed": 0,
+            "suspicions": 0,
+            "recoveries": 0,
+            "view_pulls": 0,
+        }
+
+    def on_suspect(self, listener):
+        """``listener(node, roles)`` runs when a neighbour becomes suspected."""
+        self._listeners.append(listener)
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        with self._lock:
+            if self._tick is None:
+                self._tick = scheduler.schedule(self.interval, self._on_tick)
+
+    def is_suspected(self, node_id: int) -> bool:
+        with self._lock:
+            monitor = self._monitors.get(node_id)
+            return bool(monitor and monitor.suspected)
+
+    def suspected_ids(self) -> set[int]:
+        with self._lock:
+            return {node_id for node_id, monitor in self._monitors.items() if monitor.suspected}
+
+    def _neighbors(self, state) -> dict[int, tuple]:
+        peers: dict[int, tuple] = {}
+        for role, node in (("next", state.next_node), ("next_next", state.next_next_node), ("prev", state.prev_node)):
+            if node and node.node_id != state.node_id:
+                known = peers.get(node.node_id)
+                peers[node.node_id] = (node, (known[1] if known else ()) + (role,))
+        return peers
+
+    def _on_tick(self):
+        with self._lock:
+            self._tick = None
+
+        try:
+            self._check()
+        finally:
+            self.start()
+
+    def _check(self):
+        state = global_state.state
+        if not state.alive:
+            # A killed node hears nothing; old histories would flag everyone after a revive.
+            with self._lock:
+                self._monitors.clear()
+            return
+
+        now = time.monotonic()
+        peers = self._neighbors(state)
+        sends = []
+        suspicions = []
+
+        with self._lock:
+            for node_id in list(self._monitors):
+                if node_id not in peers:
+                    del self._monitors[node_id]
+
+            for node_id, (node, roles) in peers.items():
+                monitor = self._monitors.get(node_id)
+                if monitor is None or monitor.node.socket_addr() != node.socket_addr():
+                    monitor = self._monitors[node_id] = PeerMonitor(node, self.interval)
+
+                if not monitor.suspected and monitor.detector.phi(now) > self.threshold:
+                    monitor.suspected = True
+                    self._counts["suspicions"] += 1
+                    suspicions.append((node, roles, monitor.detector.phi(now)))
+
+                # A peer that has not answered the previous heartbeat gets no new one.
+                if not monitor.in_flight:
+                    monitor.in_flight = True
+                    self._counts["heartbeats_sent"] += 1
+                    sends.append((monitor, "next" in roles))
+
+        digest = state.membership.digest()
+        for monitor, is_next in sends:
+            # The successor's reply carries its successor list, which continues ours.
+            message = {"type": "HEARTBEAT", "digest": digest}
+            if is_next:
+                message["successors"] = 1
+            future = send_socket_message_async(
+                *monitor.node.socket_addr(),
+                message,
+                timeout=self.interval * 2,
+                delayed=False
+            )
+            future.add_done_callback(partial(self._on_reply, monitor, time.monotonic()))
+
+        for node, roles, phi in suspicions:
+            logger.warning(
+                "node=%s: neighbour %s (%s) suspected, phi=%.1f",
+                state.node_id,
+                node.node_id,
+                "/".join(roles),
+                phi
+            )
+            for listener in self._listeners:
+                scheduler.defer(0, listener, node, roles)
+
+    def _on_reply(self, monitor: PeerMonitor, sent_at: float, future):
+        reply = future.result()
+        now = time.monotonic()
+        recovered = False
+
+        with self._lock:
+            monitor.in_flight = False
+            if not (isinstance(reply, dict) and reply.get("status") == "OK"):
+                self._counts["heartbeats_missed"] += 1
+                return
+
+            monitor.last_rtt_ms = round((now - sent_at) * 1000, 3)
+            if monitor.suspected:
+                # Start over: the outage is not a sample of the normal heartbeat rhythm.
+                monitor.detector = PhiAccrual(self.interval)
+                monitor.suspected = False
+                self._counts["recoveries"] += 1
+                recovered = True
+            else:
+                monitor.detector.heartbeat(now)
+
+        if reply.get("successors") is not None:
+            global_state.state.adopt_successors(monitor.node, reply["successors"])
+
+        if reply.get("digest") is not None:
+            self._pull_view(monitor)
+
+        if recovered:
+            logger.info("node=%s: neighbour %s answers heartbeats again", global_state.state.node_id, monitor.node.node_id)
+
+    def _pull_view(self, monitor: PeerMonitor):
+        with self._lock:
+            if monitor.syncing:
+                return
+            monitor.syncing = True
+            self._counts["view_pulls"] += 1
+
+        future = send_socket_message_async(
+            *monitor.node.socket_addr(),
+            {"type": "MEMBERSHIP"},
+            timeout=self.interval * 2,
+            delayed=False
+        )
+        future.add_done_callback(partial(self._on_view, monitor))
+
+    def _on_view(self, monitor: PeerMonitor, future):
+        reply = future.result()
+        with self._lock:
+            monitor.syncing = False
+
+        if isinstance(reply, dict) and reply.get("records"):
+            global_state.state.membership.merge(reply["records"])
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "threshold": self.threshold,
+                "peers": [monitor.to_dict(now) for monitor in self._monitors.values()],
+                **self._counts,
+            }
+
+
+failure_detector = FailureDetector(HEARTBEAT_INTERVAL, HEARTBEAT_PHI_THRESHOLD)
@@ -0,0 +1,87 @@
+import threading
+import time
+
+
+class ReadLease:
+    """Follower-side copy of ``shared_value`` that may be served until the lease runs out.
+
+    The expiry is measured from when the follower *sent* GET_VAR, which is
+    never later than when the leader granted it, so the follower always
+    stops serving before the leader stops waiting for it. ``floor`` holds
+    the newest version announced by an invalidation: a grant that was
+    overtaken by one is refused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value: int | None = None
+        self._version = 0
+        self._expires = 0.0
+        self._floor = 0
+        self._counts = {"hits": 0, "misses": 0, "grants": 0, "invalidations": 0}
+
+    def read(self) -> tuple[int | None, int] | None:
+        with self._lock:
+            if time.monotonic() < self._expires:
+                self._counts["hits"] += 1
+                return self._value, self._version
+
+            self._counts["misses"] += 1
+            return None
+
+    def store(self, value: int | None, version: int, expires: float):
+        with self._lock:
+            if version < self._floor or version < self._version:
+                return
+
+            self._value = value
+            self._version = version
+            self._expires = expires
+            self._counts["grants"] += 1
+
+    def invalidate(self, version: int):
+        with self._lock:
+            self._floor = max(self._floor, version)
+            self._expires = 0.0
+            self._counts["invalidations"] += 1
+
+    def clear(self):
+        """Drop everything; versions of a new leader are not comparable with the old one's."""
+        with self._lock:
+            self._value = None
+            self._version = 0
+            self._expires = 0.0
+            self._floor = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self._counts,
+                "valid": time.monotonic() < self._expires,
+                "version": self._version,
+            }
+
+
+class LeaseTable:
+    """Leader-side record of which followers may currently serve reads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._holders: dict[int, tuple] = {}
+
+    def grant(self, holder, duration: float):
+        with self._lock:
+            self._holders[holder.node_id] = (holder, time.monotonic() + duration)
+
+    def take_active(self) -> list[tuple]:
+        now = time.monotonic()
+        with self._lock:
+            active = [entry for entry in self._holders.values() if entry[1] > now]
+            self._holders.clear()
+        return active
+
+    def __len__(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for _, expires in self._holders.values() if expires > now)
+
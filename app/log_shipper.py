@@ -0,0 +1,217 @@
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from pathlib import Path
+
+from app.log_wire import FRAME_HEADER, encode_frame
+from app.metrics import metrics
+
+LOG_RECORDS_SHIPPED = metrics.counter(
+    "dsva_log_records_shipped_total",
+    "Log records sent to the aggregator"
+)
+LOG_RECORDS_SPOOLED = metrics.counter(
+    "dsva_log_records_spooled_total",
+    "Log records written to the disk spool while the aggregator was unreachable"
+)
+LOG_RECORDS_SHIPPER_DROPPED = metrics.counter(
+    "dsva_log_shipper_dropped_total",
+    "Log records the shipper dropped because its buffer or the spool was full"
+)
+
+CONNECT_TIMEOUT = 1.0
+RETRY_START = 1.0
+RETRY_MAX = 30.0
+# Spooled frames are replayed in sends of about this size.
+REPLAY_CHUNK = 256 * 1024
+
+
+class LogShipper(logging.Handler):
+    """Sends records to the aggregator in batches on its own thread.
+
+    Records are batched up to ``batch_size`` or for ``interval`` seconds
+    and sent as one JSON-lines or msgpack frame (see ``app.log_wire``).
+    While the aggregator is unreachable the frames are appended to a spool
+    file, which is replayed, oldest first, before any new batch once a
+    connection is back; the spool survives restarts. There are no
+    acknowledgements: a replay cut short resends its last chunk, and a
+    batch written just as the aggregator goes away can still be lost.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        spool_path: Path | None,
+        codec: str,
+        compression: str,
+        batch_size: int,
+        interval: float,
+        spool_max_bytes: int,
+        buffer_limit: int
+    ):
+        super().__init__()
+        self.address = (host, port)
+        self.spool_path = spool_path
+        self.codec = codec
+        self.compression = compression
+        self.batch_size = batch_size
+        self.interval = interval
+        self.spool_max_bytes = spool_max_bytes
+        self.buffer_limit = buffer_limit
+
+        self._buffer: list[dict] = []
+        self._buffer_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+
+        self._sock: socket.socket | None = None
+        self._retry_at = 0.0
+        self._retry_delay = RETRY_START
+
+        self._spool_bytes = 0
+        self._replayed = 0  # offset in the spool up to which frames were sent
+        if spool_path is not None:
+            spool_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self._spool_bytes = spool_path.stat().st_size
+            except FileNotFoundError:
+                pass
+
+        self._thread = threading.Thread(target=self._run, name="log-shipper", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord):
+        entry = {
+            "created": record.created,
+            "name": record.name,
+            "levelno": record.levelno,
+            "msg": record.getMessage(),
+            "node_id": getattr(record, "node_id", None),
+        }
+        with self._buffer_lock:
+            if len(self._buffer) >= self.buffer_limit:
+                LOG_RECORDS_SHIPPER_DROPPED.inc()
+                return
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.batch_size
+
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._ship()
+
+    def _ship(self):
+        with self._buffer_lock:
+            records, self._buffer = self._buffer, []
+
+        frame = encode_frame(records, self.codec, self.compression) if records else b""
+        if self._spool_bytes and not self._replay():
+            # Keep the order: while older frames wait on disk, new ones queue behind them.
+            self._spool(frame, len(records))
+            return
+
+        if frame:
+            if self._send(frame):
+                LOG_RECORDS_SHIPPED.inc(amount=len(records))
+            else:
+                self._spool(frame, len(records))
+
+    def _connect(self) -> bool:
+        if self._sock is not None:
+            # The aggregator never writes, so a readable socket means it hung up; sending
+            # now would still succeed locally and the batch would be lost with the connection.
+            if not select.select([self._sock], [], [], 0)[0]:
+                return True
+            self._sock.close()
+            self._sock = None
+        if time.monotonic() < self._retry_at:
+            return False
+
+        try:
+            self._sock = socket.create_connection(self.address, timeout=CONNECT_TIMEOUT)
+            self._retry_delay = RETRY_START
+            return True
+        except OSError:
+            self._retry_at = time.monotonic() + self._retry_delay
+            self._retry_delay = min(self._retry_delay * 2, RETRY_MAX)
+            return False
+
+    def _send(self, data: bytes) -> bool:
+        if not self._connect():
+            return False
+        try:
+            self._sock.sendall(data)
+            return True
+        except OSError:
+            self._sock.close()
+            self._sock = None
+            self._retry_at = time.monotonic() + self._retry_delay
+            return False
+
+    def _spool(self, frame: bytes, count: int):
+        if not frame:
+            return
+        if self.spool_path is None or self._spool_bytes + len(frame) > self.spool_max_bytes:
+            LOG_RECORDS_SHIPPER_DROPPED.inc(amount=count)
+            return
+
+        with open(self.spool_path, "ab") as spool:
+            spool.write(frame)
+        self._spool_bytes += len(frame)
+        LOG_RECORDS_SPOOLED.inc(amount=count)
+
+    def _replay(self) -> bool:
+        """Send the spooled frames; True once the spool is empty again."""
+        if not self._connect():
+            return False
+
+        with open(self.spool_path, "rb") as spool:
+            spool.seek(self._replayed)
+            while self._replayed < self._spool_bytes:
+                chunk = self._read_frames(spool)
+                if not chunk:
+                    break  # a torn frame at the end, left by a crash mid-write
+                if not self._send(chunk):
+                    return False
+                self._replayed += len(chunk)
+
+        os.truncate(self.spool_path, 0)
+        self._spool_bytes = 0
+        self._replayed = 0
+        return True
+
+    @staticmethod
+    def _read_frames(spool) -> bytes:
+        """Whole frames from the current position, up to about REPLAY_CHUNK bytes."""
+        chunk = bytearray()
+        while len(chunk) < REPLAY_CHUNK:
+            start = spool.tell()
+            header = spool.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                break
+            (length,) = FRAME_HEADER.unpack(header)
+            body = spool.read(length)
+            if len(body) < length:
+                spool.seek(start)
+                break
+            chunk += header + body
+        return bytes(chunk)
+
+    def close(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=CONNECT_TIMEOUT * 2)
+        self._ship()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        super().close()
@@ -0,0 +1,83 @@
+"""Frames of log records shipped from the nodes to the aggregator.
+
+Each frame is a 4-byte big-endian length followed by a body::
+
+    b"DL" | codec (b"J" JSON lines, b"M" msgpack) | compression (b"-" none, b"z" zlib) | payload
+
+and carries a whole batch of records as plain dicts. Unlike the pickled
+``SocketHandler`` frames it replaces, decoding never executes anything;
+msgpack is optional and JSON lines are always available.
+"""
+import json
+import struct
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # optional, JSON lines are the fallback
+    msgpack = None
+
+FRAME_HEADER = struct.Struct(">L")
+
+MAGIC = b"DL"
+
+CODECS = {"json": b"J", "msgpack": b"M"}
+
+COMPRESSIONS = {"none": b"-", "zlib": b"z"}
+
+# Upper bound of a frame body and of its decompressed payload; larger ones are rejected.
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+
+def available_codec(name: str) -> str:
+    """Codec actually used for ``name``: msgpack falls back to JSON when it is not installed."""
+    if name == "msgpack" and msgpack is None:
+        return "json"
+    return name if name in CODECS else "json"
+
+
+def encode_frame(records: list[dict], codec: str = "json", compression: str = "zlib") -> bytes:
+    if codec == "msgpack":
+        payload = msgpack.packb(records, use_bin_type=True)
+    else:
+        payload = b"\n".join(json.dumps(record, separators=(",", ":")).encode() for record in records)
+
+    if compression == "zlib":
+        payload = zlib.compress(payload, 1)
+
+    body = MAGIC + CODECS[codec] + COMPRESSIONS.get(compression, b"-") + payload
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def decode_frame(body: bytes) -> list[dict]:
+    """Records of one frame body (without the length); ValueError if it is not a valid batch."""
+    if body[:2] != MAGIC or len(body) < 4:
+        raise ValueError("not a log batch frame")
+
+    codec, compression, payload = body[2:3], body[3:4], body[4:]
+    if compression == COMPRESSIONS["zlib"]:
+        inflater = zlib.decompressobj()
+        try:
+            payload = inflater.decompress(payload, MAX_FRAME_BYTES)
+        except zlib.error as exc:
+            raise ValueError(f"corrupt batch: {exc}") from None
+        if inflater.unconsumed_tail:
+            raise ValueError("batch too large")
+    elif compression != COMPRESSIONS["none"]:
+        raise ValueError(f"unknown compression {compression!r}")
+
+    if codec == CODECS["json"]:
+        records = [json.loads(line) for line in payload.splitlines() if line]
+    elif codec == CODECS["msgpack"]:
+        if msgpack is None:
+            raise ValueError("msgpack batch, but msgpack is not installed")
+        try:
+            records = msgpack.unpackb(payload, raw=False)
+        except Exception as exc:  # msgpack raises several unrelated types
+            raise ValueError(f"corrupt batch: {exc}") from None
+    else:
+        raise ValueError(f"unknown codec {codec!r}")
+
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ValueError("batch is not a list of records")
+    return records
@@ -1,7 +1,108 @@
+import atexit
 import logging
-from logging.handlers import SocketHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+
+from app.config import (
+    LOG_AGGREGATOR_HOST,
+    LOG_AGGREGATOR_PORT,
+    LOG_QUEUE_SIZE,
+    LOG_SHIP_BATCH,
+    LOG_SHIP_COMPRESSION,
+    LOG_SHIP_FORMAT,
+    LOG_SHIP_INTERVAL,
+    LOG_SPOOL_DIR,
+    LOG_SPOOL_MAX_BYTES,
+    NODE_ID,
+    SOCKET_PORT,
+)
+from app.log_shipper import LogShipper
+from app.log_wire import available_codec
+from app.metrics import metrics
+
+LOG_RECORDS_DROPPED = metrics.counter(
+    "dsva_log_records_dropped_total",
+    "Log records dropped because the logging queue was full"
+)
+
+# Callers only enqueue; the console, the file and the aggregator shipper are
+# fed by one listener thread, so slow sinks cost dropped records once the
+# queue is full instead of latency on the socket and API paths. The shipper
+# only buffers there and talks to the aggregator from its own thread.
+_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_sinks: dict[str, list[logging.Handler]] = {}
+_listener: QueueListener | None = None
+_listener_lock = threading.Lock()
+_shipper: LogShipper | None = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never waits: a full queue drops the record and counts it.
+
+    Records are tagged with this process's ``NODE_ID`` so the aggregator can
+    index them by node, whatever the logger is called ("socket-server" too).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.node_id = NODE_ID
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class _Dispatcher(logging.Handler):
+    """Runs on the listener thread and hands each record to its logger's own handlers."""
+
+    def emit(self, record: logging.LogRecord):
+        for handler in _sinks.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def _start_listener():
+    global _listener
+
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(_queue, _Dispatcher())
+            _listener.start()
+            atexit.register(_listener.stop)
+
+
+def _aggregator_shipper() -> LogShipper:
+    """One shipper per process, shared by all node loggers; records carry their node_id.
+
+    The spool is named after this node's id and socket port, which no other
+    node process sharing ``LOG_SPOOL_DIR`` uses at the same time.
+    """
+    global _shipper
+
+    with _listener_lock:
+        if _shipper is None:
+            _shipper = LogShipper(
+                LOG_AGGREGATOR_HOST,
+                LOG_AGGREGATOR_PORT,
+                Path(LOG_SPOOL_DIR) / f"node-{NODE_ID}-{SOCKET_PORT}.spool" if LOG_SPOOL_DIR else None,
+                available_codec(LOG_SHIP_FORMAT),
+                LOG_SHIP_COMPRESSION,
+                LOG_SHIP_BATCH,
+                LOG_SHIP_INTERVAL,
+                LOG_SPOOL_MAX_BYTES,
+                LOG_QUEUE_SIZE
+            )
+        return _shipper
+
+
+def dropped_records() -> int:
+    return int(LOG_RECORDS_DROPPED.value())
 
-from app.config import LOG_AGGREGATOR_HOST, LOG_AGGREGATOR_PORT
 
 def setup_logger(node_id: int):
     logger = logging.getLogger(f"node-{node_id}")
@@ -17,25 +118,17 @@ def setup_logger(node_id: int):
     ch = logging.StreamHandler()
     ch.setFormatter(formatter)
 
-   
     fh = logging.FileHandler(f"node_{node_id}.log")
     fh.setFormatter(formatter)
 
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    _sinks[logger.name] = [ch, fh]
+    logger.addHandler(DroppingQueueHandler(_queue))
+    _start_listener()
+
     if LOG_AGGREGATOR_HOST and LOG_AGGREGATOR_PORT:
-        try:
-            socket_handler = SocketHandler(
-                LOG_AGGREGATOR_HOST,
-                LOG_AGGREGATOR_PORT
-            )
-            logger.addHandler(socket_handler)
-        except (ValueError, OSError):
-            logger.warning(
-                "Failed to attach aggregator handler (%s:%s)",
-                LOG_AGGREGATOR_HOST,
-                LOG_AGGREGATOR_PORT
-            )
+        _sinks[logger.name].append(_aggregator_shipper())
+        if available_codec(LOG_SHIP_FORMAT) != LOG_SHIP_FORMAT:
+            logger.warning("LOG_SHIP_FORMAT=%s is not available, shipping logs as JSON", LOG_SHIP_FORMAT)
     logger.propagate = False
 
-    return logger
\ No newline at end of file
+    return logger
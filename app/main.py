@@ -1,23 +1,52 @@
 from fastapi import FastAPI
+import asyncio
 import threading
 import app.state as global_state
 from app.state import NodeState
-from app.api import router
-from app.config import NODE_ID, HOST, SOCKET_PORT
-from app.socket_server import start_socket_server
+from app.api import rejoin_ring, router
+from app.config import NODE_ID, HOST, SOCKET_PORT, SOCKET_SERVER_MODE
+from app.socket_server import publish_membership, start_socket_server
+from app.async_socket_server import start_async_socket_server
+from app.failure_detector import failure_detector
 from app.logger import setup_logger
+from app.wal import journal
+
+# Neighbours answer a rejoin with /update_neighbors, so the REST server has to be listening by then.
+REJOIN_DELAY = 0.5
 
 app = FastAPI()
 
 global_state.state = NodeState(NODE_ID, HOST, SOCKET_PORT)
+global_state.state.membership.on_change(publish_membership)
 
 logger = setup_logger(NODE_ID)
 logger.info("Node starting...")
 
+restored = journal.recover()
+journal.start()
+
 threading.Thread(
-    target=start_socket_server,
+    target=start_async_socket_server if SOCKET_SERVER_MODE == "asyncio" else start_socket_server,
     args=("0.0.0.0", SOCKET_PORT),
     daemon=True
 ).start()
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+
+failure_detector.start()
+
+
+_rejoin_task: asyncio.Task | None = None
+
+
+async def _rejoin_later():
+    await asyncio.sleep(REJOIN_DELAY)
+    await rejoin_ring()
+
+
+@app.on_event("startup")
+async def rejoin_after_restart():
+    global _rejoin_task
+
+    if restored and global_state.state.prev_node:
+        _rejoin_task = asyncio.create_task(_rejoin_later())
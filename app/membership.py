@@ -0,0 +1,141 @@
+import threading
+import zlib
+
+
+class MembershipView:
+    """Epoch-versioned view of the ring's members, kept in sync incrementally.
+
+    Every member has one record: address, the id of its successor, whether
+    it is alive and the Lamport stamp of the change that produced it. A
+    node stamps its own successor changes, joins it accepted and deaths it
+    repaired around; records merge by highest (stamp, origin), so views
+    that saw the same changes agree whatever order they arrived in. The
+    view's ``epoch`` is its Lamport clock, ``digest`` a checksum that lets
+    two nodes notice cheaply that they disagree.
+
+    Ring order is a local walk over the successor ids; dead members are
+    stepped over through their last known successor.
+    """
+
+    def __init__(self, me: dict):
+        self.node_id = me["node_id"]
+        self._lock = threading.Lock()
+        self._records: dict[int, dict] = {
+            self.node_id: {**me, "next_id": None, "alive": True, "stamp": 0, "origin": self.node_id}
+        }
+        self.epoch = 0
+        self._digest: int | None = None
+        self._listeners = []
+
+    def on_change(self, listener):
+        """``listener(records)`` runs with the records a local change produced."""
+        self._listeners.append(listener)
+
+    def _stamp(self, record: dict) -> dict:
+        self.epoch = max(self.epoch, record.get("stamp", 0)) + 1
+        self._digest = None
+        return {**record, "stamp": self.epoch, "origin": self.node_id}
+
+    def _publish(self, records: list[dict]):
+        for listener in self._listeners:
+            listener(records)
+
+    def update_self(self, next_id: int | None):
+        with self._lock:
+            current = self._records[self.node_id]
+            if current["next_id"] == next_id and current["alive"]:
+                return
+            record = self._records[self.node_id] = self._stamp({**current, "next_id": next_id, "alive": True})
+
+        self._publish([record])
+
+    def joined(self, node: dict, next_id: int | None):
+        """A node was inserted into the ring right after us."""
+        with self._lock:
+            current = self._records.get(node["node_id"], {"stamp": 0})
+            record = self._records[node["node_id"]] = self._stamp({
+                **current,
+                **node,
+                "next_id": next_id,
+                "alive": True
+            })
+
+        self._publish([record])
+
+    def mark_dead(self, node_ids):
+        records = []
+        with self._lock:
+            for node_id in node_ids:
+                current = self._records.get(node_id)
+                if current is None or not current["alive"]:
+                    continue
+                record = self._records[node_id] = self._stamp({**current, "alive": False})
+                records.append(record)
+
+        if records:
+            self._publish(records)
+
+    def merge(self, records: list[dict]) -> bool:
+        """Take every record newer than ours; True when anything changed."""
+        changed = False
+        with self._lock:
+            for record in records:
+                current = self._records.get(record["node_id"])
+                if current is None or (record["stamp"], record["origin"]) > (current["stamp"], current["origin"]):
+                    self._records[record["node_id"]] = dict(record)
+                    changed = True
+                self.epoch = max(self.epoch, record["stamp"])
+
+            if changed:
+                self._digest = None
+        return changed
+
+    def records(self) -> list[dict]:
+        with self._lock:
+            return [dict(record) for record in self._records.values()]
+
+    def digest(self) -> int:
+        with self._lock:
+            if self._digest is None:
+                summary = ",".join(
+                    f"{node_id}:{record['stamp']}:{record['origin']}"
+                    for node_id, record in sorted(self._records.items())
+                )
+                self._digest = zlib.crc32(summary.encode())
+            return self._digest
+
+    def ring_order(self) -> list[dict]:
+        """Alive members after us in ring order; ones no pointer reaches follow by id."""
+        with self._lock:
+            order = []
+            seen = {self.node_id}
+            current = self._records[self.node_id]
+
+            while True:
+                next_id = current.get("next_id")
+                if next_id is None or next_id in seen or next_id not in self._records:
+                    break
+                seen.add(next_id)
+                current = self._records[next_id]
+                if current["alive"]:
+                    order.append(dict(current))
+
+            order.extend(
+                dict(record)
+                for node_id, record in sorted(self._records.items())
+                if node_id not in seen and record["alive"]
+            )
+            return order
+
+    def snapshot(self) -> dict:
+        order = self.ring_order()
+        with self._lock:
+            dead = sorted(node_id for node_id, record in self._records.items() if not record["alive"])
+            epoch = self.epoch
+        return {
+            "epoch": epoch,
+            "digest": self.digest(),
+            "ring": [record["node_id"] for record in order],
+            "dead": dead,
+            "members": order,
+        }
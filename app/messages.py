@@ -1,10 +1,29 @@
 import json
+import struct
 from enum import Enum
 
+from app.config import SOCKET_CODECS
+
 
 class MessageType(str, Enum):
     ELECTION = "ELECTION"
     LEADER = "LEADER"
+    GET_VAR = "GET_VAR"
+    SET_VAR = "SET_VAR"
+    PING = "PING"
+    HELLO = "HELLO"
+    HS_PROBE = "HS_PROBE"
+    HS_REPLY = "HS_REPLY"
+    VAR_INVALIDATE = "VAR_INVALIDATE"
+    SET_VAR_BATCH = "SET_VAR_BATCH"
+    GET_KEY = "GET_KEY"
+    SET_KEY = "SET_KEY"
+    MGET_KEYS = "MGET_KEYS"
+    MSET_KEYS = "MSET_KEYS"
+    REPL_APPEND = "REPL_APPEND"
+    REPL_SNAPSHOT = "REPL_SNAPSHOT"
+    HEARTBEAT = "HEARTBEAT"
+    MEMBERSHIP = "MEMBERSHIP"
     VAR_GET = "VAR_GET"
     VAR_SET = "VAR_SET"
     VAR_RESPONSE = "VAR_RESPONSE"
@@ -20,3 +39,205 @@ def make_message(msg_type: MessageType, from_id: int, data: dict | None = None)
 
 def parse_message(raw: str) -> dict:
     return json.loads(raw)
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, message: dict | None) -> bytes:
+        return json.dumps(message, separators=(",", ":")).encode()
+
+    def decode(self, raw: bytes) -> dict | None:
+        return json.loads(raw)
+
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _shape_key(message: dict, size: int) -> tuple:
+    return message.get("type"), message.get("status"), message.get("error"), size
+
+
+class _Shape:
+    """Fixed-shape message packed as a tag byte, int64 fields and an optional trailing string."""
+
+    def __init__(self, tag: int, constants: dict, int_fields: tuple = (), str_field: str | None = None):
+        self.tag = tag
+        self.constants = constants
+        self.int_fields = int_fields
+        self.str_field = str_field
+        self.struct = struct.Struct(">B" + "q" * len(int_fields))
+        self.size = len(constants) + len(int_fields) + (1 if str_field else 0)
+        self.key = _shape_key(constants, self.size)
+
+    def matches(self, message: dict) -> bool:
+        if len(message) != self.size:
+            return False
+
+        for key, value in self.constants.items():
+            if message.get(key) != value:
+                return False
+
+        for key in self.int_fields:
+            value = message.get(key)
+            if type(value) is not int or not _INT64_MIN <= value <= _INT64_MAX:
+                return False
+
+        if self.str_field and type(message.get(self.str_field)) is not str:
+            return False
+
+        return True
+
+    def pack(self, message: dict) -> bytes:
+        head = self.struct.pack(self.tag, *(message[key] for key in self.int_fields))
+        if self.str_field:
+            return head + message[self.str_field].encode()
+        return head
+
+    def unpack(self, raw: bytes) -> dict:
+        message = dict(self.constants)
+        values = self.struct.unpack_from(raw)
+        message.update(zip(self.int_fields, values[1:]))
+        if self.str_field:
+            message[self.str_field] = raw[self.struct.size:].decode()
+        return message
+
+
+class BinaryCodec:
+    """Struct encoding of the hot-path messages; anything else falls back to tagged JSON."""
+
+    name = "binary"
+
+    JSON_TAG = 0
+
+    SHAPES = [
+        _Shape(1, {"type": "ELECTION"}, ("candidate_id", "epoch")),
+        _Shape(2, {"type": "LEADER"}, ("leader_id", "leader_socket_port", "epoch"), "leader_host"),
+        _Shape(3, {"type": "GET_VAR"}),
+        _Shape(4, {"type": "SET_VAR"}, ("value",)),
+        _Shape(5, {"type": "PING"}),
+        _Shape(6, {"type": "HS_PROBE"}, ("candidate_id", "phase", "hop", "epoch"), "direction"),
+        _Shape(7, {"type": "HS_REPLY"}, ("candidate_id", "phase", "epoch"), "direction"),
+        _Shape(8, {"type": "GET_VAR"}, ("lease_id", "lease_port"), "lease_host"),
+        _Shape(9, {"type": "VAR_INVALIDATE"}, ("version",)),
+        _Shape(10, {"type": "GET_KEY"}, (), "key"),
+        _Shape(11, {"type": "SET_KEY"}, ("value",), "key"),
+        _Shape(12, {"type": "HEARTBEAT"}),
+        _Shape(13, {"type": "HEARTBEAT"}, ("successors",)),
+        _Shape(14, {"type": "HEARTBEAT"}, ("digest",)),
+        _Shape(15, {"type": "HEARTBEAT"}, ("successors", "digest")),
+        _Shape(16, {"status": "OK"}),
+        _Shape(17, {"status": "FORWARDED"}),
+        _Shape(18, {"status": "LEADER"}),
+        _Shape(19, {}, ("value", "leader_id")),
+        _Shape(20, {"status": "OK"}, ("value", "leader_id")),
+        _Shape(21, {"error": "NOT_LEADER"}, ("leader_id",)),
+        _Shape(22, {"status": "SWALLOWED"}),
+        _Shape(23, {"status": "STALE"}, ("epoch",)),
+        _Shape(24, {}, ("value", "leader_id", "version")),
+        _Shape(25, {}, ("value", "leader_id", "version", "lease_ms")),
+        _Shape(26, {"status": "OK"}, ("value", "leader_id", "version")),
+        _Shape(27, {}, ("value", "version"), "key"),
+        _Shape(28, {"status": "OK"}, ("version",), "key"),
+        _Shape(29, {"status": "OK"}, ("digest",)),
+        _Shape(30, {"type": "LEADER"}, ("leader_id", "leader_socket_port", "epoch", "fanout"), "leader_host"),
+    ]
+
+    def __init__(self):
+        self._json = JsonCodec()
+        self._by_tag = {shape.tag: shape for shape in self.SHAPES}
+        self._by_key: dict[tuple, list[_Shape]] = {}
+        for shape in self.SHAPES:
+            self._by_key.setdefault(shape.key, []).append(shape)
+
+    def encode(self, message: dict | None) -> bytes:
+        if isinstance(message, dict):
+            for shape in self._by_key.get(_shape_key(message, len(message)), ()):
+                if shape.matches(message):
+                    return shape.pack(message)
+
+        return bytes((self.JSON_TAG,)) + self._json.encode(message)
+
+    def decode(self, raw: bytes) -> dict | None:
+        if not raw:
+            raise ValueError("empty payload")
+
+        tag = raw[0]
+        if tag == self.JSON_TAG:
+            return self._json.decode(raw[1:])
+
+        shape = self._by_tag.get(tag)
+        if shape is None:
+            raise ValueError(f"unknown message tag {tag}")
+
+        try:
+            return shape.unpack(raw)
+        except struct.error as exc:
+            raise ValueError(str(exc)) from exc
+
+
+JSON_CODEC = JsonCodec()
+
+CODECS = {
+    codec.name: codec
+    for codec in (JSON_CODEC, BinaryCodec())
+}
+
+
+def supported_codecs() -> list[str]:
+    return [name for name in SOCKET_CODECS if name in CODECS] or [JSON_CODEC.name]
+
+
+def negotiate_codec(offered) -> JsonCodec | BinaryCodec:
+    if isinstance(offered, list):
+        for name in offered:
+            if name in supported_codecs():
+                return CODECS[name]
+
+    return JSON_CODEC
+
+
+def hello_message() -> dict:
+    return {"type": MessageType.HELLO.value, "codecs": supported_codecs()}
+
+
+def encode_payload(message: dict | None, codec=JSON_CODEC) -> bytes:
+    return codec.encode(message)
+
+
+def decode_payload(raw: bytes, codec=JSON_CODEC) -> dict | None:
+    return codec.decode(raw)
+
+
+# Wire frame: 4-byte payload length + 4-byte request id, both big-endian.
+FRAME_HEADER = struct.Struct(">II")
+
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+MAX_REQUEST_ID = 0xFFFFFFFF
+
+# Request id reserved for the HELLO codec negotiation that opens a connection.
+HELLO_REQUEST_ID = 0
+
+
+def encode_frame(request_id: int, payload: bytes) -> bytes:
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ValueError(f"frame too large ({len(payload)} bytes)")
+    return FRAME_HEADER.pack(len(payload), request_id) + payload
+
+
+def read_frame(reader) -> tuple[int, bytes] | None:
+    header = reader.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+
+    length, request_id = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"frame too large ({length} bytes)")
+
+    payload = reader.read(length)
+    if len(payload) < length:
+        return None
+
+    return request_id, payload
@@ -0,0 +1,496 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+
+import app.state as global_state
+from app.config import (
+    NODE_ID,
+    REPL_ACK_TIMEOUT,
+    REPL_BATCH_MAX,
+    REPL_LOG_SIZE,
+    REPL_PIPELINE_DEPTH,
+    REPL_RECOVERY_TIMEOUT,
+    REPL_SYNC_INTERVAL,
+    REPLICATION_ACK,
+    REPLICATION_FACTOR,
+)
+from app.logger import setup_logger
+from app.scheduler import scheduler
+from app.socket_client import send_socket_message_async
+from app.wal import journal
+
+logger = setup_logger(NODE_ID)
+
+RETRY_BACKOFF = 0.5
+
+
+def lineage_rank(lineage: str | None, seq: int) -> tuple[int, int]:
+    """Order replicated states: a newer leader's lineage first, then the seq within it.
+
+    Seqs of different lineages are not comparable on their own; a new leader
+    keeps counting from what it had applied, so a deposed lineage may be ahead.
+    """
+    epoch = int(lineage.rsplit(".", 1)[1]) if lineage else 0
+    return epoch, seq
+
+
+class ReplicationLog:
+    """Bounded, ordered tail of the leader's writes; older entries are covered by snapshots."""
+
+    def __init__(self, capacity: int):
+        self._lock = threading.Lock()
+        self._entries: deque[dict] = deque(maxlen=capacity)
+        self.last_seq = 0
+
+    def reset(self, seq: int):
+        with self._lock:
+            self._entries.clear()
+            self.last_seq = seq
+
+    def append(self, entry: dict) -> int:
+        with self._lock:
+            self.last_seq += 1
+            self._entries.append({**entry, "seq": self.last_seq})
+            return self.last_seq
+
+    def since(self, seq: int, limit: int) -> list[dict] | None:
+        """Entries after ``seq``; None when they have already been trimmed."""
+        with self._lock:
+            if seq >= self.last_seq:
+                return []
+
+            first = self._entries[0]["seq"] if self._entries else self.last_seq + 1
+            if seq + 1 < first:
+                return None
+
+            start = seq + 1 - first
+            return [self._entries[i] for i in range(start, min(start + limit, len(self._entries)))]
+
+
+class ReplicaStream:
+    """Leader-side progress of one successor replica."""
+
+    def __init__(self, target):
+        self.target = target
+        self.acked = 0
+        self.sent = 0
+        self.in_flight = 0
+        self.snapshot_in_flight = False
+        self.synced = False
+        self.retry_at = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "node_id": self.target.node_id,
+            "acked": self.acked,
+            "sent": self.sent,
+            "in_flight": self.in_flight,
+            "synced": self.synced,
+        }
+
+
+class Replicator:
+    """Ships the leader's writes to its next ``REPLICATION_FACTOR`` successors.
+
+    Writes are appended to an ordered log and streamed in batches, up to
+    ``REPL_PIPELINE_DEPTH`` batches in flight per replica. A replica that
+    is new, belongs to an older leader's lineage or fell behind the
+    retained log first gets a snapshot. Replicas apply entries only when
+    they carry a higher version than what they hold, so batches may arrive
+    in any order; the contiguous ``applied`` watermark is what they ack.
+
+    After a failover the new leader spends up to ``REPL_RECOVERY_TIMEOUT``
+    collecting snapshots that replicas offer when they accept it, keeps
+    the most advanced one, by ``lineage_rank``, and rejects client
+    requests meanwhile.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.log = ReplicationLog(REPL_LOG_SIZE)
+        self.lineage: str | None = None
+        self._streams: dict[int, ReplicaStream] = {}
+        self._waiters: list[tuple[int, Future]] = []
+        self._recovering_until = 0.0
+        self._tick = None
+        # Rank of the state a recovering leader holds; only offers above it are installed.
+        self._held_rank = lineage_rank(None, 0)
+
+        self.applied = 0
+        self.applied_lineage: str | None = None
+        self._received: list[list[int]] = []
+
+        self._counts = {
+            "entries_sent": 0,
+            "batches_sent": 0,
+            "snapshots_sent": 0,
+            "entries_applied": 0,
+            "snapshots_installed": 0,
+            "ack_timeouts": 0,
+        }
+
+    # Leader side -----------------------------------------------------------
+
+    def lead(self, epoch: int):
+        """Start a new lineage continuing from whatever this node already replicated."""
+        state = global_state.state
+
+        with self._lock:
+            self.lineage = f"{state.node_id}.{epoch}"
+            self._held_rank = lineage_rank(self.applied_lineage, self.applied)
+            self.log.reset(self.applied)
+            self._streams.clear()
+            self._recovering_until = time.monotonic() + REPL_RECOVERY_TIMEOUT
+
+        logger.info("Replication: leading lineage %s from seq=%s", self.lineage, self.applied)
+        self._schedule_tick()
+
+    def recovered(self):
+        """The LEADER notice came back around the ring, so every replica has had its say."""
+        with self._lock:
+            if not self.lineage or not self._recovering_until:
+                return
+            self._recovering_until = 0.0
+
+        logger.info("Replication: recovery finished at seq=%s", self.log.last_seq)
+        self.sync()
+
+    def recovering(self) -> bool:
+        with self._lock:
+            if self._recovering_until and time.monotonic() >= self._recovering_until:
+                self._recovering_until = 0.0
+                logger.info("Replication: recovery window elapsed at seq=%s", self.log.last_seq)
+            return bool(self._recovering_until)
+
+    def follow(self, leader) -> Future:
+        """Another node leads now; offer it our state in case it has less.
+
+        The future resolves when the leader has answered the offer (at once
+        if there is nothing to offer).
+        """
+        with self._lock:
+            was_leading = self.lineage is not None
+            if was_leading:
+                self.applied = self.log.last_seq
+                self.applied_lineage = self.lineage
+            self.lineage = None
+            self._streams.clear()
+            waiters, self._waiters = self._waiters, []
+
+        for seq, future in waiters:
+            future.set_result(seq)
+
+        if REPLICATION_FACTOR > 0 and self.applied > 0 and leader is not None:
+            return send_socket_message_async(*leader.socket_addr(), self._snapshot(offer=True))
+
+        offered: Future = Future()
+        offered.set_result(None)
+        return offered
+
+    def append(self, entry: dict) -> int:
+        """Log a write; call it in the same critical section that applied the write."""
+        if REPLICATION_FACTOR <= 0 or self.lineage is None:
+            return 0
+        return self.log.append(entry)
+
+    def replicated(self, seq: int) -> Future:
+        """Future resolving once the ack mode is satisfied for ``seq``."""
+        future: Future = Future()
+
+        if not seq:
+            future.set_result(seq)
+            return future
+
+        self.sync()
+
+        if REPLICATION_ACK != "one":
+            future.set_result(seq)
+            return future
+
+        with self._lock:
+            if not self._streams or self._best_ack() >= seq:
+                future.set_result(seq)
+                return future
+            self._waiters.append((seq, future))
+
+        scheduler.schedule(REPL_ACK_TIMEOUT, self._ack_timeout, seq, future, inline=True)
+        return future
+
+    def _ack_timeout(self, seq: int, future: Future):
+        with self._lock:
+            if (seq, future) not in self._waiters:
+                return
+            self._waiters.remove((seq, future))
+            self._counts["ack_timeouts"] += 1
+
+        logger.warning("Replication: no replica acknowledged seq=%s in time", seq)
+        future.set_result(seq)
+
+    def _best_ack(self) -> int:
+        return max((stream.acked for stream in self._streams.values()), default=0)
+
+    def _release_waiters(self) -> list[tuple[int, Future]]:
+        best = self._best_ack()
+        ready = [(seq, future) for seq, future in self._waiters if seq <= best]
+        self._waiters = [(seq, future) for seq, future in self._waiters if seq > best]
+        return ready
+
+    def _targets(self) -> list:
+        state = global_state.state
+        targets = []
+
+        for node in state.successors or (state.next_node, state.next_next_node):
+            if len(targets) >= REPLICATION_FACTOR:
+                break
+            if node and node.node_id != state.node_id and all(t.node_id != node.node_id for t in targets):
+                targets.append(node)
+
+        return targets
+
+    def sync(self):
+        """Match streams to the current successors and push whatever they miss."""
+        with self._lock:
+            if self.lineage is None or self._recovering_until:
+                return
+
+            targets = {node.node_id: node for node in self._targets()}
+            for node_id in list(self._streams):
+                if node_id not in targets:
+                    del self._streams[node_id]
+
+            for node_id, node in targets.items():
+                stream = self._streams.get(node_id)
+                if stream is None or stream.target.socket_addr() != node.socket_addr():
+                    self._streams[node_id] = ReplicaStream(node)
+
+            streams = list(self._streams.values())
+
+        for stream in streams:
+            self._pump(stream)
+
+    def _pump(self, stream: ReplicaStream):
+        sends = []
+
+        with self._lock:
+            if self._streams.get(stream.target.node_id) is not stream or time.monotonic() < stream.retry_at:
+                return
+
+            if not stream.synced:
+                if not stream.snapshot_in_flight:
+                    stream.snapshot_in_flight = True
+                    sends.append(("snapshot", None))
+            else:
+                while stream.in_flight < REPL_PIPELINE_DEPTH:
+                    batch = self.log.since(stream.sent, REPL_BATCH_MAX)
+                    if batch is None:
+                        stream.synced = False
+                        stream.snapshot_in_flight = True
+                        sends.append(("snapshot", None))
+                        break
+                    if not batch:
+                        break
+
+                    stream.sent = batch[-1]["seq"]
+                    stream.in_flight += 1
+                    self._counts["batches_sent"] += 1
+                    self._counts["entries_sent"] += len(batch)
+                    sends.append(("append", {
+                        "type": "REPL_APPEND",
+                        "lineage": self.lineage,
+                        "entries": batch
+                    }))
+
+        for kind, message in sends:
+            if kind == "snapshot":
+                # Built outside the lock: dumping a large store must not stall other streams.
+                message = self._snapshot(offer=False)
+                self._counts["snapshots_sent"] += 1
+
+            future = send_socket_message_async(*stream.target.socket_addr(), message)
+            if kind == "snapshot":
+                future.add_done_callback(partial(self._on_snapshot_reply, stream, message["seq"]))
+            else:
+                future.add_done_callback(partial(self._on_append_reply, stream))
+
+    def _on_append_reply(self, stream: ReplicaStream, future: Future):
+        reply = future.result()
+
+        with self._lock:
+            stream.in_flight -= 1
+
+            if isinstance(reply, dict) and reply.get("status") == "OK":
+                stream.acked = max(stream.acked, reply["applied"])
+            elif isinstance(reply, dict) and reply.get("status") == "RESYNC":
+                stream.synced = False
+                stream.sent = stream.acked
+            else:
+                # Resend everything past the watermark; replicas skip what they already hold.
+                stream.sent = stream.acked
+                stream.retry_at = time.monotonic() + RETRY_BACKOFF
+
+            ready = self._release_waiters()
+
+        for seq, waiter in ready:
+            waiter.set_result(seq)
+
+        self._pump(stream)
+
+    def _on_snapshot_reply(self, stream: ReplicaStream, seq: int, future: Future):
+        reply = future.result()
+
+        with self._lock:
+            stream.snapshot_in_flight = False
+
+            if isinstance(reply, dict) and reply.get("status") == "OK":
+                stream.synced = True
+                stream.acked = max(stream.acked, seq)
+                stream.sent = max(stream.sent, seq)
+            else:
+                stream.retry_at = time.monotonic() + RETRY_BACKOFF
+
+            ready = self._release_waiters()
+
+        for waiter_seq, waiter in ready:
+            waiter.set_result(waiter_seq)
+
+        self._pump(stream)
+
+    def _snapshot(self, offer: bool) -> dict:
+        state = global_state.state
+
+        # Take the seq first: every write up to it is already in the store,
+        # newer ones may be too and are re-sent with higher versions anyway.
+        if offer:
+            seq, lineage = self.applied, self.applied_lineage
+        else:
+            seq, lineage = self.log.last_seq, self.lineage
+
+        with state.value_lock:
+            value, version = state.shared_value, state.shared_version
+
+        return {
+            "type": "REPL_SNAPSHOT",
+            "lineage": lineage,
+            "seq": seq,
+            "offer": offer,
+            "value": value,
+            "version": version,
+            "kv": {key: list(entry) for key, entry in state.kv.dump().items()}
+        }
+
+    def _schedule_tick(self):
+        with self._lock:
+            if self._tick is not None:
+                return
+            self._tick = scheduler.schedule(REPL_SYNC_INTERVAL, self._on_tick)
+
+    def _on_tick(self):
+        with self._lock:
+            self._tick = None
+            leading = self.lineage is not None
+
+        if not leading:
+            return
+
+        if global_state.state.alive:
+            self.recovering()
+            self.sync()
+        self._schedule_tick()
+
+    # Replica side ----------------------------------------------------------
+
+    def apply_append(self, msg: dict) -> dict:
+        state = global_state.state
+        entries = msg.get("entries") or []
+
+        with self._lock:
+            if self.lineage is not None or msg.get("lineage") != self.applied_lineage:
+                return {"status": "RESYNC", "applied": self.applied}
+
+            for entry in entries:
+                self._apply(state, entry)
+
+            if entries:
+                self._mark_received(entries[0]["seq"], entries[-1]["seq"])
+                self._counts["entries_applied"] += len(entries)
+
+            return {"status": "OK", "applied": self.applied}
+
+    def apply_snapshot(self, msg: dict) -> dict:
+        state = global_state.state
+
+        with self._lock:
+            if msg.get("offer"):
+                # Offers are only for a leader still collecting state after a failover.
+                rank = lineage_rank(msg.get("lineage"), msg["seq"])
+                if self.lineage is None or not self.recovering() or rank <= self._held_rank:
+                    return {"status": "IGNORED"}
+                self._held_rank = rank
+                self.log.reset(msg["seq"])
+            elif self.lineage is not None:
+                return {"status": "IGNORED"}
+
+            with state.value_lock:
+                state.shared_value = msg.get("value")
+                state.shared_version = msg.get("version", 0)
+            state.kv.replace({key: tuple(entry) for key, entry in (msg.get("kv") or {}).items()})
+
+            if not msg.get("offer"):
+                self.applied = msg["seq"]
+                self.applied_lineage = msg["lineage"]
+                self._received = []
+
+            self._counts["snapshots_installed"] += 1
+
+        journal.compact_soon()
+
+        logger.info(
+            "Replication: installed %s snapshot lineage=%s seq=%s keys=%s",
+            "offered" if msg.get("offer") else "leader",
+            msg.get("lineage"),
+            msg["seq"],
+            len(msg.get("kv") or {})
+        )
+        return {"status": "OK", "applied": msg["seq"]}
+
+    def _apply(self, state, entry: dict):
+        if entry["op"] == "var":
+            with state.value_lock:
+                if entry["version"] > state.shared_version:
+                    state.shared_value = entry["value"]
+                    state.shared_version = entry["version"]
+        elif entry["op"] == "kv":
+            state.kv.install({key: tuple(pair) for key, pair in entry["entries"].items()})
+        else:
+            return
+
+        journal.record(entry)
+
+    def _mark_received(self, first: int, last: int):
+        if last <= self.applied:
+            return
+
+        self._received.append([max(first, self.applied + 1), last])
+        self._received.sort()
+
+        while self._received and self._received[0][0] <= self.applied + 1:
+            self.applied = max(self.applied, self._received.pop(0)[1])
+
+    def snapshot_stats(self) -> dict:
+        with self._lock:
+            return {
+                "role": "leader" if self.lineage else "replica",
+                "lineage": self.lineage or self.applied_lineage,
+                "last_seq": self.log.last_seq if self.lineage else self.applied,
+                "recovering": bool(self._recovering_until),
+                "ack_mode": REPLICATION_ACK,
+                "factor": REPLICATION_FACTOR,
+                "replicas": [stream.to_dict() for stream in self._streams.values()],
+                "waiting_writes": len(self._waiters),
+                **self._counts,
+            }
+
+
+replicator = Replicator()
@@ -0,0 +1,103 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.config import DELAY_WORKERS, NODE_ID
+from app.logger import setup_logger
+
+logger = setup_logger(NODE_ID)
+
+
+class ScheduledCall:
+    def __init__(self, due: float, fn, args: tuple, inline: bool):
+        self.due = due
+        self.fn = fn
+        self.args = args
+        self.inline = inline
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DelayScheduler:
+    """Outbound queue that releases work when it is due instead of sleeping in the caller.
+
+    One timer thread owns a heap of due times. Cheap callbacks (timeouts,
+    frame writes on open connections) run on the timer thread when marked
+    inline; anything that may block is handed to a small worker pool.
+    """
+
+    def __init__(self, workers: int):
+        self._heap: list[tuple[float, int, ScheduledCall]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="delay")
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, delay: float, fn, *args, inline: bool = False) -> ScheduledCall:
+        call = ScheduledCall(time.monotonic() + max(delay, 0.0), fn, args, inline)
+
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="delay-scheduler", daemon=True)
+                self._thread.start()
+
+            heapq.heappush(self._heap, (call.due, next(self._seq), call))
+            if self._heap[0][2] is call:
+                self._cond.notify()
+
+        return call
+
+    def defer(self, delay: float, fn, *args) -> Future:
+        """Run ``fn(*args)`` on the worker pool after ``delay``; the future carries its result."""
+        future: Future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        if delay > 0:
+            self.schedule(delay, run)
+        else:
+            self._executor.submit(run)
+
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+
+                due, _, call = self._heap[0]
+                wait_for = due - time.monotonic()
+                if wait_for > 0:
+                    self._cond.wait(wait_for)
+                    continue
+
+                heapq.heappop(self._heap)
+
+            if call.cancelled:
+                continue
+
+            if call.inline:
+                self._invoke(call)
+            else:
+                self._executor.submit(self._invoke, call)
+
+    @staticmethod
+    def _invoke(call: ScheduledCall):
+        try:
+            call.fn(*call.args)
+        except Exception as exc:
+            logger.warning("Scheduled call %s failed: %s", getattr(call.fn, "__name__", call.fn), exc)
+
+
+scheduler = DelayScheduler(DELAY_WORKERS)
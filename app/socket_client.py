@@ -1,28 +1,421 @@
 import socket
-import json
+import itertools
+import threading
 import time
+from concurrent.futures import Future, InvalidStateError
+from functools import partial
 import app.state as global_state
+from app.config import SOCKET_POOL_IDLE_TIMEOUT, SOCKET_POOL_SIZE, SOCKET_PIPELINE_DEPTH
+from app.messages import (
+    CODECS,
+    HELLO_REQUEST_ID,
+    JSON_CODEC,
+    MAX_REQUEST_ID,
+    MessageType,
+    decode_payload,
+    encode_frame,
+    encode_payload,
+    hello_message,
+    read_frame,
+)
+from app.metrics import metrics
+from app.scheduler import scheduler
 
+CLIENT_REQUEST_SECONDS = metrics.histogram(
+    "dsva_socket_client_request_seconds",
+    "Round trip of socket requests sent to other nodes, by type (failures included)",
+    ("type",)
+)
+CLIENT_ERRORS = metrics.counter(
+    "dsva_socket_client_errors_total",
+    "Socket requests that ended in a communication error, by type",
+    ("type",)
+)
 
-def send_socket_message(host: str, port: int, message: dict, timeout=3):
-    data = json.dumps(message).encode()
+# Once a request was written, a dropped connection does not tell whether the
+# peer applied it; only these side-effect-free types are resent then.
+RETRY_AFTER_SEND = frozenset({
+    MessageType.PING,
+    MessageType.GET_VAR,
+    MessageType.GET_KEY,
+    MessageType.MGET_KEYS,
+    MessageType.VAR_GET,
+    MessageType.HEARTBEAT,
+    MessageType.MEMBERSHIP,
+})
+
+
+def _fail_future(future: Future, error: Exception):
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+class PeerConnection:
+    """Multiplexed connection to one peer; replies are matched by request id."""
+
+    def __init__(self, addr: tuple[str, int], timeout: float):
+        self.addr = addr
+        self.sock = socket.create_connection(addr, timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        self.last_used = time.monotonic()
+        self.closed = False
+
+        try:
+            self.codec = self._negotiate_codec()
+        except (OSError, ValueError):
+            self.reader.close()
+            self.sock.close()
+            raise
+        self.sock.settimeout(None)
+
+        self._ids = itertools.count(1)
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def is_healthy(self) -> bool:
+        return not self.closed
+
+    def _negotiate_codec(self):
+        self.sock.sendall(encode_frame(HELLO_REQUEST_ID, encode_payload(hello_message())))
+
+        frame = read_frame(self.reader)
+        if frame is None:
+            raise ConnectionResetError("connection closed during codec negotiation")
+
+        reply = decode_payload(frame[1])
+        if isinstance(reply, dict):
+            return CODECS.get(reply.get("codec"), JSON_CODEC)
+
+        return JSON_CODEC
+
+    def submit(self, message: dict) -> Future:
+        frame_payload = encode_payload(message, self.codec)
+        future: Future = Future()
+
+        with self._lock:
+            if self.closed:
+                raise ConnectionResetError("connection closed")
+            request_id = self._next_request_id()
+            self._pending[request_id] = future
+            future.request_id = request_id
+            self.last_used = time.monotonic()
+
+        try:
+            with self._send_lock:
+                self.sock.sendall(encode_frame(request_id, frame_payload))
+        except OSError as exc:
+            self._fail(ConnectionResetError(str(exc)))
+            raise ConnectionResetError(str(exc)) from exc
+        except ValueError:
+            self.forget(future)
+            raise
+
+        return future
+
+    def _next_request_id(self) -> int:
+        # Called under self._lock. Ids wrap at 32 bits; skip the HELLO id and
+        # any id a request that is still waiting holds.
+        request_id = next(self._ids) & MAX_REQUEST_ID
+        while request_id == HELLO_REQUEST_ID or request_id in self._pending:
+            request_id = next(self._ids) & MAX_REQUEST_ID
+        return request_id
+
+    def forget(self, future: Future):
+        with self._lock:
+            self._pending.pop(getattr(future, "request_id", None), None)
+
+    def close(self):
+        self._fail(ConnectionResetError("connection closed"))
+
+    def _read_loop(self):
+        error: Exception = ConnectionResetError("connection closed by peer")
+        try:
+            while True:
+                frame = read_frame(self.reader)
+                if frame is None:
+                    break
+
+                request_id, payload = frame
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                    self.last_used = time.monotonic()
+
+                if future is None:
+                    continue
+
+                try:
+                    future.set_result(decode_payload(payload, self.codec))
+                except ValueError as exc:
+                    _fail_future(future, exc)
+                except InvalidStateError:
+                    # Already expired by its timeout timer.
+                    pass
+        except (OSError, ValueError) as exc:
+            error = ConnectionResetError(str(exc))
+        finally:
+            self._fail(error)
+
+    def _fail(self, error: Exception):
+        with self._lock:
+            if self.closed and not self._pending:
+                return
+            self.closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        for future in pending:
+            _fail_future(future, error)
+
+        # Wake a read loop blocked in the reader first: closing the reader
+        # waits for its lock, which that blocked read holds.
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        for closable in (self.reader, self.sock):
+            try:
+                closable.close()
+            except OSError:
+                pass
+
+
+class ConnectionPool:
+    def __init__(self, size: int, pipeline_depth: int, idle_timeout: float):
+        self.size = size
+        self.pipeline_depth = pipeline_depth
+        self.idle_timeout = idle_timeout
+        self._conns: dict[tuple[str, int], list[PeerConnection]] = {}
+        self._lock = threading.Lock()
+        self._reaper: threading.Thread | None = None
+
+    def lookup(self, addr: tuple[str, int]) -> PeerConnection | None:
+        with self._lock:
+            conns = [c for c in self._conns.get(addr, []) if c.is_healthy()]
+            self._conns[addr] = conns
+
+            if conns:
+                least_busy = min(conns, key=lambda c: c.in_flight)
+                if least_busy.in_flight < self.pipeline_depth or len(conns) >= self.size:
+                    return least_busy
+
+        return None
+
+    def connect(self, addr: tuple[str, int], timeout: float) -> PeerConnection:
+        self._ensure_reaper()
+        conn = PeerConnection(addr, timeout)
+
+        with self._lock:
+            self._conns.setdefault(addr, []).append(conn)
+
+        return conn
+
+    def evict_idle(self):
+        now = time.monotonic()
+        expired: list[PeerConnection] = []
+
+        with self._lock:
+            for addr, conns in list(self._conns.items()):
+                keep = []
+                for conn in conns:
+                    if not conn.is_healthy():
+                        continue
+                    if conn.in_flight == 0 and now - conn.last_used > self.idle_timeout:
+                        expired.append(conn)
+                        continue
+                    keep.append(conn)
+
+                if keep:
+                    self._conns[addr] = keep
+                else:
+                    del self._conns[addr]
+
+        for conn in expired:
+            conn.close()
+
+    def close_all(self):
+        with self._lock:
+            conns = [c for peer_conns in self._conns.values() for c in peer_conns]
+            self._conns.clear()
 
+        for conn in conns:
+            conn.close()
+
+    def _ensure_reaper(self):
+        if self._reaper is not None:
+            return
+
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        interval = max(self.idle_timeout / 2, 1.0)
+        while True:
+            time.sleep(interval)
+            self.evict_idle()
+
+
+pool = ConnectionPool(SOCKET_POOL_SIZE, SOCKET_PIPELINE_DEPTH, SOCKET_POOL_IDLE_TIMEOUT)
+
+
+def _socket_error(details) -> dict:
+    return {"error": "SOCKET_COMM_ERROR", "details": str(details) or type(details).__name__}
+
+
+def _settle(result: Future, response):
+    if not result.done():
+        try:
+            result.set_result(response)
+        except InvalidStateError:
+            pass
+
+
+def _expire(conn: PeerConnection, inner: Future):
+    conn.forget(inner)
+    _fail_future(inner, TimeoutError("timed out"))
+
+
+def _dispatch(
+    addr: tuple[str, int],
+    message: dict,
+    timeout: float,
+    result: Future,
+    attempt: int = 0,
+    may_connect: bool = False
+):
+    conn = pool.lookup(addr)
+    reused = conn is not None
+
+    if conn is None:
+        if not may_connect:
+            # Connecting blocks on the TCP handshake and HELLO; keep that off the caller's thread.
+            scheduler.defer(0, _dispatch, addr, message, timeout, result, attempt, True)
+            return
+
+        try:
+            conn = pool.connect(addr, timeout)
+        except (socket.timeout, ConnectionRefusedError, OSError, ValueError) as exc:
+            _settle(result, _socket_error(exc))
+            return
+
+    try:
+        inner = conn.submit(message)
+    except ConnectionError as exc:
+        # A pooled connection may have been closed by the peer while idle; reconnect once.
+        if reused and attempt == 0:
+            _dispatch(addr, message, timeout, result, attempt + 1, may_connect)
+        else:
+            _settle(result, _socket_error(exc))
+        return
+    except (OSError, ValueError) as exc:
+        _settle(result, _socket_error(exc))
+        return
+
+    timer = scheduler.schedule(timeout, _expire, conn, inner, inline=True)
+
+    def on_reply(reply: Future):
+        timer.cancel()
+        exc = reply.exception()
+        if exc is None:
+            _settle(result, reply.result())
+        elif (
+            isinstance(exc, ConnectionError)
+            and reused
+            and attempt == 0
+            and message.get("type") in RETRY_AFTER_SEND
+        ):
+            _dispatch(addr, message, timeout, result, attempt + 1)
+        else:
+            _settle(result, _socket_error(exc))
+
+    inner.add_done_callback(on_reply)
+
+
+def _observe(msg_type: str, started: float, result: Future):
+    CLIENT_REQUEST_SECONDS.observe(time.perf_counter() - started, msg_type)
+    reply = result.result()
+    if isinstance(reply, dict) and reply.get("error") == "SOCKET_COMM_ERROR":
+        CLIENT_ERRORS.inc(msg_type)
+
+
+def send_socket_message_async(host: str, port: int, message: dict, timeout=3, delayed: bool = True) -> Future:
+    """Send without blocking; the future resolves to the reply or an error dict, never raises.
+
+    ``delayed=False`` skips the artificial ``/setDelay`` delay.
+    """
     state = getattr(global_state, "state", None)
-    delay = state.delay if state else 0.0
-    if delay > 0:
-        time.sleep(delay)
+    delay = state.delay if state and delayed else 0.0
     effective_timeout = timeout + max(delay * 6, 3.0)
 
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(effective_timeout)
-            s.connect((host, port))
-            s.sendall(data)
-
-            response = s.recv(4096).decode()
-            if response:
-                return json.loads(response)
-    except (socket.timeout, ConnectionRefusedError, OSError) as exc:
-        return {"error": "SOCKET_COMM_ERROR", "details": str(exc)}
-
-    return None
+    result: Future = Future()
+    result.add_done_callback(partial(_observe, message.get("type", "UNKNOWN"), time.perf_counter()))
+    if delay > 0:
+        scheduler.schedule(delay, _dispatch, (host, port), message, effective_timeout, result, 0, True)
+    else:
+        _dispatch((host, port), message, effective_timeout, result)
+
+    return result
+
+
+def send_socket_message(host: str, port: int, message: dict, timeout=3):
+    return send_socket_message_async(host, port, message, timeout).result()
+
+
+class SingleFlight:
+    """Share one in-flight request among concurrent callers asking for the same thing.
+
+    Only the caller that started the flight is its owner; joiners get the
+    same reply, which may have been produced before they arrived.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: dict = {}
+        self._requests = 0
+        self._flights = 0
+
+    def do(self, key, start) -> tuple[Future, bool]:
+        with self._lock:
+            self._requests += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+
+            future = start()
+            self._inflight[key] = future
+            self._flights += 1
+
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future, True
+
+    def _forget(self, key, future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "flights": self._flights,
+                "coalesced": self._requests - self._flights,
+                "ratio": round(self._requests / self._flights, 3) if self._flights else None,
+                "in_flight": len(self._inflight),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._requests = 0
+            self._flights = 0
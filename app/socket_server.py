@@ -1,18 +1,84 @@
 import socket
-import json
 import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 
 import requests
 
 import app.state as global_state
+from app.config import (
+    FANOUT_PARALLELISM,
+    FANOUT_RETRIES,
+    FANOUT_TIMEOUT,
+    LEADER_ANNOUNCE_MODE,
+    LEASE_DRIFT_MARGIN,
+    READ_LEASE_DURATION,
+    REPAIR_PROBE_PARALLELISM,
+    REPAIR_PROBE_TIMEOUT,
+    SOCKET_SERVER_IDLE_TIMEOUT,
+    SOCKET_SERVER_WORKERS,
+)
+from app.election import NEXT, PREV
+from app.failure_detector import failure_detector
 from app.logger import setup_logger
+from app.metrics import metrics
+from app.messages import (
+    HELLO_REQUEST_ID,
+    JSON_CODEC,
+    MessageType,
+    decode_payload,
+    encode_frame,
+    encode_payload,
+    negotiate_codec,
+    read_frame,
+)
 from app.node_registry import NODE_REGISTRY
-from app.socket_client import send_socket_message
+from app.replication import replicator
+from app.scheduler import scheduler
+from app.socket_client import send_socket_message_async
 from app.state import NodeInfo
+from app.wal import journal
+
+MAX_KEY_LENGTH = 256
+
+# First pause before a fan-out target that did not answer is tried again; doubles per attempt.
+FANOUT_RETRY_BACKOFF = 0.05
+
+# Rounds a node opens before giving up on neighbours that keep answering STALE.
+ELECTION_START_ATTEMPTS = 3
 
 logger = setup_logger("socket-server")
 
+_repair_lock = threading.Lock()
+
+MESSAGE_TYPES = {message_type.value for message_type in MessageType}
+
+SOCKET_MESSAGES = metrics.counter("dsva_socket_messages_total", "Socket messages handled, by type", ("type",))
+SOCKET_MESSAGE_SECONDS = metrics.histogram(
+    "dsva_socket_message_seconds",
+    "Time spent handling one socket message, by type",
+    ("type",)
+)
+SOCKET_MESSAGE_ERRORS = metrics.counter(
+    "dsva_socket_message_errors_total",
+    "Socket messages that were malformed or raised in their handler",
+    ("type",)
+)
+RING_FORWARDS = metrics.counter("dsva_ring_forwards_total", "Messages forwarded to a ring neighbour", ("kind", "result"))
+RING_REPAIRS = metrics.counter("dsva_ring_repairs_total", "Successor repairs, by outcome", ("result",))
+ELECTION_SECONDS = metrics.histogram(
+    "dsva_election_seconds",
+    "Time from joining an election round to accepting its leader",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+_request_executor = ThreadPoolExecutor(
+    max_workers=SOCKET_SERVER_WORKERS,
+    thread_name_prefix="socket-request"
+)
+
 
 def _effective_timeout(base: float) -> float:
     state = getattr(global_state, "state", None)
@@ -20,20 +86,17 @@ def _effective_timeout(base: float) -> float:
     return base + max(delay * 3, 2.0)
 
 
-def _post_with_delay(url: str, payload: dict, timeout: float) -> requests.Response:
+def _post_later(url: str, payload: dict, timeout: float) -> Future:
+    """POST on the scheduler's workers after the artificial delay; nothing waits for it."""
     state = getattr(global_state, "state", None)
     delay = state.delay if state else 0.0
-    if delay > 0:
-        time.sleep(delay)
-    return requests.post(url, json=payload, timeout=_effective_timeout(timeout))
+    return scheduler.defer(delay, partial(requests.post, url, json=payload, timeout=_effective_timeout(timeout)))
 
 
-def _get_with_delay(url: str, timeout: float) -> requests.Response:
+def _get_later(url: str, timeout: float) -> Future:
     state = getattr(global_state, "state", None)
     delay = state.delay if state else 0.0
-    if delay > 0:
-        time.sleep(delay)
-    return requests.get(url, timeout=_effective_timeout(timeout))
+    return scheduler.defer(delay, partial(requests.get, url, timeout=_effective_timeout(timeout)))
 
 
 def describe_message(msg: dict) -> str:
@@ -41,11 +104,17 @@ def describe_message(msg: dict) -> str:
 
     if msg_type == "ELECTION":
         candidate = msg.get("candidate_id")
-        return f"ELECTION candidate={candidate}"
+        return f"ELECTION candidate={candidate} epoch={msg.get('epoch', 0)}"
+
+    if msg_type in ("HS_PROBE", "HS_REPLY"):
+        return (
+            f"{msg_type} candidate={msg.get('candidate_id')} phase={msg.get('phase')} "
+            f"direction={msg.get('direction')} epoch={msg.get('epoch', 0)}"
+        )
 
     if msg_type == "LEADER":
         leader_id = msg.get("leader_id")
-        return f"LEADER leader={leader_id}"
+        return f"LEADER leader={leader_id} epoch={msg.get('epoch', 0)}"
 
     if msg_type == "GET_VAR":
         return "GET_VAR request"
@@ -54,8 +123,30 @@ def describe_message(msg: dict) -> str:
         value = msg.get("value")
         return f"SET_VAR value={value}"
 
-    if msg_type == "PING":
-        return "PING"
+    if msg_type == "SET_VAR_BATCH":
+        return f"SET_VAR_BATCH size={len(msg.get('values') or ())}"
+
+    if msg_type in ("PING", "HEARTBEAT"):
+        return msg_type
+
+    if msg_type == "MEMBERSHIP":
+        return f"MEMBERSHIP records={len(msg['records']) if 'records' in msg else 'pull'}"
+
+    if msg_type == "VAR_INVALIDATE":
+        return f"VAR_INVALIDATE version={msg.get('version')}"
+
+    if msg_type in ("GET_KEY", "SET_KEY"):
+        return f"{msg_type} key={msg.get('key')}"
+
+    if msg_type == "REPL_APPEND":
+        entries = msg.get("entries") or [{}]
+        return f"REPL_APPEND lineage={msg.get('lineage')} seq={entries[0].get('seq')}..{entries[-1].get('seq')}"
+
+    if msg_type == "REPL_SNAPSHOT":
+        return f"REPL_SNAPSHOT lineage={msg.get('lineage')} seq={msg.get('seq')} offer={msg.get('offer')}"
+
+    if msg_type in ("MGET_KEYS", "MSET_KEYS"):
+        return f"{msg_type} size={len(msg.get('keys') or msg.get('entries') or ())}"
 
     return msg_type
 
@@ -79,36 +170,199 @@ def start_socket_server(host: str, port: int):
         ).start()
 
 
+def encode_reply(request_id: int, response, codec=JSON_CODEC) -> bytes:
+    try:
+        return encode_frame(request_id, encode_payload(response, codec))
+    except ValueError:
+        return encode_frame(request_id, encode_payload({"error": "RESPONSE_TOO_LARGE"}, codec))
+
+
+def accept_hello(request_id: int, payload: bytes):
+    """Answer the codec negotiation that opens a connection; None for legacy clients."""
+    if request_id != HELLO_REQUEST_ID:
+        return None
+
+    try:
+        message = decode_payload(payload)
+    except ValueError:
+        return None
+
+    if not isinstance(message, dict) or message.get("type") != MessageType.HELLO:
+        return None
+
+    codec = negotiate_codec(message.get("codecs"))
+    return codec, encode_reply(request_id, {"codec": codec.name})
+
+
+# Successive ring hops and replication entries from one upstream node must be
+# handled in the order they were sent, so per connection they run one at a time.
+# Reads, writes and pings are issued concurrently by their senders anyway and
+# run in parallel on the worker pool.
+ORDERED_MESSAGE_TYPES = frozenset({"ELECTION", "HS_PROBE", "HS_REPLY", "LEADER", "REPL_APPEND", "REPL_SNAPSHOT"})
+
+
+class ClientSession:
+    def __init__(self, conn: socket.socket, addr):
+        self.conn = conn
+        self.addr = addr
+        self.in_flight = 0
+        self.codec = JSON_CODEC
+        self._lock = threading.Lock()
+        self._ordered: deque = deque()
+        self._ordered_lock = threading.Lock()
+        self._draining = False
+
+    def send(self, frame: bytes):
+        with self._lock:
+            self.conn.sendall(frame)
+
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def reply(self, request_id: int, response):
+        frame = encode_reply(request_id, response, self.codec)
+
+        with self._lock:
+            self.in_flight -= 1
+            self.conn.sendall(frame)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def enqueue_ordered(self, request_id: int, message: dict):
+        with self._ordered_lock:
+            self._ordered.append((request_id, message))
+            if self._draining:
+                return
+            self._draining = True
+        _request_executor.submit(self._drain_ordered)
+
+    def _drain_ordered(self):
+        while True:
+            with self._ordered_lock:
+                if not self._ordered:
+                    self._draining = False
+                    return
+                request_id, message = self._ordered.popleft()
+            _serve_request(self, request_id, message)
+
+
 def handle_client(conn: socket.socket, addr):
     state = global_state.state
+    conn.settimeout(SOCKET_SERVER_IDLE_TIMEOUT)
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    session = ClientSession(conn, addr)
+    first_frame = True
+
     try:
-        data = conn.recv(4096).decode().strip()
-        if not data:
-            return
+        with conn.makefile("rb") as reader:
+            while True:
+                try:
+                    frame = read_frame(reader)
+                except socket.timeout:
+                    if session.in_flight:
+                        continue
+                    break
+
+                if frame is None:
+                    break
+
+                request_id, payload = frame
+
+                if first_frame:
+                    first_frame = False
+                    hello = accept_hello(request_id, payload)
+                    if hello:
+                        session.codec, reply = hello
+                        session.send(reply)
+                        continue
+
+                session.begin()
+                message = decode_request(payload, addr[0], session.codec)
+                if message is None:
+                    _reply(session, request_id, {"error": "MALFORMED_MESSAGE"})
+                elif message.get("type") in ORDERED_MESSAGE_TYPES:
+                    session.enqueue_ordered(request_id, message)
+                else:
+                    _request_executor.submit(_serve_request, session, request_id, message)
+
+    except Exception as e:
+        logger.warning(
+            "node=%s: socket error from host=%s error=%s",
+            state.node_id,
+            addr[0],
+            e
+        )
+
+    finally:
+        session.close()
+
 
-        message = json.loads(data)
+def process_message(message, peer_host: str):
+    state = global_state.state
+    # Unknown types share one series, so the wire cannot grow the label set.
+    msg_type = message.get("type") if isinstance(message, dict) else None
+    msg_type = msg_type if msg_type in MESSAGE_TYPES else "UNKNOWN"
+    started = time.perf_counter()
+
+    try:
         summary = describe_message(message)
         logger.info(
             "node=%s: received %s from %s",
             state.node_id,
             summary,
-            addr[0]
+            peer_host
         )
 
-        response = handle_message(message)
-        if response is not None:
-            conn.sendall((json.dumps(response) + "\n").encode())
-
+        return handle_message(message)
     except Exception as e:
+        SOCKET_MESSAGE_ERRORS.inc(msg_type)
         logger.warning(
             "node=%s: socket error from host=%s error=%s",
             state.node_id,
-            addr[0],
+            peer_host,
             e
         )
-
+        return {"error": "INTERNAL_ERROR", "details": str(e)}
     finally:
-        conn.close()
+        SOCKET_MESSAGES.inc(msg_type)
+        SOCKET_MESSAGE_SECONDS.observe(time.perf_counter() - started, msg_type)
+
+
+def decode_request(payload: bytes, peer_host: str, codec=JSON_CODEC) -> dict | None:
+    try:
+        message = decode_payload(payload, codec)
+        if not isinstance(message, dict):
+            raise ValueError("message is not an object")
+    except ValueError as e:
+        SOCKET_MESSAGE_ERRORS.inc("MALFORMED")
+        logger.warning(
+            "node=%s: malformed message from host=%s error=%s",
+            global_state.state.node_id,
+            peer_host,
+            e
+        )
+        return None
+
+    return message
+
+
+def _serve_request(session: ClientSession, request_id: int, message: dict):
+    _reply(session, request_id, process_message(message, session.addr[0]))
+
+
+def _reply(session: ClientSession, request_id: int, response):
+    try:
+        session.reply(request_id, response)
+    except OSError as e:
+        logger.warning(
+            "node=%s: failed to reply to host=%s error=%s",
+            global_state.state.node_id,
+            session.addr[0],
+            e
+        )
 
 
 def handle_message(msg: dict):
@@ -117,18 +371,48 @@ def handle_message(msg: dict):
     if msg_type == "PING":
         return {"status": "OK"}
 
-    if msg_type == "ELECTION":
+    if msg_type == "HEARTBEAT":
+        return handle_heartbeat(msg)
+
+    if msg_type == "MEMBERSHIP":
+        return handle_membership(msg)
+
+    if msg_type in ("ELECTION", "HS_PROBE", "HS_REPLY"):
         return handle_election(msg)
 
     if msg_type == "LEADER":
         return handle_leader(msg)
 
     if msg_type == "GET_VAR":
-        return handle_get_var()
+        return handle_get_var(msg)
 
     if msg_type == "SET_VAR":
         return handle_set_var(msg)
 
+    if msg_type == "SET_VAR_BATCH":
+        return handle_set_var_batch(msg)
+
+    if msg_type == "VAR_INVALIDATE":
+        return handle_var_invalidate(msg)
+
+    if msg_type == "GET_KEY":
+        return handle_get_key(msg)
+
+    if msg_type == "SET_KEY":
+        return handle_set_key(msg)
+
+    if msg_type == "MGET_KEYS":
+        return handle_mget_keys(msg)
+
+    if msg_type == "MSET_KEYS":
+        return handle_mset_keys(msg)
+
+    if msg_type == "REPL_APPEND":
+        return handle_replication(msg, replicator.apply_append)
+
+    if msg_type == "REPL_SNAPSHOT":
+        return handle_replication(msg, replicator.apply_snapshot)
+
     return {"error": "Unknown message type"}
 
 
@@ -152,7 +436,15 @@ def _registry_node_info(node_id: int) -> NodeInfo | None:
 
 
 def _iter_successor_candidates(exclude: set[int]) -> list[NodeInfo]:
+    """Members the view knows alive in ring order, then whatever else the registry lists."""
     state = global_state.state
+    candidates: list[NodeInfo] = []
+
+    for record in state.membership.ring_order():
+        if record["node_id"] not in exclude:
+            candidates.append(NodeInfo.from_dict(record))
+
+    exclude = exclude | {node.node_id for node in candidates}
     ids = sorted(NODE_REGISTRY.keys())
 
     if state.node_id in ids:
@@ -161,7 +453,6 @@ def _iter_successor_candidates(exclude: set[int]) -> list[NodeInfo]:
     else:
         ordered_ids = ids
 
-    candidates: list[NodeInfo] = []
     for candidate_id in ordered_ids:
         if candidate_id in exclude:
             continue
@@ -173,30 +464,67 @@ def _iter_successor_candidates(exclude: set[int]) -> list[NodeInfo]:
     return candidates
 
 
-def _probe_alive(host: str, timeout: float = 2.0) -> bool:
-    try:
-        response = _get_with_delay(f"{host}/health", timeout)
-        data = response.json()
-        return data.get("status") == "alive"
-    except (requests.RequestException, ValueError):
-        return False
+def _first_alive(candidates: list[NodeInfo]) -> NodeInfo | None:
+    """Heartbeat ``candidates`` concurrently; the first alive one in list order wins.
 
+    At most ``REPAIR_PROBE_PARALLELISM`` probes are in flight, the next
+    candidate is sent as soon as one finishes. The search ends once a
+    candidate has answered and every candidate before it is known dead;
+    probes not sent by then are dropped and late replies are ignored, so
+    the cost is about one round trip however many candidates are down.
+    """
+    if not candidates:
+        return None
 
-def _find_replacement_successor(exclude: set[int]) -> NodeInfo | None:
-    for candidate in _iter_successor_candidates(exclude):
-        if _probe_alive(candidate.host):
-            return candidate
-    return None
+    done = threading.Condition()
+    outcomes: list[bool | None] = [None] * len(candidates)
+    launched = 0
+
+    def decided() -> int | None:
+        for index, alive in enumerate(outcomes):
+            if alive is None:
+                return None
+            if alive:
+                return index
+        return -1
+
+    def launch():
+        nonlocal launched
+        index = launched
+        launched += 1
+        future = send_socket_message_async(
+            *candidates[index].socket_addr(),
+            {"type": "HEARTBEAT"},
+            timeout=REPAIR_PROBE_TIMEOUT
+        )
+        future.add_done_callback(partial(on_reply, index))
 
+    def on_reply(index: int, future: Future):
+        reply = future.result()
+        with done:
+            outcomes[index] = isinstance(reply, dict) and reply.get("status") == "OK"
+            if launched < len(candidates) and decided() is None:
+                launch()
+            done.notify()
+
+    with done:
+        while launched < min(REPAIR_PROBE_PARALLELISM, len(candidates)):
+            launch()
+
+        # Every probe future resolves (a reply or a timeout error), so this ends.
+        while (winner := decided()) is None:
+            done.wait()
+
+    return candidates[winner] if winner >= 0 else None
+
+
+def _find_replacement_successor(exclude: set[int]) -> NodeInfo | None:
+    return _first_alive(_iter_successor_candidates(exclude))
 
-def _fetch_next_of(node: NodeInfo | None) -> NodeInfo | None:
-    if not node:
-        return None
 
+def _next_of(node: NodeInfo, response: Future) -> NodeInfo | None:
     try:
-        response = _get_with_delay(f"{node.host}/health", 2)
-        data = response.json()
-        next_info = data.get("next")
+        next_info = response.result().json().get("next")
         if not next_info:
             return None
 
@@ -209,31 +537,171 @@ def _fetch_next_of(node: NodeInfo | None) -> NodeInfo | None:
         return None
 
 
+def _adopt_next_next(replacement: NodeInfo, response: Future):
+    """Second successor of a repair, once the replacement's /health arrives."""
+    state = global_state.state
+    if state.next_node and state.next_node.node_id == replacement.node_id:
+        state.set_next_next(_next_of(replacement, response) or state.self_info())
+
+
+def _log_update_failure(what: str, response: Future):
+    exc = response.exception()
+    if exc is not None:
+        logger.warning(
+            "node=%s: failed to %s (%s)",
+            global_state.state.node_id,
+            what,
+            exc
+        )
+
+
+def handle_heartbeat(msg: dict):
+    state = global_state.state
+
+    # A killed node must look dead to the failure detectors of its neighbours.
+    if not state.alive:
+        return {"error": "NODE_KILLED"}
+
+    reply = {"status": "OK"}
+    if msg.get("successors"):
+        reply["successors"] = [node.to_dict() for node in state.successors]
+
+    # A differing digest tells the sender to pull our membership view.
+    digest = state.membership.digest()
+    if msg.get("digest") is not None and msg["digest"] != digest:
+        reply["digest"] = digest
+    return reply
+
+
+def handle_membership(msg: dict):
+    """Merge pushed membership records, or hand out the whole view when none are sent."""
+    state = global_state.state
+
+    if not state.alive:
+        return {"error": "NODE_KILLED"}
+
+    if "records" in msg:
+        state.membership.merge(msg["records"])
+        return {"status": "OK"}
+
+    return {"status": "OK", "records": state.membership.records()}
+
+
+def publish_membership(records: list[dict]):
+    """Push a local membership change to every member the view knows alive, all at once.
+
+    Nobody waits for the report; a member the push misses notices the
+    digest difference on its next heartbeat and pulls the view.
+    """
+    state = global_state.state
+    if not state.alive:
+        return
+
+    fan_out(
+        [NodeInfo.from_dict(record) for record in state.membership.ring_order()],
+        {"type": MessageType.MEMBERSHIP.value, "records": records}
+    )
+
+
+def fan_out(targets: list[NodeInfo], message: dict) -> Future:
+    """Send ``message`` to every target concurrently; the future carries who acknowledged.
+
+    At most ``FANOUT_PARALLELISM`` sends are in flight. A target that does
+    not answer is tried again up to ``FANOUT_RETRIES`` times with a growing
+    pause; one that answers is done, whether it accepted or not. The report
+    lists the ids that replied OK (``acked``), replied otherwise
+    (``rejected``) and never replied (``unreachable``).
+    """
+    finished: Future = Future()
+    report = {"targets": len(targets), "acked": [], "rejected": [], "unreachable": [], "elapsed_ms": 0.0}
+    lock = threading.Lock()
+    pending = deque((node, 0) for node in targets)
+    in_flight = 0
+    started = time.monotonic()
+
+    def take() -> list[tuple[NodeInfo, int]]:
+        nonlocal in_flight
+        batch = []
+        while pending and in_flight < FANOUT_PARALLELISM:
+            batch.append(pending.popleft())
+            in_flight += 1
+        return batch
+
+    def send(batch: list[tuple[NodeInfo, int]]):
+        for node, attempt in batch:
+            future = send_socket_message_async(*node.socket_addr(), message, timeout=FANOUT_TIMEOUT)
+            future.add_done_callback(partial(on_reply, node, attempt))
+
+    def on_reply(node: NodeInfo, attempt: int, future: Future):
+        nonlocal in_flight
+        reply = future.result()
+        retry = False
+
+        with lock:
+            if isinstance(reply, dict) and reply.get("status") == "OK":
+                report["acked"].append(node.node_id)
+            elif isinstance(reply, dict) and reply.get("error") != "SOCKET_COMM_ERROR":
+                report["rejected"].append(node.node_id)
+            elif attempt < FANOUT_RETRIES:
+                # The retry keeps its slot, so the backoff also paces the rest.
+                retry = True
+            else:
+                report["unreachable"].append(node.node_id)
+
+            if not retry:
+                in_flight -= 1
+            batch = take()
+            done = not pending and not in_flight
+
+        if retry:
+            scheduler.schedule(FANOUT_RETRY_BACKOFF * 2 ** attempt, send, [(node, attempt + 1)])
+        send(batch)
+
+        if done:
+            report["elapsed_ms"] = round((time.monotonic() - started) * 1000, 3)
+            finished.set_result(report)
+
+    if not targets:
+        finished.set_result(report)
+        return finished
+
+    with lock:
+        batch = take()
+    send(batch)
+    return finished
+
+
 def _repair_topology(missing_id: int | None) -> bool:
+    """Replace a dead successor; the failure detector and failed forwards may race here."""
+    state = global_state.state
+
+    with _repair_lock:
+        if missing_id is not None and state.next_node and state.next_node.node_id != missing_id:
+            RING_REPAIRS.inc("already_repaired")
+            return True
+
+        repaired = _replace_successor(missing_id)
+        RING_REPAIRS.inc("repaired" if repaired else "failed")
+        return repaired
+
+
+def _replace_successor(missing_id: int | None) -> bool:
     state = global_state.state
 
     if not state.next_node:
         return False
 
-    exclude = {state.node_id}
+    exclude = {state.node_id} | failure_detector.suspected_ids()
     if missing_id is not None:
         exclude.add(missing_id)
 
-    replacement: NodeInfo | None = None
-
-    preferred = state.next_next_node
-    if preferred and preferred.node_id not in exclude:
-        if state.prev_node and preferred.node_id == state.prev_node.node_id:
-            alternate = _find_replacement_successor(exclude | {preferred.node_id})
-            if alternate:
-                replacement = alternate
-            elif _probe_alive(preferred.host):
-                replacement = preferred
-        elif _probe_alive(preferred.host):
-            replacement = preferred
+    # The successor list already names the ring order past the dead node;
+    # the static registry is only scanned once every entry on it is gone.
+    listed = [node for node in state.successors if node.node_id not in exclude]
+    replacement = _first_alive(listed)
 
     if not replacement:
-        replacement = _find_replacement_successor(exclude)
+        replacement = _find_replacement_successor(exclude | {node.node_id for node in listed})
 
     if not replacement:
         logger.warning(
@@ -244,44 +712,40 @@ def _repair_topology(missing_id: int | None) -> bool:
         state.set_next_next(None)
         return False
 
+    # Everything the repair stepped over is gone; the view records it for all members.
+    listed_ids = [node.node_id for node in listed]
+    skipped = listed_ids[:listed_ids.index(replacement.node_id)] if replacement.node_id in listed_ids else listed_ids
+    state.membership.mark_dead(({missing_id} if missing_id is not None else set()) | set(skipped))
+
     state.set_next(replacement)
-    state.set_next_next(_fetch_next_of(replacement) or state.self_info())
+    if len(state.successors) < 2:
+        # Provisional until the replacement names its own successor.
+        state.set_next_next(state.self_info())
+        _get_later(f"{replacement.host}/health", 2).add_done_callback(partial(_adopt_next_next, replacement))
+
+    # The replacement just answered a probe; the pointer updates are sent
+    # after the artificial delay without holding this thread.
+    _post_later(
+        f"{replacement.host}/update_neighbors",
+        {
+            "prev_id": state.node_id,
+            "prev_host": state.self_host,
+            "prev_socket_port": state.socket_port,
+        },
+        2
+    ).add_done_callback(partial(_log_update_failure, "update new successor prev pointer"))
 
-    try:
-        _post_with_delay(
-            f"{replacement.host}/update_neighbors",
+    if state.prev_node:
+        _post_later(
+            f"{state.prev_node.host}/update_neighbors",
             {
-                "prev_id": state.node_id,
-                "prev_host": state.self_host,
-                "prev_socket_port": state.socket_port,
+                "next_next_id": replacement.node_id,
+                "next_next_host": replacement.host,
+                "next_next_socket_port": replacement.socket_port,
+                "next_successors": [node.to_dict() for node in state.successors],
             },
             2
-        )
-    except requests.RequestException as exc:
-        logger.warning(
-            "node=%s: failed to update new successor prev pointer (%s)",
-            state.node_id,
-            exc
-        )
-        return False
-
-    if state.prev_node:
-        try:
-            _post_with_delay(
-                f"{state.prev_node.host}/update_neighbors",
-                {
-                    "next_next_id": replacement.node_id,
-                    "next_next_host": replacement.host,
-                    "next_next_socket_port": replacement.socket_port,
-                },
-                2
-            )
-        except requests.RequestException as exc:
-            logger.warning(
-                "node=%s: failed to inform predecessor about repaired successor (%s)",
-                state.node_id,
-                exc
-            )
+        ).add_done_callback(partial(_log_update_failure, "inform predecessor about repaired successor"))
 
     logger.info(
         "node=%s: topology repaired - new successor %s",
@@ -292,131 +756,418 @@ def _repair_topology(missing_id: int | None) -> bool:
     return True
 
 
-def _forward_election(candidate_id: int, allow_repair: bool = True):
+def _on_neighbor_suspected(node: NodeInfo, roles: tuple[str, ...]):
+    """Repair around a successor the failure detector gave up on, before traffic needs it.
+
+    A suspected predecessor is left to its own predecessor, whose repair
+    updates our ``prev``. When the lost successor was the leader, the
+    node that repaired around it starts the next election.
+    """
     state = global_state.state
 
-    if not state.next_node:
-        logger.warning("node=%s: no next node to forward election message", state.node_id)
-        return {"error": "NO_NEXT_NODE"}
+    if "next" not in roles or not state.alive:
+        return
 
-    if state.next_node.node_id == state.node_id:
-        state.leader_id = state.node_id
-        state.leader_node = state.self_info()
-        state.in_election = False
-        logger.info("node=%s: single-node ring - became leader", state.node_id)
-        return {"status": "LEADER"}
+    was_leader = state.leader_id == node.node_id
+    if not _repair_topology(node.node_id):
+        return
 
-    ip, port = state.next_node.socket_addr()
+    if was_leader and state.next_node and state.next_node.node_id != state.node_id:
+        logger.warning("node=%s: leader %s lost - starting election", state.node_id, node.node_id)
+        launch_election()
 
-    response = send_socket_message(
-        host=ip,
-        port=port,
-        message={
-            "type": "ELECTION",
-            "candidate_id": candidate_id
-        }
+
+failure_detector.on_suspect(_on_neighbor_suspected)
+
+
+def _neighbor(direction: str) -> NodeInfo | None:
+    state = global_state.state
+    return state.prev_node if direction == PREV else state.next_node
+
+
+def _send_along(direction: str, message: dict, kind: str, allow_repair: bool = True) -> bool:
+    """Queue ``message`` for a neighbour and return at once; failures repair the ring later.
+
+    Only the successor link is repaired here; the predecessor is fixed by
+    its own predecessor's repair, which updates our ``prev`` pointer.
+    """
+    state = global_state.state
+    target = _neighbor(direction)
+
+    if not target:
+        RING_FORWARDS.inc(kind, "no_neighbour")
+        logger.warning("node=%s: no %s node to forward %s message", state.node_id, direction, kind)
+        return False
+
+    RING_FORWARDS.inc(kind, "sent")
+    future = send_socket_message_async(*target.socket_addr(), message)
+    future.add_done_callback(
+        partial(_on_forward_reply, direction, message, kind, target.node_id, allow_repair)
     )
+    return True
 
-    if isinstance(response, dict) and response.get("error") == "SOCKET_COMM_ERROR":
-        failed_id = state.next_node.node_id if state.next_node else None
-        logger.warning(
-            "node=%s: election forward error target=%s error=%s",
-            state.node_id,
-            failed_id,
-            response.get("details")
-        )
 
-        if allow_repair and failed_id is not None and _repair_topology(failed_id):
-            logger.info("node=%s: restarting election after topology repair", state.node_id)
-            return _forward_election(candidate_id, allow_repair=False)
+def _send_to_next(message: dict, kind: str, allow_repair: bool = True) -> bool:
+    return _send_along(NEXT, message, kind, allow_repair)
 
-        return {"error": "SOCKET_COMM_ERROR"}
 
-    return {"status": "FORWARDED"}
+def _on_forward_reply(direction: str, message: dict, kind: str, target_id: int, allow_repair: bool, future):
+    response = future.result()
+    if not (isinstance(response, dict) and response.get("error") == "SOCKET_COMM_ERROR"):
+        return
 
-def handle_election(msg: dict):
+    RING_FORWARDS.inc(kind, "failed")
+    logger.warning(
+        "node=%s: %s forward error target=%s error=%s",
+        global_state.state.node_id,
+        kind,
+        target_id,
+        response.get("details")
+    )
+
+    if allow_repair and direction == NEXT:
+        # Repair probes peers over HTTP; run it on a worker, not on the reply callback thread.
+        scheduler.defer(0, _repair_and_resend, message, kind, target_id)
+
+
+def _repair_and_resend(message: dict, kind: str, failed_id: int):
     state = global_state.state
-    candidate_id = msg["candidate_id"]
 
-    if not state.alive:
-        logger.info("node=%s: forwarding election while killed", state.node_id)
-        return _forward_election(candidate_id)
+    if _repair_topology(failed_id):
+        logger.info("node=%s: resending %s after topology repair", state.node_id, kind)
+        _send_to_next(message, kind, allow_repair=False)
 
-    if candidate_id > state.node_id:
-        forward_id = candidate_id
-    elif candidate_id < state.node_id:
-        forward_id = state.node_id
-    else:
-        state.leader_id = state.node_id
-        state.leader_node = state.self_info()
+
+def _send_election(direction: str, message: dict):
+    if _send_along(direction, message, "election"):
+        global_state.state.election_stats.inc("election_sent")
+
+
+def _accept_epoch(epoch: int) -> int | None:
+    """Reconcile a round's epoch with ours; None means the message belongs to a stale round."""
+    state = global_state.state
+
+    if epoch <= state.decided_epoch:
+        # A late candidate of a round that already has its leader; forwarding
+        # our own id again would start a second full round in that epoch.
+        return None
+
+    if epoch < state.election_epoch:
+        if state.participating():
+            return None
+        # The newer round has finished; whoever started this one still wants a leader.
+        epoch = state.election_epoch + 1
+
+    if epoch > state.election_epoch:
+        state.election_epoch = epoch
         state.in_election = False
+        state.election.reset()
 
-        logger.info("node=%s: elected self as leader", state.node_id)
+    return epoch
 
-        if not state.next_node:
-            return {"status": "LEADER"}
 
-        ip, port = state.next_node.socket_addr()
+def begin_election() -> list[Future]:
+    """Open a new round at this node; the futures carry the first hops' replies.
 
-        response = send_socket_message(
-            ip,
-            port,
-            {
-                "type": "LEADER",
-                "leader_id": state.node_id,
-                "leader_host": state.self_host,
-                "leader_socket_port": state.socket_port
-            }
+    The first hop is sent without topology repair so the caller can report
+    an unreachable neighbour instead of the round silently continuing.
+    """
+    state = global_state.state
+
+    with state.election_lock:
+        state.election_epoch += 1
+        state.election.reset()
+        decision = state.election.start(state.election_epoch)
+        state.mark_participant()
+        state.leader_id = None
+        state.leader_node = None
+        epoch = state.election_epoch
+
+    state.read_lease.clear()
+
+    logger.info("node=%s: starting %s election epoch=%s", state.node_id, state.election.name, epoch)
+    state.election_stats.inc("rounds_started")
+
+    futures = []
+    for direction, message in decision.sends:
+        target = _neighbor(direction)
+        if not target:
+            continue
+        state.election_stats.inc("election_sent")
+        futures.append(send_socket_message_async(*target.socket_addr(), message))
+
+    return futures
+
+
+def launch_election(attempts: int = ELECTION_START_ATTEMPTS) -> Future:
+    """``begin_election()``, restarted above the epoch a STALE first hop reports.
+
+    A node that joined after the last round, or missed its LEADER notice,
+    opens rounds its neighbours already decided; they drop those and answer
+    with their epoch, which this node adopts before trying again. The
+    future resolves to the first hops' replies of the last attempt.
+    """
+    result: Future = Future()
+
+    def attempt(left: int):
+        _all_replies(begin_election()).add_done_callback(lambda done: settle(done.result(), left))
+
+    def settle(replies: list, left: int):
+        stale = [
+            reply["epoch"] for reply in replies
+            if isinstance(reply, dict) and reply.get("status") == "STALE"
+        ]
+        if stale and left > 1 and _adopt_epoch(max(stale)):
+            attempt(left - 1)
+        else:
+            result.set_result(replies)
+
+    attempt(attempts)
+    return result
+
+
+def _all_replies(futures: list[Future]) -> Future:
+    combined: Future = Future()
+    remaining = len(futures)
+    lock = threading.Lock()
+
+    def one_done(_future):
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            last = remaining == 0
+        if last:
+            combined.set_result([future.result() for future in futures])
+
+    if not futures:
+        combined.set_result([])
+    for future in futures:
+        future.add_done_callback(one_done)
+    return combined
+
+
+def _adopt_epoch(epoch: int) -> bool:
+    """Move our epoch up to a neighbour's; False if a newer round got here meanwhile."""
+    state = global_state.state
+
+    with state.election_lock:
+        if state.election_epoch > epoch or (state.election_epoch == epoch and state.participating()):
+            return False
+        state.election_epoch = epoch
+        state.in_election = False
+
+    state.election_stats.inc("stale_restarts")
+    logger.info("node=%s: first hop reported epoch=%s, restarting the election above it", state.node_id, epoch)
+    return True
+
+
+def adopt_decided_round(epoch: int, leader: NodeInfo | None):
+    """Take over the newest decided round and its leader from the node we joined through."""
+    state = global_state.state
+
+    with state.election_lock:
+        if epoch <= state.decided_epoch or state.participating():
+            return
+        state.election_epoch = max(state.election_epoch, epoch)
+        state.decided_epoch = epoch
+        # A restarted leader lost its lineage; it must not take the role back from a stale notice.
+        if leader is None or leader.node_id == state.node_id or state.leader_id is not None:
+            return
+        state.leader_id = leader.node_id
+        state.leader_node = leader
+
+    logger.info("node=%s: joined at epoch=%s with leader_id=%s", state.node_id, epoch, leader.node_id)
+    replicator.follow(leader)
+
+
+def handle_election(msg: dict):
+    """Run one step of the configured election strategy for ELECTION/HS_* messages."""
+    state = global_state.state
+
+    if msg.get("type") not in state.election.message_types:
+        logger.warning(
+            "node=%s: %s message does not belong to %s election",
+            state.node_id,
+            msg.get("type"),
+            state.election.name
         )
+        return {"error": "WRONG_ELECTION_ALGORITHM", "algorithm": state.election.name}
+
+    if not state.alive:
+        logger.info("node=%s: forwarding %s while killed", state.node_id, describe_message(msg))
+        _send_election(msg.get("direction", NEXT), msg)
+        return {"status": "FORWARDED"}
+
+    with state.election_lock:
+        state.election_stats.inc("election_received")
+
+        epoch = _accept_epoch(msg.get("epoch", 0))
+        if epoch is None:
+            state.election_stats.inc("stale_dropped")
+            logger.info(
+                "node=%s: dropped stale %s (current=%s decided=%s)",
+                state.node_id,
+                describe_message(msg),
+                state.election_epoch,
+                state.decided_epoch
+            )
+            return {"status": "STALE", "epoch": max(state.election_epoch, state.decided_epoch)}
 
-        if isinstance(response, dict) and response.get("error") == "SOCKET_COMM_ERROR":
-            logger.warning(
-                "node=%s: leader broadcast failed target=%s error=%s",
+        decision = state.election.on_message(msg, state.participating(), epoch)
+
+        if decision.participate:
+            state.mark_participant()
+
+        if decision.swallowed:
+            state.election_stats.inc("swallowed")
+            logger.info(
+                "node=%s: swallowed %s (smaller than own id)",
                 state.node_id,
-                state.next_node.node_id if state.next_node else None,
-                response.get("details")
+                describe_message(msg)
             )
 
-        return {"status": "LEADER"}
+        if decision.elected:
+            ELECTION_SECONDS.observe(time.monotonic() - state.election_started_at)
+            state.leader_id = state.node_id
+            state.leader_node = state.self_info()
+            state.in_election = False
+            state.decided_epoch = max(state.decided_epoch, epoch)
+            state.election_stats.inc("elected")
+            if READ_LEASE_DURATION > 0:
+                state.write_fence = time.monotonic() + READ_LEASE_DURATION + LEASE_DRIFT_MARGIN
+
+    for direction, message in decision.sends:
+        _send_election(direction, message)
+
+    if decision.elected:
+        logger.info("node=%s: elected self as leader epoch=%s", state.node_id, epoch)
+        replicator.lead(epoch)
+        _announce_leader(epoch)
+
+    return {"status": decision.status}
+
+
+def _announce_leader(epoch: int):
+    state = global_state.state
+
+    if not state.next_node:
+        return
+
+    message = {
+        "type": "LEADER",
+        "leader_id": state.node_id,
+        "leader_host": state.self_host,
+        "leader_socket_port": state.socket_port,
+        "epoch": epoch
+    }
+
+    if LEADER_ANNOUNCE_MODE == "fanout":
+        _fan_out_leader(message, epoch)
+        return
+
+    if _send_to_next(message, "leader"):
+        state.election_stats.inc("leader_sent")
+
+
+def _fan_out_leader(message: dict, epoch: int):
+    """Tell every member at once instead of walking the ring: about one round trip for any N."""
+    state = global_state.state
+
+    targets = {
+        record["node_id"]: NodeInfo.from_dict(record)
+        for record in state.membership.ring_order()
+    }
+    for node in state.successors:
+        targets.setdefault(node.node_id, node)
+
+    state.election_stats.inc("leader_sent", len(targets))
+    fan_out(list(targets.values()), {**message, "fanout": 1}).add_done_callback(
+        partial(_on_leader_fanned_out, epoch)
+    )
+
+
+def _on_leader_fanned_out(epoch: int, future: Future):
+    state = global_state.state
+    report = future.result()
+    state.election_stats.announced({"epoch": epoch, "mode": "fanout", **report})
+
+    logger.info(
+        "node=%s: leader announcement epoch=%s acked=%s/%s in %.1f ms (rejected=%s unreachable=%s)",
+        state.node_id,
+        epoch,
+        len(report["acked"]),
+        report["targets"],
+        report["elapsed_ms"],
+        report["rejected"],
+        report["unreachable"]
+    )
+
+    # Each ack came after that member offered us its replica, as the ring's return trip does.
+    if state.leader_id == state.node_id and state.election_epoch == epoch:
+        replicator.recovered()
 
-    return _forward_election(forward_id)
 
 def handle_leader(msg: dict):
     state = global_state.state
 
     if not state.alive:
         logger.info("node=%s: ignored leader notice (node killed)", state.node_id)
+        if not msg.get("fanout"):
+            _send_to_next(msg, "leader")
+        return {"status": "IGNORED"}
 
-        if state.next_node:
-            send_socket_message(
-                *state.next_node.socket_addr(),
-                msg
-            )
+    epoch = msg.get("epoch", 0)
 
-        return {"status": "IGNORED"}
+    with state.election_lock:
+        state.election_stats.inc("leader_received")
 
-    state.leader_id = msg["leader_id"]
-    state.leader_node = global_state.NodeInfo(
-        msg["leader_id"],
-        msg["leader_host"],
-        msg["leader_socket_port"]
-    )
-    state.in_election = False
+        if epoch < state.election_epoch:
+            state.election_stats.inc("stale_dropped")
+            logger.info(
+                "node=%s: dropped stale leader notice leader_id=%s epoch=%s (current=%s)",
+                state.node_id,
+                msg["leader_id"],
+                epoch,
+                state.election_epoch
+            )
+            return {"status": "STALE", "epoch": state.election_epoch}
+
+        state.election_epoch = epoch
+        state.decided_epoch = max(state.decided_epoch, epoch)
+        state.leader_id = msg["leader_id"]
+        state.leader_node = global_state.NodeInfo(
+            msg["leader_id"],
+            msg["leader_host"],
+            msg["leader_socket_port"]
+        )
+        if state.in_election:
+            ELECTION_SECONDS.observe(time.monotonic() - state.election_started_at)
+        state.in_election = False
 
+    state.read_lease.clear()
     logger.info("node=%s: leader accepted leader_id=%s", state.node_id, state.leader_id)
 
-    if state.node_id != state.leader_id and state.next_node:
-        send_socket_message(
-            *state.next_node.socket_addr(),
-            msg
-        )
+    if state.node_id == state.leader_id:
+        replicator.recovered()
+    elif msg.get("fanout"):
+        # Acknowledge once the leader has our replica; the leader counts on it.
+        replicator.follow(state.leader_node).result()
+    else:
+        # Pass the notice on only once the leader has our replica: when it
+        # is back at the leader, every node has offered what it holds.
+        replicator.follow(state.leader_node).add_done_callback(partial(_forward_leader, msg))
 
     return {"status": "OK"}
 
 
 
 
-def handle_get_var():
+def _forward_leader(msg: dict, _offered=None):
+    if _send_to_next(msg, "leader"):
+        global_state.state.election_stats.inc("leader_sent")
+
+
+def handle_get_var(msg: dict):
     state = global_state.state
 
     if not state.alive:
@@ -434,29 +1185,49 @@ def handle_get_var():
             "leader_id": state.leader_id
         }
 
+    if replicator.recovering():
+        return {"error": "RECOVERING"}
+
+    lease_id = msg.get("lease_id")
+
+    # Granting under value_lock orders the lease against concurrent writes:
+    # either the write sees this holder or the holder gets the written value.
+    with state.value_lock:
+        reply = {
+            "value": state.shared_value,
+            "leader_id": state.node_id,
+            "version": state.shared_version
+        }
+
+        if lease_id is not None and lease_id != state.node_id and READ_LEASE_DURATION > 0:
+            state.lease_holders.grant(
+                NodeInfo(lease_id, msg["lease_host"], msg["lease_port"]),
+                READ_LEASE_DURATION
+            )
+            reply["lease_ms"] = int(READ_LEASE_DURATION * 1000)
+
     logger.info(
-        "node=%s: GET_VAR served locally value=%s",
+        "node=%s: GET_VAR served locally value=%s version=%s lease_for=%s",
         state.node_id,
-        state.shared_value
+        reply["value"],
+        reply["version"],
+        lease_id if "lease_ms" in reply else None
     )
-    return {
-        "value": state.shared_value,
-        "leader_id": state.node_id
-    }
-
+    return reply
 
 
-def handle_set_var(msg):
+def _reject_unless_leader(kind: str) -> dict | None:
     state = global_state.state
 
     if not state.alive:
-        logger.info("node=%s: SET_VAR rejected - node killed", state.node_id)
+        logger.info("node=%s: %s rejected - node killed", state.node_id, kind)
         return {"error": "NODE_KILLED"}
 
     if state.leader_id != state.node_id:
         logger.info(
-            "node=%s: SET_VAR redirected - not leader (current_leader=%s)",
+            "node=%s: %s redirected - not leader (current_leader=%s)",
             state.node_id,
+            kind,
             state.leader_id
         )
         return {
@@ -464,17 +1235,281 @@ def handle_set_var(msg):
             "leader_id": state.leader_id
         }
 
+    if replicator.recovering():
+        logger.info("node=%s: %s rejected - recovering replicated state", state.node_id, kind)
+        return {"error": "RECOVERING"}
+
+    return None
+
+
+def handle_set_var(msg):
+    state = global_state.state
+
+    rejected = _reject_unless_leader("SET_VAR")
+    if rejected:
+        return rejected
+
     value = msg["value"]
-    state.shared_value = value
+    version, = commit_shared_values([value]).result()
 
-    logger.info("node=%s: shared variable set to %s", state.node_id, value)
+    logger.info("node=%s: shared variable set to %s version=%s", state.node_id, value, version)
 
     return {
         "status": "OK",
         "value": value,
-        "leader_id": state.node_id
+        "leader_id": state.node_id,
+        "version": version
+    }
+
+
+def handle_set_var_batch(msg):
+    state = global_state.state
+
+    rejected = _reject_unless_leader("SET_VAR_BATCH")
+    if rejected:
+        return rejected
+
+    values = msg.get("values")
+    if not isinstance(values, list) or not values or not all(type(value) is int for value in values):
+        return {"error": "INVALID_BATCH"}
+
+    versions = commit_shared_values(values).result()
+
+    logger.info(
+        "node=%s: applied batch of %s writes - value=%s versions=%s..%s",
+        state.node_id,
+        len(values),
+        values[-1],
+        versions[0],
+        versions[-1]
+    )
+
+    return {
+        "status": "OK",
+        "leader_id": state.node_id,
+        "versions": versions
+    }
+
+
+def commit_shared_values(values: list[int]) -> Future:
+    """Apply writes in order as one step on the leader.
+
+    Each write gets its own version, but readers only ever see the state
+    after the whole batch, and one lease revocation and one replication
+    log entry cover all of it. The future yields the versions once no
+    lease can serve an older value (ours, or the previous leader's after
+    an election), the write is durable in the local WAL and the
+    replication ack mode is met.
+    """
+    state = global_state.state
+
+    with state.value_lock:
+        first = state.shared_version + 1
+        state.shared_version += len(values)
+        state.shared_value = values[-1]
+        versions = list(range(first, state.shared_version + 1))
+        holders = state.lease_holders.take_active()
+        entry = {"op": "var", "value": values[-1], "version": versions[-1]}
+        seq = replicator.append(entry)
+
+    if holders:
+        logger.info(
+            "node=%s: revoking %s read lease(s) for version=%s",
+            state.node_id,
+            len(holders),
+            versions[-1]
+        )
+
+    # Logged outside value_lock: an fsync must not stall readers, and replay
+    # keeps the highest version, so the order of concurrent appends is moot.
+    return _after_all(
+        [
+            revoke_leases(holders, versions[-1]),
+            _past_write_fence(),
+            journal.record(entry),
+            replicator.replicated(seq)
+        ],
+        versions
+    )
+
+
+def _past_write_fence() -> Future:
+    """Resolves once the leases granted by the leader before us have run out."""
+    done: Future = Future()
+    remaining = global_state.state.write_fence - time.monotonic()
+    if remaining > 0:
+        scheduler.schedule(remaining, done.set_result, None, inline=True)
+    else:
+        done.set_result(None)
+    return done
+
+
+def _after_all(futures: list[Future], result) -> Future:
+    """Future yielding ``result`` once every one of ``futures`` is done."""
+    done: Future = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def settle(_):
+        with lock:
+            remaining[0] -= 1
+            finished = remaining[0] == 0
+        if finished:
+            done.set_result(result)
+
+    for future in futures:
+        future.add_done_callback(settle)
+    return done
+
+
+def revoke_leases(holders: list[tuple[NodeInfo, float]], version: int) -> Future:
+    """Push VAR_INVALIDATE to every holder.
+
+    The returned future resolves once each holder has acknowledged or its
+    lease has expired on its own, whichever happens first. A write may be
+    acknowledged only after that.
+    """
+    done: Future = Future()
+    if not holders:
+        done.set_result(0)
+        return done
+
+    lock = threading.Lock()
+    pending = {holder.node_id for holder, _ in holders}
+
+    def settle(node_id: int):
+        with lock:
+            if node_id not in pending:
+                return
+            pending.discard(node_id)
+            finished = not pending
+
+        if finished:
+            done.set_result(len(holders))
+
+    def on_reply(node_id: int, future: Future):
+        response = future.result()
+        if isinstance(response, dict) and response.get("status") == "OK":
+            settle(node_id)
+
+    now = time.monotonic()
+    for holder, expires in holders:
+        remaining = max(expires - now, 0.0)
+        scheduler.schedule(remaining, settle, holder.node_id, inline=True)
+
+        future = send_socket_message_async(
+            *holder.socket_addr(),
+            {"type": "VAR_INVALIDATE", "version": version},
+            timeout=max(remaining, 0.1)
+        )
+        future.add_done_callback(lambda f, node_id=holder.node_id: on_reply(node_id, f))
+
+    return done
+
+
+def handle_var_invalidate(msg: dict):
+    state = global_state.state
+    state.read_lease.invalidate(msg["version"])
+    logger.info("node=%s: read lease invalidated version=%s", state.node_id, msg["version"])
+    return {"status": "OK"}
+
+
+def _valid_key(key) -> bool:
+    return isinstance(key, str) and 0 < len(key) <= MAX_KEY_LENGTH
+
+
+def commit_key_values(entries: dict) -> Future:
+    """Write keys on the leader; the future yields their versions once logged and replicated as configured."""
+    state = global_state.state
+
+    if len(entries) == 1:
+        (key, value), = entries.items()
+        versions = {key: state.kv.set(key, value)}
+    else:
+        versions = state.kv.mset(entries)
+
+    # Replicas and WAL replay keep the highest version per key, so logging
+    # outside the shard locks cannot reorder two writes of the same key.
+    entry = {
+        "op": "kv",
+        "entries": {key: [entries[key], version] for key, version in versions.items()}
+    }
+    seq = replicator.append(entry)
+
+    return _after_all([journal.record(entry), replicator.replicated(seq)], versions)
+
+
+def handle_get_key(msg: dict):
+    state = global_state.state
+
+    rejected = _reject_unless_leader("GET_KEY")
+    if rejected:
+        return rejected
+
+    key = msg.get("key")
+    if not _valid_key(key):
+        return {"error": "INVALID_KEY"}
+
+    value, version = state.kv.get(key)
+    return {"key": key, "value": value, "version": version}
+
+
+def handle_set_key(msg: dict):
+    state = global_state.state
+
+    rejected = _reject_unless_leader("SET_KEY")
+    if rejected:
+        return rejected
+
+    key = msg.get("key")
+    if not _valid_key(key):
+        return {"error": "INVALID_KEY"}
+
+    version = commit_key_values({key: msg.get("value")}).result()[key]
+    logger.info("node=%s: key %s set version=%s", state.node_id, key, version)
+    return {"status": "OK", "key": key, "version": version}
+
+
+def handle_mget_keys(msg: dict):
+    state = global_state.state
+
+    rejected = _reject_unless_leader("MGET_KEYS")
+    if rejected:
+        return rejected
+
+    keys = msg.get("keys")
+    if not isinstance(keys, list) or not all(_valid_key(key) for key in keys):
+        return {"error": "INVALID_KEY"}
+
+    return {
+        "entries": {
+            key: {"value": value, "version": version}
+            for key, (value, version) in state.kv.mget(keys).items()
+        }
     }
 
 
+def handle_mset_keys(msg: dict):
+    state = global_state.state
+
+    rejected = _reject_unless_leader("MSET_KEYS")
+    if rejected:
+        return rejected
+
+    entries = msg.get("entries")
+    if not isinstance(entries, dict) or not entries or not all(_valid_key(key) for key in entries):
+        return {"error": "INVALID_KEY"}
+
+    versions = commit_key_values(entries).result()
+    logger.info("node=%s: %s keys set in one batch", state.node_id, len(versions))
+    return {"status": "OK", "versions": versions}
 
 
+def handle_replication(msg: dict, apply):
+    state = global_state.state
+
+    if not state.alive:
+        logger.info("node=%s: %s rejected - node killed", state.node_id, msg.get("type"))
+        return {"error": "NODE_KILLED"}
+
+    return apply(msg)
@@ -1,3 +1,13 @@
+import threading
+import time
+
+from app.config import ELECTION_ALGORITHM, ELECTION_ROUND_TIMEOUT, KV_SHARDS, SUCCESSOR_LIST_SIZE
+from app.election import ElectionStats, make_strategy
+from app.kv_store import ShardedKVStore
+from app.lease import LeaseTable, ReadLease
+from app.membership import MembershipView
+
+
 class NodeInfo:
     def __init__(self, node_id: int, host: str, socket_port: int):
         self.node_id = node_id
@@ -15,6 +25,10 @@ class NodeInfo:
             "socket_port": self.socket_port
         }
 
+    @staticmethod
+    def from_dict(data: dict) -> "NodeInfo":
+        return NodeInfo(int(data["node_id"]), data["host"], int(data["socket_port"]))
+
 
 class NodeState:
     def __init__(self, node_id: int, host: str, socket_port: int | None = None):
@@ -24,18 +38,49 @@ class NodeState:
         self.next_node: NodeInfo | None = None
         self.prev_node: NodeInfo | None = None
         self.next_next_node: NodeInfo | None = None
+        # Chord-style successor list: next, next_next and onwards, at most
+        # SUCCESSOR_LIST_SIZE long and cut where the ring wraps back to us.
+        self.successors: list[NodeInfo] = []
 
         self.leader_id: int | None = None
         self.leader_node: NodeInfo | None = None
         self.in_election: bool = False
+        self.election_epoch: int = 0
+        # Newest epoch that produced a leader here; its late ELECTION messages are dropped.
+        self.decided_epoch: int = 0
+        self.election_started_at: float = 0.0
+        self.election_lock = threading.RLock()
+        self.election_stats = ElectionStats()
+        self.election = make_strategy(ELECTION_ALGORITHM, node_id)
 
         self.alive: bool = True
         self.delay: float = 0.0
 
         self.shared_value: int | None = None
+        self.shared_version: int = 0
+        self.value_lock = threading.Lock()
+        self.read_lease = ReadLease()
+        # Monotonic time before which this node, newly elected, acknowledges no
+        # write: followers may still serve reads from the old leader's leases.
+        self.write_fence: float = 0.0
+        self.lease_holders = LeaseTable()
+        self.kv = ShardedKVStore(KV_SHARDS)
 
         self.socket_port: int = socket_port if socket_port is not None else 9000 + node_id
         self.socket_alive: bool = True 
+        self.membership = MembershipView(self.self_info().to_dict())
+
+    def mark_participant(self):
+        with self.election_lock:
+            self.in_election = True
+            self.election_started_at = time.monotonic()
+
+    def participating(self) -> bool:
+        # A round that never completed (lost message, dead node) must not block new elections.
+        with self.election_lock:
+            if self.in_election and time.monotonic() - self.election_started_at > ELECTION_ROUND_TIMEOUT:
+                self.in_election = False
+            return self.in_election
 
     def self_info(self) -> NodeInfo:
         return NodeInfo(self.node_id, self.self_host, self.socket_port)
@@ -45,9 +90,52 @@ class NodeState:
 
     def set_next(self, node: NodeInfo | None):
         self.next_node = node
+        self.successors = self._splice(0, node)
+        if len(self.successors) > 1:
+            self.next_next_node = self.successors[1]
+        self.membership.update_self(node.node_id if node else None)
 
     def set_next_next(self, node: NodeInfo | None):
         self.next_next_node = node
+        if self.successors:
+            self.successors = self._splice(1, node)
+
+    def set_successors(self, nodes: list[NodeInfo]):
+        """Replace the whole successor list with one known to be in ring order."""
+        successors = self._trimmed(nodes)
+        if not successors:
+            return
+
+        self.successors = successors
+        self.next_node = successors[0]
+        self.next_next_node = successors[1] if len(successors) > 1 else self.self_info()
+        self.membership.update_self(self.next_node.node_id)
+
+    def adopt_successors(self, via: NodeInfo, successors: list[dict]):
+        """Continue our list with ``via``'s own successors while ``via`` is still our next."""
+        if not self.next_node or self.next_node.node_id != via.node_id:
+            return
+        self.set_successors([self.next_node] + [NodeInfo.from_dict(entry) for entry in successors])
+
+    def _splice(self, index: int, node: NodeInfo | None) -> list[NodeInfo]:
+        # A node already on the list means the ones before it are gone;
+        # an unknown one was inserted in front of the rest.
+        head = self.successors[:index]
+        if node is None or node.node_id == self.node_id:
+            return head
+
+        rest = self.successors[index:]
+        ids = [entry.node_id for entry in rest]
+        tail = rest[ids.index(node.node_id) + 1:] if node.node_id in ids else rest
+        return self._trimmed(head + [node] + tail)
+
+    def _trimmed(self, nodes: list[NodeInfo]) -> list[NodeInfo]:
+        successors: list[NodeInfo] = []
+        for node in nodes:
+            if node is None or node.node_id == self.node_id or any(s.node_id == node.node_id for s in successors):
+                break
+            successors.append(node)
+        return successors[:max(2, SUCCESSOR_LIST_SIZE)]
 
     def neighbors_snapshot(self) -> dict:
         return {
@@ -55,6 +143,7 @@ class NodeState:
             "prev": self.prev_node.to_dict() if self.prev_node else None,
             "next": self.next_node.to_dict() if self.next_node else None,
             "next_next": self.next_next_node.to_dict() if self.next_next_node else None,
+            "successors": [node.to_dict() for node in self.successors],
             "leader": self.leader_node.to_dict() if self.leader_node else None,
         }
 
@@ -0,0 +1,463 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+import app.state as global_state
+from app.config import (
+    DATA_DIR,
+    NODE_ID,
+    WAL_CHECKPOINT_INTERVAL,
+    WAL_FSYNC,
+    WAL_FSYNC_INTERVAL,
+    WAL_SNAPSHOT_EVERY,
+)
+from app.logger import setup_logger
+from app.scheduler import scheduler
+
+logger = setup_logger(NODE_ID)
+
+# Every record is framed as payload length + CRC32 of the payload, then JSON.
+RECORD_HEADER = struct.Struct(">II")
+
+FSYNC_POLICIES = ("always", "batch", "none")
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+SNAPSHOT_FILE = "snapshot.bin"
+SNAPSHOT_CHUNK = 1000
+
+
+def encode_record(record: dict) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode()
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str) -> list[dict]:
+    """Decode a record file through a memory map, up to the first torn or corrupt record."""
+    records = []
+
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return records
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            offset = 0
+            while offset + RECORD_HEADER.size <= size:
+                length, checksum = RECORD_HEADER.unpack_from(view, offset)
+                start = offset + RECORD_HEADER.size
+                end = start + length
+                if end > size:
+                    break
+
+                payload = view[start:end]
+                if zlib.crc32(payload) != checksum:
+                    break
+
+                records.append(json.loads(payload))
+                offset = end
+
+    return records
+
+
+def _fsync_directory(directory: str):
+    # Makes renames and new segment files durable; not every platform allows it.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """Append-only record log split into numbered segment files.
+
+    ``fsync`` decides when an appended record counts as durable:
+    ``always`` syncs before ``append`` returns, ``batch`` covers every
+    record written while the previous fsync ran, plus ``interval``
+    seconds, with one fsync (group commit), and ``none`` only hands the
+    bytes to the operating system. ``append`` returns a future that
+    resolves once the policy is met.
+    """
+
+    def __init__(self, directory: str, fsync: str = "batch", interval: float = 0.0):
+        self.directory = directory
+        self.fsync = fsync if fsync in FSYNC_POLICIES else "batch"
+        self.interval = interval
+        self.segment = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = None
+        self._unsynced: list[Future] = []
+        self._timer = None
+        self._counts = {"records": 0, "bytes": 0, "fsyncs": 0, "fsync_ms": 0.0}
+
+    def path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}")
+
+    def segments(self) -> list[int]:
+        return sorted(
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def open(self, segment: int):
+        with self._sync_lock, self._lock:
+            self._switch(segment)
+
+    def rotate(self) -> int:
+        """Continue in a fresh segment; everything before it is synced and closed."""
+        with self._sync_lock:
+            with self._lock:
+                waiters = self._switch(self.segment + 1)
+                segment = self.segment
+
+        for future in waiters:
+            future.set_result(None)
+        return segment
+
+    def close(self):
+        with self._sync_lock:
+            with self._lock:
+                waiters = self._switch(None)
+
+        for future in waiters:
+            future.set_result(None)
+
+    def _switch(self, segment: int | None) -> list[Future]:
+        waiters, self._unsynced = self._unsynced, []
+
+        if self._file is not None:
+            self._file.flush()
+            self._timed_fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+        if segment is not None:
+            self.segment = segment
+            self._file = open(self.path(segment), "ab")
+            _fsync_directory(self.directory)
+
+        return waiters
+
+    def append(self, record: dict) -> Future:
+        data = encode_record(record)
+        future: Future = Future()
+
+        with self._lock:
+            self._file.write(data)
+            self._counts["records"] += 1
+            self._counts["bytes"] += len(data)
+
+            if self.fsync == "batch":
+                self._unsynced.append(future)
+                if self._timer is None:
+                    self._timer = scheduler.schedule(self.interval, self._sync_due)
+                return future
+
+            self._file.flush()
+            if self.fsync == "always":
+                self._timed_fsync(self._file.fileno())
+
+        future.set_result(None)
+        return future
+
+    def _sync_due(self):
+        with self._sync_lock:
+            with self._lock:
+                self._timer = None
+                waiters, self._unsynced = self._unsynced, []
+                if not waiters or self._file is None:
+                    return
+                self._file.flush()
+                fd = self._file.fileno()
+
+            # Appends keep going while the disk catches up; they wait for the next round.
+            self._timed_fsync(fd)
+
+        for future in waiters:
+            future.set_result(None)
+
+    def _timed_fsync(self, fd: int):
+        started = time.perf_counter()
+        os.fsync(fd)
+        self._counts["fsyncs"] += 1
+        self._counts["fsync_ms"] += (time.perf_counter() - started) * 1000
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+
+        counts["fsync_ms"] = round(counts["fsync_ms"], 3)
+        counts["avg_fsync_ms"] = round(counts["fsync_ms"] / counts["fsyncs"], 3) if counts["fsyncs"] else None
+        return {"policy": self.fsync, "segment": self.segment, **counts}
+
+
+class Journal:
+    """Durable copy of this node's state: a write-ahead log plus compacted snapshots.
+
+    The leader logs every variable and key write before acknowledging it,
+    replicas log what they apply, and a checkpoint tick logs neighbour,
+    leader and epoch changes. After ``snapshot_every`` records the state
+    is written to a snapshot and older segments are dropped. On start
+    ``recover`` maps the snapshot and the remaining segments into memory
+    and replays them; values are only ever moved to higher versions, so
+    records that a snapshot already covers do no harm.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fsync: str = WAL_FSYNC,
+        interval: float = WAL_FSYNC_INTERVAL,
+        snapshot_every: int = WAL_SNAPSHOT_EVERY
+    ):
+        self.directory = directory
+        self.wal = WriteAheadLog(directory, fsync, interval) if directory else None
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._since_snapshot = 0
+        self._compacting = False
+        self._topology: dict | None = None
+        self._tick = None
+        self._counts = {"snapshots": 0, "last_snapshot_ms": None, "recovery_ms": None, "recovered_records": 0}
+
+    def enabled(self) -> bool:
+        return self.wal is not None
+
+    def recover(self) -> bool:
+        """Restore the global state from disk; True when there was anything to restore."""
+        if not self.enabled():
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        state = global_state.state
+        started = time.perf_counter()
+
+        first_segment = 0
+        records = 0
+        topology = None
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            snapshot = read_records(snapshot_path)
+            if snapshot and snapshot[0].get("op") == "snapshot":
+                first_segment = snapshot[0]["segment"]
+                for record in snapshot:
+                    topology = self._apply(state, record) or topology
+                records += len(snapshot)
+
+        segments = self.wal.segments()
+        for segment in segments:
+            if segment < first_segment:
+                continue
+            entries = read_records(self.wal.path(segment))
+            for record in entries:
+                topology = self._apply(state, record) or topology
+            records += len(entries)
+
+        if topology and topology.get("self", {}).get("node_id") not in (None, state.node_id):
+            logger.warning(
+                "WAL: %s belongs to node %s, not restoring neighbours",
+                self.directory,
+                topology["self"]["node_id"]
+            )
+            topology = None
+
+        if topology:
+            self._restore_topology(state, topology)
+
+        # Never append behind a torn tail: a restart always opens a new segment.
+        self.wal.open(max(segments + [first_segment], default=0) + 1)
+
+        with self._lock:
+            self._since_snapshot = records
+            self._topology = self._capture(state)
+            self._counts["recovery_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            self._counts["recovered_records"] = records
+
+        if records:
+            logger.info(
+                "WAL: recovered %s record(s) in %s ms: value=%s version=%s keys=%s prev=%s next=%s leader=%s",
+                records,
+                self._counts["recovery_ms"],
+                state.shared_value,
+                state.shared_version,
+                len(state.kv),
+                state.prev_node.node_id if state.prev_node else None,
+                state.next_node.node_id if state.next_node else None,
+                state.leader_id
+            )
+        return records > 0
+
+    def start(self):
+        if not self.enabled():
+            return
+        with self._lock:
+            if self._tick is None:
+                self._tick = scheduler.schedule(WAL_CHECKPOINT_INTERVAL, self._on_tick)
+
+    def record(self, entry: dict) -> Future:
+        """Log a write; the future resolves once the fsync policy considers it durable."""
+        if not self.enabled():
+            done: Future = Future()
+            done.set_result(None)
+            return done
+
+        with self._lock:
+            self._since_snapshot += 1
+        return self.wal.append(entry)
+
+    def note_topology(self):
+        """Log neighbours, leader and epoch if they changed since the last record."""
+        if not self.enabled():
+            return
+
+        topology = self._capture(global_state.state)
+        with self._lock:
+            if topology == self._topology:
+                return
+            self._topology = topology
+
+        self.wal.append({"op": "meta", "topology": topology})
+
+    def checkpoint(self):
+        """Write a snapshot of the current state and drop the segments it covers."""
+        if not self.enabled():
+            return
+
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            covered = self._since_snapshot
+
+        try:
+            started = time.perf_counter()
+            segment = self.wal.rotate()
+
+            # Every record in the older segments was applied before it was
+            # logged, so the state read now contains all of them.
+            state = global_state.state
+            with state.value_lock:
+                value, version = state.shared_value, state.shared_version
+            topology = self._capture(state)
+            entries = list(state.kv.dump().items())
+
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            temporary = path + ".tmp"
+            with open(temporary, "wb") as file:
+                file.write(encode_record({
+                    "op": "snapshot",
+                    "segment": segment,
+                    "value": value,
+                    "version": version,
+                    "topology": topology
+                }))
+                for index in range(0, len(entries), SNAPSHOT_CHUNK):
+                    chunk = entries[index:index + SNAPSHOT_CHUNK]
+                    file.write(encode_record({"op": "kv", "entries": {key: list(pair) for key, pair in chunk}}))
+                file.flush()
+                os.fsync(file.fileno())
+
+            os.replace(temporary, path)
+            _fsync_directory(self.directory)
+
+            for old in self.wal.segments():
+                if old < segment:
+                    os.remove(self.wal.path(old))
+
+            elapsed = round((time.perf_counter() - started) * 1000, 3)
+            with self._lock:
+                self._since_snapshot = max(0, self._since_snapshot - covered)
+                self._counts["snapshots"] += 1
+                self._counts["last_snapshot_ms"] = elapsed
+
+            logger.info("WAL: snapshot of %s key(s) written in %s ms, segment=%s", len(entries), elapsed, segment)
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def compact_soon(self):
+        """The state was replaced wholesale; records before it must not be replayed over it."""
+        if self.enabled():
+            scheduler.schedule(0, self.checkpoint)
+
+    def _on_tick(self):
+        with self._lock:
+            self._tick = None
+            due = self._since_snapshot >= self.snapshot_every
+
+        try:
+            self.note_topology()
+            if due:
+                self.checkpoint()
+        finally:
+            self.start()
+
+    @staticmethod
+    def _capture(state) -> dict:
+        return {**state.neighbors_snapshot(), "epoch": state.election_epoch}
+
+    @staticmethod
+    def _apply(state, record: dict) -> dict | None:
+        op = record.get("op")
+
+        if op in ("var", "snapshot"):
+            if record.get("version", 0) > state.shared_version:
+                state.shared_value = record["value"]
+                state.shared_version = record["version"]
+        elif op == "kv":
+            state.kv.install({key: tuple(pair) for key, pair in record["entries"].items()})
+
+        if op in ("meta", "snapshot"):
+            return record.get("topology")
+        return None
+
+    @staticmethod
+    def _restore_topology(state, topology: dict):
+        def node(data):
+            if not data:
+                return None
+            return global_state.NodeInfo(data["node_id"], data["host"], data["socket_port"])
+
+        state.set_prev(node(topology.get("prev")))
+        state.set_next(node(topology.get("next")))
+        state.set_next_next(node(topology.get("next_next")))
+        if topology.get("successors"):
+            state.set_successors([node(entry) for entry in topology["successors"]])
+        state.election_epoch = max(state.election_epoch, topology.get("epoch") or 0)
+
+        leader = node(topology.get("leader"))
+        if leader:
+            state.leader_id = leader.node_id
+            state.leader_node = leader
+
+    def snapshot_stats(self) -> dict:
+        if not self.enabled():
+            return {"enabled": False}
+
+        with self._lock:
+            counts = dict(self._counts)
+            since = self._since_snapshot
+
+        return {
+            "enabled": True,
+            "directory": self.directory,
+            "records_since_snapshot": since,
+            **counts,
+            **self.wal.snapshot(),
+        }
+
+
+journal = Journal(DATA_DIR)
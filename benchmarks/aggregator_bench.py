@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Ingest throughput of the log aggregator.
+
+Starts ``log_aggregator.py`` as a subprocess, lets several simulated nodes
+stream batch frames (as ``app.log_shipper`` sends them) at it as fast as
+the sockets take them and measures how long it takes until every record is
+in the output file.
+
+    python benchmarks/aggregator_bench.py --nodes 8 --records 50000 --format json --compression zlib
+"""
+import argparse
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.log_wire import available_codec, encode_frame  # noqa: E402
+
+
+def frames(node: int, records: int, batch: int, codec: str, compression: str) -> bytes:
+    now = time.time()
+    entries = [
+        {
+            "created": now,
+            "name": f"node-{node}",
+            "levelno": 20,
+            "msg": f"node={node}: received PING from 127.0.0.1 #{index}",
+            "node_id": node,
+        }
+        for index in range(records)
+    ]
+    return b"".join(
+        encode_frame(entries[start:start + batch], codec, compression)
+        for start in range(0, records, batch)
+    )
+
+
+def wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("aggregator did not start")
+
+
+def count_lines(path: Path) -> int:
+    try:
+        with open(path, "rb") as handle:
+            return sum(chunk.count(b"\n") for chunk in iter(lambda: handle.read(1024 * 1024), b""))
+    except FileNotFoundError:
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure log aggregator ingest throughput")
+    parser.add_argument("--nodes", type=int, default=8, help="Concurrent node connections")
+    parser.add_argument("--records", type=int, default=50000, help="Records per node")
+    parser.add_argument("--batch", type=int, default=500, help="Records per frame")
+    parser.add_argument("--format", default="json", choices=("json", "msgpack"), help="Frame codec")
+    parser.add_argument("--compression", default="zlib", choices=("zlib", "none"), help="Frame compression")
+    parser.add_argument("--port", type=int, default=9520, help="Aggregator port")
+    parser.add_argument("--script", default=str(ROOT / "log_aggregator.py"), help="Aggregator to run")
+    parser.add_argument(
+        "--extra",
+        default="--quiet --max-bytes 0 --store-dir= --http-port 0",
+        help="Extra aggregator arguments (keep rotation off: only the live file is counted)"
+    )
+    args = parser.parse_args()
+
+    output = Path(tempfile.mkdtemp(prefix="aggregator-bench-")) / "aggregated.log"
+    process = subprocess.Popen(
+        [sys.executable, args.script, "--host", "127.0.0.1", "--port", str(args.port), "--output", str(output)]
+        + args.extra.split(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    try:
+        wait_for_port(args.port)
+        baseline = count_lines(output)
+        codec = available_codec(args.format)
+        payloads = [
+            frames(node, args.records, args.batch, codec, args.compression)
+            for node in range(args.nodes)
+        ]
+
+        def send(payload: bytes):
+            with socket.create_connection(("127.0.0.1", args.port)) as sock:
+                sock.sendall(payload)
+
+        threads = [threading.Thread(target=send, args=(payload,)) for payload in payloads]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sent = time.perf_counter() - started
+
+        expected = baseline + args.nodes * args.records
+        while count_lines(output) < expected:
+            if time.perf_counter() - started > 600:
+                raise RuntimeError("aggregator did not write every record")
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(output.parent)
+
+    total = args.nodes * args.records
+    wire = sum(len(payload) for payload in payloads)
+    print(
+        f"{total} records from {args.nodes} nodes: {wire / total:.1f} B/record on the wire, "
+        f"sent in {sent:.2f} s, written in {elapsed:.2f} s ({total / elapsed:.0f} records/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
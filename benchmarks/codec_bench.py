@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Encode/decode cost and wire size of the socket message codecs.
+
+    python benchmarks/codec_bench.py --iterations 200000
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.messages import CODECS  # noqa: E402
+
+SAMPLES = {
+    "ELECTION": {"type": "ELECTION", "candidate_id": 42, "epoch": 7},
+    "LEADER": {
+        "type": "LEADER",
+        "leader_id": 42,
+        "leader_host": "http://192.168.56.107:8000",
+        "leader_socket_port": 9005,
+        "epoch": 7,
+    },
+    "GET_VAR": {"type": "GET_VAR"},
+    "SET_VAR": {"type": "SET_VAR", "value": 123456},
+    "VAR reply": {"value": 123456, "leader_id": 42},
+    "SET reply": {"status": "OK", "value": 123456, "leader_id": 42},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare socket message codecs")
+    parser.add_argument("--iterations", type=int, default=100000, help="Encode/decode calls per sample")
+    args = parser.parse_args()
+
+    print(f"{'message':<10} {'codec':<7} {'bytes':>5} {'encode ns':>10} {'decode ns':>10}")
+    for label, message in SAMPLES.items():
+        for name, codec in CODECS.items():
+            raw = codec.encode(message)
+            assert codec.decode(raw) == message, (name, label)
+
+            encode_s = timeit.timeit(lambda: codec.encode(message), number=args.iterations)
+            decode_s = timeit.timeit(lambda: codec.decode(raw), number=args.iterations)
+
+            print(
+                f"{label:<10} {name:<7} {len(raw):>5} "
+                f"{encode_s / args.iterations * 1e9:>10.0f} {decode_s / args.iterations * 1e9:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
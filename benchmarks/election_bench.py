@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Message counts and election time of the ring election strategies.
+
+Runs the strategy objects from ``app.election`` on a simulated ring: every
+hop takes ``--latency`` ms plus random jitter, links are FIFO and nodes
+process messages instantly, so "time" is the wall-clock a real deployment
+with that per-hop latency would need until every node knows the leader.
+
+``random`` layouts place ids in random order; ``descending`` puts them in
+decreasing order along ``next``, the worst case for Chang-Roberts, where
+O(n^2) messages circulate while Hirschberg-Sinclair stays O(n log n).
+
+    python benchmarks/election_bench.py --sizes 5,50,500 --trials 5
+"""
+import argparse
+import heapq
+import itertools
+import math
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.election import (  # noqa: E402
+    NEXT,
+    ChangRobertsElection,
+    HirschbergSinclairElection,
+)
+
+VARIANTS = {
+    "cr-no-participant": lambda node_id: ChangRobertsElection(node_id, participant_rule=False),
+    "chang-roberts": ChangRobertsElection,
+    "hirschberg-sinclair": HirschbergSinclairElection,
+}
+
+
+def make_ids(n: int, layout: str, rng: random.Random) -> list[int]:
+    ids = list(range(1, n + 1))
+    if layout == "descending":
+        return ids[::-1]
+    rng.shuffle(ids)
+    return ids
+
+
+def simulate(factory, ids: list[int], starters: list[int], latency: float, rng: random.Random):
+    """Return (message counts, ms until the leader is known everywhere)."""
+    n = len(ids)
+    nodes = [factory(node_id) for node_id in ids]
+    participant = [False] * n
+    counts = Counter()
+    events = []
+    seq = itertools.count()
+    link_free = {}
+    finished_at = None
+
+    def deliver(now: float, position: int, decision):
+        nonlocal finished_at
+
+        if decision.participate:
+            participant[position] = True
+
+        for direction, message in decision.sends:
+            target = (position + 1) % n if direction == NEXT else (position - 1) % n
+            arrival = max(now + latency * (1 + rng.random()), link_free.get((position, target), 0.0))
+            link_free[position, target] = arrival
+            counts[message["type"]] += 1
+            heapq.heappush(events, (arrival, next(seq), target, message))
+
+        if decision.elected:
+            # LEADER travels once around the ring, like handle_leader does.
+            counts["LEADER"] += n
+            done = now + n * latency * 1.5
+            finished_at = done if finished_at is None else max(finished_at, done)
+
+    for position in starters:
+        deliver(0.0, position, nodes[position].start(1))
+
+    while events:
+        now, _, position, message = heapq.heappop(events)
+        deliver(now, position, nodes[position].on_message(message, participant[position], 1))
+
+    return counts, finished_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ring election strategies")
+    parser.add_argument("--sizes", default="5,50,500", help="Comma separated ring sizes")
+    parser.add_argument("--trials", type=int, default=5, help="Runs averaged per size")
+    parser.add_argument("--starters", type=float, default=1.0, help="Fraction of nodes starting at once")
+    parser.add_argument("--layout", choices=("random", "descending"), default="random")
+    parser.add_argument("--latency", type=float, default=1.0, help="Per-hop latency in ms")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print(
+        f"{'n':>5} {'strategy':<20} {'election':>10} {'LEADER':>8} {'time ms':>9} {'cpu ms':>8}"
+        f" {'n*log2n':>8} {'n^2':>7}"
+    )
+    for n in (int(size) for size in args.sizes.split(",")):
+        starter_count = max(1, int(n * args.starters))
+
+        for name, factory in VARIANTS.items():
+            totals = Counter()
+            elapsed = 0.0
+            cpu = 0.0
+
+            for trial in range(args.trials):
+                trial_rng = random.Random(args.seed * 1000 + trial)
+                ids = make_ids(n, args.layout, trial_rng)
+                starters = trial_rng.sample(range(n), starter_count)
+
+                started = time.perf_counter()
+                counts, finished_at = simulate(factory, ids, starters, args.latency, rng)
+                cpu += time.perf_counter() - started
+
+                totals.update(counts)
+                elapsed += finished_at
+
+            election = sum(count for kind, count in totals.items() if kind != "LEADER")
+            print(
+                f"{n:>5} {name:<20} {election / args.trials:>10.0f} {totals['LEADER'] / args.trials:>8.0f}"
+                f" {elapsed / args.trials:>9.1f} {cpu / args.trials * 1000:>8.1f}"
+                f" {n * math.log2(n):>8.0f} {n * n:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
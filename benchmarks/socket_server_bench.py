@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Throughput of the threaded vs the asyncio socket server.
+
+Both servers run in this process against a leader-only NodeState and are
+hammered by many concurrent framed connections from an asyncio client
+running in a separate process:
+
+    python benchmarks/socket_server_bench.py --connections 2000 --requests 20
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.state as global_state  # noqa: E402
+from app.async_socket_server import AsyncSocketServer  # noqa: E402
+from app.messages import FRAME_HEADER, encode_frame, encode_payload  # noqa: E402
+from app.socket_server import logger as server_logger, start_socket_server  # noqa: E402
+from app.state import NodeState  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_listening(port: int):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def _client(port: int, requests: int, depth: int, payload: bytes, latencies: list[float]):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        sent = 0
+        while sent < requests:
+            batch = min(depth, requests - sent)
+            started = time.perf_counter()
+            writer.write(b"".join(encode_frame(sent + i + 1, payload) for i in range(batch)))
+            await writer.drain()
+            for _ in range(batch):
+                length, _ = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                await reader.readexactly(length)
+            latencies.append((time.perf_counter() - started) / batch)
+            sent += batch
+    finally:
+        writer.close()
+
+
+async def _load(port: int, connections: int, requests: int, depth: int, message: dict):
+    payload = encode_payload(message)
+    latencies: list[float] = []
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(_client(port, requests, depth, payload, latencies) for _ in range(connections)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    failures = sum(1 for r in results if isinstance(r, BaseException))
+    return elapsed, failures, latencies
+
+
+def _load_process(port: int, args, message: dict, results):
+    results.put(asyncio.run(_load(port, args.connections, args.requests, args.depth, message)))
+
+
+def run(mode: str, args) -> dict:
+    port = _free_port()
+
+    if mode == "threaded":
+        target = start_socket_server
+    else:
+        server = AsyncSocketServer(args.max_concurrency, args.workers)
+        target = lambda host, p: asyncio.run(server.serve(host, p))  # noqa: E731
+
+    threading.Thread(target=target, args=("127.0.0.1", port), daemon=True).start()
+    _wait_listening(port)
+
+    message = {"type": args.message}
+    if args.message == "SET_VAR":
+        message["value"] = 1
+
+    results = multiprocessing.Queue()
+    client = multiprocessing.Process(target=_load_process, args=(port, args, message, results))
+    client.start()
+    elapsed, failures, latencies = results.get()
+    client.join()
+    total = (args.connections - failures) * args.requests
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+
+    return {
+        "mode": mode,
+        "requests": total,
+        "failed_connections": failures,
+        "seconds": elapsed,
+        "throughput": total / elapsed if elapsed else 0.0,
+        "p99_ms": p99 * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark socket server implementations")
+    parser.add_argument("--connections", type=int, default=1000, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per connection")
+    parser.add_argument("--depth", type=int, default=1, help="Pipelined requests per round trip")
+    parser.add_argument("--message", default="GET_VAR", choices=["PING", "GET_VAR", "SET_VAR"])
+    parser.add_argument("--workers", type=int, default=32, help="Worker threads (asyncio server)")
+    parser.add_argument("--max-concurrency", type=int, default=1024, help="In-flight limit (asyncio server)")
+    parser.add_argument("--modes", default="threaded,asyncio", help="Comma separated server modes")
+    args = parser.parse_args()
+
+    server_logger.setLevel(logging.WARNING)
+    global_state.state = NodeState(1, "http://127.0.0.1:0", 0)
+    global_state.state.leader_id = 1
+    global_state.state.shared_value = 0
+
+    for mode in args.modes.split(","):
+        result = run(mode.strip(), args)
+        print(
+            f"{result['mode']:>8}: {result['requests']} requests in {result['seconds']:.2f}s "
+            f"-> {result['throughput']:.0f} req/s, p99 {result['p99_ms']:.2f} ms, "
+            f"failed connections {result['failed_connections']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
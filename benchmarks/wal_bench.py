@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Write latency of the WAL fsync policies and restart time of a node.
+
+Concurrent writers append variable records and wait for the future that
+``WriteAheadLog.append`` returns, exactly as a leader waits before it
+acknowledges a write. The recovery part fills a node with keys, writes a
+snapshot plus a log tail and times ``Journal.recover`` on a fresh node.
+
+    python benchmarks/wal_bench.py --writers 1,16 --writes 2000 --keys 100000
+"""
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.state as global_state  # noqa: E402
+from app.state import NodeInfo, NodeState  # noqa: E402
+from app.wal import FSYNC_POLICIES, Journal, WriteAheadLog  # noqa: E402
+
+
+def measure_writes(policy: str, writers: int, writes: int, interval: float) -> tuple[list[float], float]:
+    directory = tempfile.mkdtemp(prefix="wal-bench-")
+    wal = WriteAheadLog(directory, policy, interval)
+    wal.open(1)
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def writer(offset: int):
+        local = []
+        for index in range(writes):
+            started = time.perf_counter()
+            wal.append({"op": "var", "value": index, "version": offset + index}).result()
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(n * writes,)) for n in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    wal.close()
+    shutil.rmtree(directory)
+    return latencies, elapsed
+
+
+def measure_recovery(keys: int, tail: int) -> tuple[float, int]:
+    directory = tempfile.mkdtemp(prefix="wal-bench-")
+
+    global_state.state = NodeState(1, "http://127.0.0.1:8001", 9001)
+    global_state.state.set_prev(NodeInfo(2, "http://127.0.0.1:8002", 9002))
+    global_state.state.set_next(NodeInfo(3, "http://127.0.0.1:8003", 9003))
+
+    journal = Journal(directory, "none", 0.0, snapshot_every=keys + tail + 1)
+    journal.recover()
+    for index in range(0, keys, 500):
+        entries = {f"key-{n}": [n, 1] for n in range(index, min(index + 500, keys))}
+        global_state.state.kv.install({key: tuple(pair) for key, pair in entries.items()})
+        journal.record({"op": "kv", "entries": entries})
+    journal.checkpoint()
+    for index in range(tail):
+        journal.record({"op": "var", "value": index, "version": index + 1})
+    journal.note_topology()
+    journal.wal.close()
+
+    global_state.state = NodeState(1, "http://127.0.0.1:8001", 9001)
+    restarted = Journal(directory, "none", 0.0)
+    started = time.perf_counter()
+    restarted.recover()
+    elapsed = (time.perf_counter() - started) * 1000
+
+    state = global_state.state
+    assert len(state.kv) == keys and state.shared_version == tail and state.prev_node.node_id == 2
+    restarted.wal.close()
+    shutil.rmtree(directory)
+    return elapsed, restarted.snapshot_stats()["recovered_records"]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure WAL write latency and recovery time")
+    parser.add_argument("--policies", default=",".join(FSYNC_POLICIES), help="Comma separated fsync policies")
+    parser.add_argument("--writers", default="1,16", help="Comma separated writer thread counts")
+    parser.add_argument("--writes", type=int, default=1000, help="Writes per writer")
+    parser.add_argument("--interval", type=float, default=0.0, help="Extra gathering time of batch fsyncs")
+    parser.add_argument("--keys", type=int, default=100000, help="Keys in the recovery snapshot")
+    parser.add_argument("--tail", type=int, default=10000, help="Log records after the snapshot")
+    args = parser.parse_args()
+
+    print(f"{'policy':<7} {'writers':>7} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for policy in args.policies.split(","):
+        for writers in (int(count) for count in args.writers.split(",")):
+            latencies, elapsed = measure_writes(policy, writers, args.writes, args.interval)
+            print(
+                f"{policy:<7} {writers:>7} {len(latencies) / elapsed:>9.0f}"
+                f" {percentile(latencies, 0.5):>8.3f} {percentile(latencies, 0.99):>8.3f}"
+                f" {statistics.fmean(latencies):>8.3f}"
+            )
+
+    elapsed, records = measure_recovery(args.keys, args.tail)
+    print(f"\nrecovery: {args.keys} keys + {args.tail} log records ({records} records) in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,381 @@
 #!/usr/bin/env python3
 import argparse
-import logging
-import logging.handlers
-import pickle
-import socketserver
-import struct
+import asyncio
+import gzip
+import os
+import shutil
+import sys
+import time
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 
+from app.log_wire import FRAME_HEADER, MAX_FRAME_BYTES, decode_frame
+from log_store import SegmentStore, node_of, parse_time, query
+
+READ_CHUNK = 256 * 1024
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class AggregatedLog:
+    """Output file written in batches, rotated by size and age, old files gzipped.
+
+    Lines collect in memory and go to disk in one write when
+    ``flush_bytes`` have piled up or ``flush_interval`` has passed, instead
+    of one write and flush per record. A rotated file is renamed with a
+    timestamp and compressed on a worker thread; ``backup_count`` of the
+    newest ``.gz`` files are kept.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int,
+        rotate_interval: float,
+        backup_count: int,
+        flush_bytes: int,
+        echo: bool
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.flush_bytes = flush_bytes
+        self.echo = echo
+        self._pending: list[str] = []
+        self._pending_bytes = 0
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._compressions: set[asyncio.Future] = set()
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8", buffering=1024 * 1024)
+        self._size = self._file.tell()
+        self._opened_at = time.time()
+
+    def add(self, line: str):
+        self._pending.append(line)
+        self._pending_bytes += len(line)
+        if self._pending_bytes >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+
+        chunk = "".join(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+
+        self._file.write(chunk)
+        self._file.flush()
+        self._size += len(chunk)
+        if self.echo:
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+
+        if self.max_bytes and self._size >= self.max_bytes:
+            self.rotate()
+
+    def rotate_due(self) -> bool:
+        return bool(self.rotate_interval) and time.time() - self._opened_at >= self.rotate_interval and self._size > 0
+
+    def rotate(self):
+        self._file.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}")
+        suffix = 1
+        while rotated.exists() or Path(f"{rotated}.gz").exists():
+            rotated = self.path.with_name(f"{self.path.name}.{stamp}.{suffix}")
+            suffix += 1
+        os.replace(self.path, rotated)
+        self.open()
+
+        future = asyncio.get_running_loop().run_in_executor(None, self._compress, rotated)
+        self._compressions.add(future)
+        future.add_done_callback(self._compressions.discard)
+
+    def _compress(self, rotated: Path):
+        with open(rotated, "rb") as source, gzip.open(f"{rotated}.gz", "wb", compresslevel=6) as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        rotated.unlink()
+
+        if self.backup_count:
+            backups = sorted(self.path.parent.glob(f"{self.path.name}.*.gz"), key=lambda p: p.stat().st_mtime)
+            for old in backups[:-self.backup_count]:
+                old.unlink(missing_ok=True)
+
+    async def close(self):
+        self.flush()
+        if self._compressions:
+            await asyncio.gather(*self._compressions)
+        self._file.close()
+
+
+class IngestStats:
+    """Records and bytes received, and how far the written output trails the nodes.
+
+    Lag is the time from a node creating a record to the aggregator
+    decoding it, so it grows when the aggregator falls behind its sockets.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.total_records = 0
+        self.rejected_frames = 0
+        self._records = 0
+        self._bytes = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._since = time.monotonic()
+
+    def received(self, size: int, lag: float):
+        self._records += 1
+        self.total_records += 1
+        self._bytes += size
+        self._lag_sum += lag
+        self._lag_max = max(self._lag_max, lag)
+
+    def report(self) -> str | None:
+        """Rates since the previous report; None while nothing arrives."""
+        if not self._records:
+            self._since = time.monotonic()
+            return None
+
+        now = time.monotonic()
+        elapsed = max(now - self._since, 1e-9)
+        mean_lag = self._lag_sum / self._records
+        line = (
+            f"ingest {self._records / elapsed:.0f} records/s {self._bytes / elapsed / 1024:.1f} KiB/s"
+            f" lag mean={mean_lag * 1000:.1f}ms max={self._lag_max * 1000:.1f}ms"
+            f" connections={self.connections} total={self.total_records} rejected={self.rejected_frames}"
+        )
+        self._records = 0
+        self._bytes = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._since = now
+        return line
+
+
+class LogRecordStreamHandler:
+    """One node connection: batch frames (see ``app.log_wire``), read in bulk and decoded in one pass.
+
+    Frames that do not decode (including the pickled frames of the old
+    ``SocketHandler``) are counted and skipped; nothing from the network
+    is unpickled. An oversized length closes the connection.
+    """
+
+    def __init__(self, output: AggregatedLog, stats: IngestStats, store: SegmentStore | None = None):
+        self.output = output
+        self.stats = stats
+        self.store = store
+        self._second = -1
+        self._stamp = ""
+
+    async def __call__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+        try:
+            await self.handle(reader, writer.get_extra_info("peername"))
+        finally:
+            self.stats.connections -= 1
+            writer.close()
+
+    async def handle(self, reader: asyncio.StreamReader, peer=None):
+        buffer = bytearray()
 
-class LogRecordStreamHandler(socketserver.StreamRequestHandler):
-    def handle(self):
         while True:
-            header = self.connection.recv(4)
-            if len(header) < 4:
+            data = await reader.read(READ_CHUNK)
+            if not data:
                 break
-            frame_length = struct.unpack(">L", header)[0]
-            payload = self.connection.recv(frame_length)
-            while len(payload) < frame_length:
-                payload += self.connection.recv(frame_length - len(payload))
+            buffer += data
+
+            offset = 0
+            now = time.time()
+            while len(buffer) - offset >= FRAME_HEADER.size:
+                (frame_length,) = FRAME_HEADER.unpack_from(buffer, offset)
+                if frame_length > MAX_FRAME_BYTES:
+                    self.reject(peer, f"frame of {frame_length} bytes, closing the connection")
+                    return
+
+                end = offset + FRAME_HEADER.size + frame_length
+                if len(buffer) < end:
+                    break
+
+                self.emit_frame(bytes(buffer[offset + FRAME_HEADER.size:end]), now, peer)
+                offset = end
+
+            del buffer[:offset]
+
+    def reject(self, peer, reason: str):
+        self.stats.rejected_frames += 1
+        self.output.add(f"{time.strftime(TIME_FORMAT)} [aggregator] Rejected frame from {peer}: {reason}\n")
+
+    def emit_frame(self, body: bytes, now: float, peer=None):
+        try:
+            records = decode_frame(body)
+        except ValueError as exc:
+            self.reject(peer, str(exc))
+            return
+
+        size = len(body) / max(len(records), 1)
+        for fields in records:
+            try:
+                self.emit(fields, size, now)
+            except (KeyError, TypeError, ValueError):
+                self.reject(peer, "malformed record")
+
+    def emit(self, fields: dict, size: float, now: float):
+        created = float(fields["created"])
+        self.stats.received(size, max(now - created, 0.0))
+
+        # Same line as logging.Formatter("%(asctime)s [%(name)s] %(message)s"),
+        # with the date rendered once per second instead of once per record.
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._stamp = time.strftime(TIME_FORMAT, time.localtime(second))
+        line = f"{self._stamp},{int((created - second) * 1000):03d} [{fields.get('name', '?')}] {fields.get('msg', '')}\n"
+        self.output.add(line)
+        if self.store is not None:
+            self.store.append(created, node_of(fields), line)
+
+
+class QueryServer:
+    """Minimal HTTP front of the log store: ``GET /query?node=&since=&until=&type=&limit=``.
+
+    Matching lines come back as text/plain. Queries run on a worker
+    thread, reading the memory-mapped segments, so ingest keeps going.
+    """
+
+    def __init__(self, directory: Path, max_results: int):
+        self.directory = directory
+        self.max_results = max_results
 
-            record = logging.makeLogRecord(pickle.loads(payload))
-            logger = logging.getLogger(record.name)
-            logger.handle(record)
+    async def __call__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():
+                pass  # headers are not needed
 
+            status, body = await self.respond(request_line)
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
 
-class ThreadedLogServer(socketserver.ThreadingTCPServer):
-    daemon_threads = True
-    allow_reuse_address = True
+    async def respond(self, request_line: list[str]) -> tuple[str, bytes]:
+        if len(request_line) < 2 or request_line[0] != "GET":
+            return "405 Method Not Allowed", b"only GET is supported\n"
 
+        url = urlsplit(request_line[1])
+        if url.path != "/query":
+            return "404 Not Found", b"try /query?node=3&type=ELECTION&since=...&until=...\n"
 
-def serve(host: str, port: int, output_path: Path):
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            since = parse_time(params.get("since"))
+            until = parse_time(params.get("until"))
+            limit = min(int(params.get("limit", self.max_results)), self.max_results)
+        except ValueError as exc:
+            return "400 Bad Request", f"{exc}\n".encode()
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(name)s] %(message)s",
-        handlers=[
-            logging.FileHandler(output_path, encoding="utf-8"),
-            logging.StreamHandler()
-        ]
+        lines = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: [
+                line if line.endswith("\n") else line + "\n"
+                for _, _, line in query(self.directory, params.get("node"), since, until, params.get("type"), limit)
+            ]
+        )
+        return "200 OK", "".join(lines).encode()
+
+
+async def maintain(
+    output: AggregatedLog,
+    store: SegmentStore | None,
+    stats: IngestStats,
+    flush_interval: float,
+    stats_interval: float
+):
+    """Flush the batch, rotate by age and report the ingest rate on a fixed cadence."""
+    next_report = time.monotonic() + stats_interval
+
+    while True:
+        await asyncio.sleep(flush_interval)
+        output.flush()
+        if store is not None:
+            store.flush()
+
+        if output.rotate_due():
+            output.rotate()
+
+        if stats_interval and time.monotonic() >= next_report:
+            next_report = time.monotonic() + stats_interval
+            report = stats.report()
+            if report:
+                output.add(f"{time.strftime(TIME_FORMAT)} [aggregator] {report}\n")
+
+
+async def serve(host: str, port: int, output_path: Path, args: argparse.Namespace):
+    output = AggregatedLog(
+        output_path,
+        args.max_bytes,
+        args.rotate_interval,
+        args.backup_count,
+        args.flush_bytes,
+        not args.quiet
     )
+    output.open()
+    stats = IngestStats()
+
+    store = None
+    if args.store_dir:
+        store = SegmentStore(Path(args.store_dir), args.segment_bytes, args.block_bytes, args.keep_segments)
+        store.open()
 
-    with ThreadedLogServer((host, port), LogRecordStreamHandler) as server:
-        logging.getLogger("aggregator").info(
-            "Log aggregator listening on %s:%s (output=%s)",
+    server = await asyncio.start_server(
+        LogRecordStreamHandler(output, stats, store),
+        host,
+        port,
+        reuse_address=True,
+        limit=READ_CHUNK
+    )
+    output.add(
+        f"{time.strftime(TIME_FORMAT)} [aggregator] Log aggregator listening on {host}:{port} "
+        f"(output={output_path}, store={args.store_dir or 'off'})\n"
+    )
+
+    query_server = None
+    if store is not None and args.http_port:
+        query_server = await asyncio.start_server(
+            QueryServer(Path(args.store_dir), args.max_results),
             host,
-            port,
-            output_path
+            args.http_port,
+            reuse_address=True
         )
-        server.serve_forever()
+        output.add(f"{time.strftime(TIME_FORMAT)} [aggregator] Log queries on http://{host}:{args.http_port}/query\n")
+    output.flush()
+
+    maintenance = asyncio.create_task(
+        maintain(output, store, stats, args.flush_interval, args.stats_interval)
+    )
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        maintenance.cancel()
+        if query_server is not None:
+            query_server.close()
+        if store is not None:
+            store.close()
+        await output.close()
 
 
 def main():
@@ -60,9 +387,25 @@ def main():
         default="logs/aggregated.log",
         help="Output log file"
     )
+    parser.add_argument("--flush-interval", type=float, default=0.2, help="Seconds between batch flushes")
+    parser.add_argument("--flush-bytes", type=int, default=1024 * 1024, help="Flush once this much is buffered")
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024 * 1024, help="Rotate above this size (0 = never)")
+    parser.add_argument("--rotate-interval", type=float, default=3600, help="Rotate after this many seconds (0 = never)")
+    parser.add_argument("--backup-count", type=int, default=24, help="Compressed files to keep (0 = all)")
+    parser.add_argument("--stats-interval", type=float, default=10, help="Seconds between ingest reports (0 = off)")
+    parser.add_argument("--quiet", action="store_true", help="Do not echo records to stdout")
+    parser.add_argument("--store-dir", default="logs/store", help="Indexed, queryable log store (empty = off)")
+    parser.add_argument("--segment-bytes", type=int, default=64 * 1024 * 1024, help="Size of one store segment")
+    parser.add_argument("--block-bytes", type=int, default=64 * 1024, help="Records covered by one index entry")
+    parser.add_argument("--keep-segments", type=int, default=64, help="Store segments to keep (0 = all)")
+    parser.add_argument("--http-port", type=int, default=9021, help="Port of the query API (0 = off)")
+    parser.add_argument("--max-results", type=int, default=10000, help="Most records one HTTP query returns")
     args = parser.parse_args()
 
-    serve(args.host, args.port, Path(args.output))
+    try:
+        asyncio.run(serve(args.host, args.port, Path(args.output), args))
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
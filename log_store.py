@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Segmented, indexed store of aggregated node logs and its query tool.
+
+Records are appended to ``segment-NNNNNNNN.log`` files as
+``<created>\\t<node>\\t<line>`` and cut into blocks of about
+``block_bytes``. For every block ``segment-NNNNNNNN.idx`` gets one JSON
+line with its byte range, its oldest and newest record time, the nodes
+that logged in it and the message types (upper-case words such as
+ELECTION or SET_VAR) it mentions; that is the sparse time index and the
+per-node index. A query binary-searches the blocks of each segment by
+time, skips blocks without the wanted node or type and reads the rest
+straight from the memory-mapped segment, so it never scans the whole
+store.
+
+    python log_store.py --dir logs/store --node 3 --type ELECTION --since 2026-10-17T10:00
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+
+TYPE_TOKEN = re.compile(r"\b[A-Z][A-Z_]{2,}\b")
+
+NODE_NAME = re.compile(r"^node-(\d+)$")
+
+NO_NODE = "-"
+
+RECORD_BREAK = "\x1f"
+
+# Records buffered between the aggregator's periodic flushes before one is forced.
+PENDING_LIMIT = 1024 * 1024
+
+
+def segment_path(directory: Path, segment: int) -> Path:
+    return directory / f"segment-{segment:08d}.log"
+
+
+def index_path(directory: Path, segment: int) -> Path:
+    return directory / f"segment-{segment:08d}.idx"
+
+
+def list_segments(directory: Path) -> list[int]:
+    segments = []
+    for path in directory.glob("segment-*.log"):
+        try:
+            segments.append(int(path.stem.split("-", 1)[1]))
+        except ValueError:
+            continue
+    return sorted(segments)
+
+
+def node_of(fields: dict) -> str:
+    """Node id a record came from: sent by the node itself, else read off ``node-<id>`` logger names."""
+    node_id = fields.get("node_id")
+    if node_id is not None:
+        return str(node_id)
+
+    match = NODE_NAME.match(str(fields.get("name", "")))
+    return match.group(1) if match else NO_NODE
+
+
+class _Block:
+    def __init__(self, offset: int):
+        self.offset = offset
+        self.size = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.nodes: set[str] = set()
+        self.types: set[str] = set()
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "offset": self.offset,
+            "end": self.offset + self.size,
+            "min": self.min,
+            "max": self.max,
+            "nodes": sorted(self.nodes),
+            "types": sorted(self.types),
+        }, separators=(",", ":")) + "\n"
+
+
+class SegmentStore:
+    """Append side of the store; the aggregator owns one and flushes it with its batch.
+
+    Data is always written before the index line that points at it, so a
+    reader never follows an index entry past the end of the segment.
+    Records of the block still being filled are found by scanning the
+    segment from the last indexed offset. A new segment is started on
+    every open and whenever one grows past ``segment_bytes``; only the
+    newest ``keep_segments`` are kept.
+    """
+
+    def __init__(self, directory: Path, segment_bytes: int, block_bytes: int, keep_segments: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.block_bytes = block_bytes
+        self.keep_segments = keep_segments
+        self.segment = 0
+        self._data = None
+        self._index = None
+        self._size = 0
+        self._block: _Block | None = None
+        self._pending: list[str] = []
+        self._pending_bytes = 0
+        self._pending_index: list[str] = []
+
+    def open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = list_segments(self.directory)
+        self._start(existing[-1] + 1 if existing else 1)
+
+    def _start(self, segment: int):
+        self.segment = segment
+        self._data = open(segment_path(self.directory, segment), "ab")
+        self._index = open(index_path(self.directory, segment), "a", encoding="utf-8")
+        self._size = self._data.tell()
+        self._block = _Block(self._size)
+
+        if self.keep_segments:
+            for old in list_segments(self.directory)[:-self.keep_segments]:
+                segment_path(self.directory, old).unlink(missing_ok=True)
+                index_path(self.directory, old).unlink(missing_ok=True)
+
+    def append(self, created: float, node: str, line: str):
+        # One record per line: multi-line messages (tracebacks) keep their breaks as RECORD_BREAK.
+        flat = line.rstrip("\n").replace("\n", RECORD_BREAK)
+        entry = f"{created:.6f}\t{node}\t{flat}\n"
+        size = len(entry.encode())
+
+        block = self._block
+        block.size += size
+        block.min = min(block.min, created)
+        block.max = max(block.max, created)
+        block.nodes.add(node)
+        block.types.update(TYPE_TOKEN.findall(line))
+        self._pending.append(entry)
+        self._pending_bytes += size
+        self._size += size
+
+        if block.size >= self.block_bytes:
+            self._pending_index.append(block.to_json())
+            self._block = _Block(self._size)
+
+        if self._pending_bytes >= PENDING_LIMIT:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._data.write("".join(self._pending).encode())
+            self._data.flush()
+            self._pending.clear()
+            self._pending_bytes = 0
+
+        if self._pending_index:
+            self._index.write("".join(self._pending_index))
+            self._index.flush()
+            self._pending_index.clear()
+
+        if self._size >= self.segment_bytes:
+            self._seal()
+            self._start(self.segment + 1)
+
+    def _seal(self):
+        if self._block.size:
+            self._index.write(self._block.to_json())
+        self._data.close()
+        self._index.close()
+
+    def close(self):
+        self.flush()
+        self._seal()
+
+
+def _load_index(directory: Path, segment: int) -> list[dict]:
+    try:
+        with open(index_path(directory, segment), encoding="utf-8") as handle:
+            entries = []
+            for line in handle:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # a line still being written
+            return entries
+    except FileNotFoundError:
+        return []
+
+
+def _candidate_blocks(entries: list[dict], since: float | None, until: float | None) -> range:
+    """Blocks that may hold records in [since, until].
+
+    Arrival order is only roughly time order, so blocks are searched by
+    the running maximum of their newest record (non-decreasing from the
+    front) and the running minimum of their oldest (non-decreasing from
+    the back); both are sorted and allow a binary search.
+    """
+    first, last = 0, len(entries)
+
+    if since is not None:
+        highest, running = [], float("-inf")
+        for entry in entries:
+            running = max(running, entry["max"])
+            highest.append(running)
+        first = bisect_left(highest, since)
+
+    if until is not None:
+        lowest, running = [0.0] * len(entries), float("inf")
+        for position in range(len(entries) - 1, -1, -1):
+            running = min(running, entries[position]["min"])
+            lowest[position] = running
+        last = bisect_right(lowest, until)
+
+    return range(first, max(first, last))
+
+
+def _scan(view, start: int, end: int, node: str | None, since, until, pattern):
+    for raw in view[start:end].splitlines():
+        try:
+            created, record_node, line = raw.decode("utf-8", "replace").split("\t", 2)
+            created = float(created)
+        except ValueError:
+            continue
+
+        if node is not None and record_node != node:
+            continue
+        if since is not None and created < since:
+            continue
+        if until is not None and created > until:
+            continue
+        if pattern is not None and not pattern.search(line):
+            continue
+        yield created, record_node, line.replace(RECORD_BREAK, "\n")
+
+
+def query(
+    directory: Path,
+    node: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+    msg_type: str | None = None,
+    limit: int | None = None
+):
+    """Yield ``(created, node, line)`` of matching records, in arrival order."""
+    pattern = re.compile(rf"\b{re.escape(msg_type)}\b") if msg_type else None
+    found = 0
+
+    for segment in list_segments(directory):
+        entries = _load_index(directory, segment)
+
+        try:
+            handle = open(segment_path(directory, segment), "rb")
+        except FileNotFoundError:
+            continue  # removed by retention meanwhile
+
+        with handle:
+            size = os.fstat(handle.fileno()).st_size
+            if not size:
+                continue
+
+            with mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ) as view:
+                ranges = []
+                for position in _candidate_blocks(entries, since, until):
+                    entry = entries[position]
+                    if node is not None and node not in entry["nodes"]:
+                        continue
+                    if msg_type is not None and msg_type not in entry["types"]:
+                        continue
+                    ranges.append((entry["offset"], entry["end"]))
+
+                # The block being filled has no index entry yet.
+                tail = entries[-1]["end"] if entries else 0
+                if tail < size:
+                    ranges.append((tail, size))
+
+                for start, end in ranges:
+                    for record in _scan(view, start, min(end, size), node, since, until, pattern):
+                        yield record
+                        found += 1
+                        if limit and found >= limit:
+                            return
+
+
+def parse_time(value: str | None) -> float | None:
+    """Epoch seconds or an ISO date/time in local time."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the indexed aggregated log store")
+    parser.add_argument("--dir", default="logs/store", help="Store directory of the aggregator")
+    parser.add_argument("--node", help="Only records of this node id")
+    parser.add_argument("--since", help="From this time (epoch seconds or ISO, e.g. 2026-10-17T10:00)")
+    parser.add_argument("--until", help="Up to this time (epoch seconds or ISO)")
+    parser.add_argument("--type", dest="msg_type", help="Only records mentioning this message type, e.g. ELECTION")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many records (0 = all)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = 0
+    for _, _, line in query(
+        Path(args.dir),
+        args.node,
+        parse_time(args.since),
+        parse_time(args.until),
+        args.msg_type,
+        args.limit or None
+    ):
+        sys.stdout.write(line if line.endswith("\n") else line + "\n")
+        count += 1
+
+    print(f"# {count} records in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import asyncio
+import random
+import threading
+import time
+
+
+def test_replication_messages_apply_in_arrival_order_off_the_loop(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # node loggers write their files to the working directory
+
+    import app.async_socket_server as async_server
+    from app.messages import FRAME_HEADER, decode_payload, encode_frame, encode_payload
+
+    applied = []
+
+    def process_message(message, peer_host):
+        # Snapshots take longer, so a later append would overtake one on a free worker.
+        time.sleep(random.uniform(0, 0.02) if message["type"] == "REPL_SNAPSHOT" else 0.001)
+        applied.append((message["n"], threading.current_thread().name))
+        return {"n": message["n"]}
+
+    monkeypatch.setattr(async_server, "process_message", process_message)
+
+    async def exchange():
+        server = async_server.AsyncSocketServer(max_concurrency=8, workers=4)
+        server._slots = asyncio.Semaphore(server.max_concurrency)
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname())
+
+        for n in range(40):
+            message = {"type": "REPL_SNAPSHOT" if n % 5 == 0 else "REPL_APPEND", "n": n}
+            writer.write(encode_frame(n + 1, encode_payload(message)))
+        await writer.drain()
+
+        replies = []
+        for _ in range(40):
+            length, _request_id = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+            replies.append(decode_payload(await reader.readexactly(length))["n"])
+
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        server.executor.shutdown()
+        return replies
+
+    replies = asyncio.run(exchange())
+
+    assert [n for n, _thread in applied] == list(range(40))
+    assert replies == list(range(40))
+    assert all(thread.startswith("socket-async") for _n, thread in applied)
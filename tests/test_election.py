@@ -0,0 +1,154 @@
+from concurrent.futures import Future
+
+import pytest
+
+
+@pytest.fixture
+def node(monkeypatch, tmp_path):
+    """Node 4 of a ring, with every outgoing message captured instead of sent."""
+    monkeypatch.chdir(tmp_path)  # node loggers write their files to the working directory
+
+    import app.state as global_state
+    from app import socket_server
+    from app.state import NodeState
+
+    state = NodeState(4, "http://127.0.0.1:8104", 9104)
+    monkeypatch.setattr(global_state, "state", state, raising=False)
+
+    sent = []
+    offered = Future()
+    offered.set_result(None)
+    monkeypatch.setattr(socket_server, "_send_election", lambda direction, msg: sent.append(msg))
+    monkeypatch.setattr(socket_server, "_announce_leader", lambda epoch: None)
+    monkeypatch.setattr(socket_server, "_forward_leader", lambda msg, _offered=None: None)
+    monkeypatch.setattr(socket_server.replicator, "lead", lambda epoch: None)
+    monkeypatch.setattr(socket_server.replicator, "follow", lambda leader: offered)
+
+    return state, socket_server, sent
+
+
+def test_late_candidate_after_being_elected_is_dropped(node):
+    state, socket_server, sent = node
+
+    socket_server.handle_election({"type": "ELECTION", "candidate_id": 4, "epoch": 3})
+    assert state.leader_id == 4
+    assert state.election_stats.snapshot()["elected"] == 1
+
+    reply = socket_server.handle_election({"type": "ELECTION", "candidate_id": 2, "epoch": 3})
+
+    assert reply["status"] == "STALE"
+    assert sent == []
+    assert state.election_stats.snapshot()["elected"] == 1
+
+
+def test_late_candidate_after_accepting_a_leader_is_dropped(node):
+    state, socket_server, sent = node
+
+    socket_server.handle_leader({
+        "type": "LEADER",
+        "leader_id": 7,
+        "leader_host": "http://127.0.0.1:8107",
+        "leader_socket_port": 9107,
+        "epoch": 3,
+    })
+    assert state.leader_id == 7
+
+    reply = socket_server.handle_election({"type": "ELECTION", "candidate_id": 2, "epoch": 3})
+
+    assert reply["status"] == "STALE"
+    assert sent == []
+    assert state.leader_id == 7
+
+
+def test_candidate_of_a_newer_epoch_still_starts_a_round(node):
+    state, socket_server, sent = node
+
+    socket_server.handle_election({"type": "ELECTION", "candidate_id": 4, "epoch": 3})
+    reply = socket_server.handle_election({"type": "ELECTION", "candidate_id": 2, "epoch": 4})
+
+    assert reply["status"] == "FORWARDED"
+    assert sent == [{"type": "ELECTION", "candidate_id": 4, "epoch": 4}]
+
+
+def _replying(monkeypatch, socket_server, replies):
+    """Answer the first hops with ``replies`` in turn, recording the epochs they carried."""
+    epochs = []
+
+    def send(host, port, message, timeout=3):
+        epochs.append(message["epoch"])
+        future = Future()
+        future.set_result(replies[min(len(epochs), len(replies)) - 1])
+        return future
+
+    monkeypatch.setattr(socket_server, "send_socket_message_async", send)
+    return epochs
+
+
+def test_stale_first_hop_restarts_the_round_above_the_reported_epoch(node, monkeypatch):
+    state, socket_server, _sent = node
+    from app.state import NodeInfo
+
+    state.set_next(NodeInfo(5, "http://127.0.0.1:8105", 9105))
+    # A node that just joined: its neighbours decided epoch 5 before it arrived.
+    epochs = _replying(monkeypatch, socket_server, [{"status": "STALE", "epoch": 5}, {"status": "FORWARDED"}])
+
+    replies = socket_server.launch_election().result(timeout=1)
+
+    assert epochs == [1, 6]
+    assert replies == [{"status": "FORWARDED"}]
+    assert state.election_epoch == 6
+    assert state.participating()
+
+
+def test_start_election_reports_neighbours_that_keep_answering_stale(node, monkeypatch):
+    state, socket_server, _sent = node
+    import asyncio
+
+    from fastapi import HTTPException
+
+    from app import api
+    from app.state import NodeInfo
+
+    state.set_next(NodeInfo(5, "http://127.0.0.1:8105", 9105))
+    # Neighbours whose ring keeps deciding rounds ahead of ours.
+    epochs = _replying(monkeypatch, socket_server, [{"status": "STALE", "epoch": epoch} for epoch in (9, 12, 15)])
+
+    with pytest.raises(HTTPException) as failure:
+        asyncio.run(api.start_election())
+
+    assert failure.value.status_code == 503
+    assert "stale" in failure.value.detail
+    assert epochs == [1, 10, 13][:socket_server.ELECTION_START_ATTEMPTS]
+    assert not state.participating()
+
+
+def test_joined_node_opens_rounds_above_the_ring_decided_epoch(node, monkeypatch):
+    state, socket_server, _sent = node
+    from app.state import NodeInfo
+
+    state.set_next(NodeInfo(5, "http://127.0.0.1:8105", 9105))
+    socket_server.adopt_decided_round(5, NodeInfo(7, "http://127.0.0.1:8107", 9107))
+    assert (state.decided_epoch, state.leader_id) == (5, 7)
+
+    epochs = _replying(monkeypatch, socket_server, [{"status": "FORWARDED"}])
+    socket_server.launch_election().result(timeout=1)
+
+    assert epochs == [6]
+
+
+def test_new_leader_acks_writes_only_after_old_leases_run_out(node, monkeypatch):
+    state, socket_server, _sent = node
+    import time
+
+    monkeypatch.setattr(socket_server, "READ_LEASE_DURATION", 0.1)
+    monkeypatch.setattr(socket_server, "LEASE_DRIFT_MARGIN", 0.05)
+
+    elected_at = time.monotonic()
+    socket_server.handle_election({"type": "ELECTION", "candidate_id": 4, "epoch": 3})
+    assert state.leader_id == 4
+
+    fence = socket_server._past_write_fence()
+    assert not fence.done()
+    fence.result(timeout=1)
+    assert time.monotonic() - elected_at >= 0.15
+    assert socket_server._past_write_fence().done()
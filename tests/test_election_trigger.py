@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+
+def _done(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+@pytest.fixture
+def node(monkeypatch, tmp_path):
+    """Node 2 whose leader, node 9, has just failed; elections are recorded, not sent."""
+    monkeypatch.chdir(tmp_path)
+
+    import app.state as global_state
+    from app import api
+    from app.state import NodeInfo, NodeState
+
+    state = NodeState(2, "http://127.0.0.1:8102", 9102)
+    state.set_next(NodeInfo(3, "http://127.0.0.1:8103", 9103))
+    state.leader_id = 9
+    state.leader_node = NodeInfo(9, "http://127.0.0.1:8109", 9109)
+    monkeypatch.setattr(global_state, "state", state, raising=False)
+
+    started = []
+    monkeypatch.setattr(api, "launch_election", lambda: started.append(1) or _done([{"status": "STARTED"}]))
+    return state, api, started
+
+
+def test_trigger_without_backoff_still_starts_an_election(node, monkeypatch):
+    state, api, started = node
+
+    # The trigger runs as soon as it is scheduled: the tightest race with clearing the failed leader.
+    monkeypatch.setattr(api.scheduler, "defer", lambda delay, fn, *args: _done(fn(*args)))
+
+    assert asyncio.run(api._trigger_election("Leader unreachable")) == (True, None)
+    assert started == [1]
+    assert state.leader_id is None
+    assert state.election_stats.snapshot()["suppressed"] == 0
+
+
+def test_trigger_is_suppressed_once_another_leader_was_accepted(node):
+    state, api, started = node
+
+    state.leader_id = 5
+    assert api._elect_unless_superseded("Leader unreachable", state.election_epoch, 9) == (True, None)
+
+    assert started == []
+    assert state.election_stats.snapshot()["suppressed"] == 1
@@ -0,0 +1,90 @@
+import socket
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def phi_accrual(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # node loggers write their files to the working directory
+
+    from app.failure_detector import PhiAccrual
+    return PhiAccrual
+
+
+def test_phi_stays_low_on_rhythm_and_passes_the_threshold_after_silence(phi_accrual):
+    detector = phi_accrual(0.5)
+    start = detector.last
+    for beat in range(1, 21):
+        detector.heartbeat(start + beat * 0.5)
+    last = detector.last
+
+    assert detector.phi(last + 0.5) < 1
+    assert detector.phi(last + 0.75) < 8
+    assert detector.phi(last + 1.2) > 8
+    assert detector.phi(last + 2.5) > detector.phi(last + 1.2)
+
+
+def test_fresh_peer_is_not_suspected_within_its_first_interval(phi_accrual):
+    detector = phi_accrual(0.5)
+    assert detector.phi(detector.last + 0.5) < 8
+
+
+@pytest.fixture
+def delayed_node(monkeypatch, tmp_path):
+    """Node 1 with a 2.5 s artificial delay, next to a live peer that answers every request."""
+    monkeypatch.chdir(tmp_path)  # node loggers write their files to the working directory
+
+    import app.state as global_state
+    from app.messages import decode_payload, encode_frame, encode_payload, read_frame
+    from app.state import NodeInfo, NodeState
+
+    listener = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=answer, args=(conn,), daemon=True).start()
+
+    def answer(conn):
+        with conn, conn.makefile("rb") as reader:
+            while (frame := read_frame(reader)) is not None:
+                request_id, payload = frame
+                hello = decode_payload(payload).get("type") == "HELLO"
+                conn.sendall(encode_frame(request_id, encode_payload({"codec": "json"} if hello else {"status": "OK"})))
+
+    threading.Thread(target=serve, daemon=True).start()
+
+    state = NodeState(1, "http://127.0.0.1:8101", 9101)
+    peer = NodeInfo(2, "http://127.0.0.1:8102", listener.getsockname()[1])
+    state.set_next(peer)
+    state.set_prev(peer)
+    state.delay = 2.5
+    monkeypatch.setattr(global_state, "state", state, raising=False)
+
+    yield state
+    listener.close()
+
+
+def test_delayed_node_does_not_suspect_a_live_neighbour(delayed_node):
+    from app.failure_detector import FailureDetector
+
+    detector = FailureDetector(interval=0.05, threshold=8)
+    suspected = []
+    detector.on_suspect(lambda node, roles: suspected.append(node.node_id))
+
+    # Fifty intervals: a heartbeat held back by the 2.5 s delay would have passed phi 8 long before.
+    deadline = time.monotonic() + 2.5
+    while time.monotonic() < deadline:
+        detector._check()
+        time.sleep(detector.interval)
+
+    stats = detector.snapshot()
+    assert suspected == []
+    assert stats["suspicions"] == 0
+    assert stats["heartbeats_missed"] == 0
+    assert stats["peers"][0]["rtt_ms"] < 1000
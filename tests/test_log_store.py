@@ -0,0 +1,24 @@
+import logging
+import queue
+
+from app.config import NODE_ID
+from app.logger import DroppingQueueHandler
+from log_store import SegmentStore, node_of, query
+
+
+def test_socket_server_records_are_indexed_under_the_node(tmp_path):
+    handler = DroppingQueueHandler(queue.Queue())
+    record = logging.LogRecord(
+        "socket-server", logging.INFO, __file__, 0, "node=%s: received ELECTION candidate=%s", (NODE_ID, 7), None
+    )
+    fields = vars(handler.prepare(record))
+    assert node_of(fields) == str(NODE_ID)
+
+    store = SegmentStore(tmp_path, 1024 * 1024, 4096, 0)
+    store.open()
+    store.append(record.created, node_of(fields), f"[socket-server] {fields['msg']}\n")
+    store.close()
+
+    found = list(query(tmp_path, node=str(NODE_ID), msg_type="ELECTION"))
+    assert [line for _, _, line in found] == [f"[socket-server] node={NODE_ID}: received ELECTION candidate=7"]
+    assert list(query(tmp_path, node="socket-server")) == []
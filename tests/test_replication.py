@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def leader(monkeypatch, tmp_path):
+    """Node 4, elected in epoch 9 with a replica of lineage 2.7 up to seq 40, collecting offers."""
+    monkeypatch.chdir(tmp_path)  # node loggers write their files to the working directory
+
+    import app.state as global_state
+    from app.replication import Replicator
+    from app.state import NodeState
+
+    state = NodeState(4, "http://127.0.0.1:8104", 9104)
+    state.shared_value, state.shared_version = 40, 40
+    monkeypatch.setattr(global_state, "state", state, raising=False)
+
+    replicator = Replicator()
+    replicator.applied, replicator.applied_lineage = 40, "2.7"
+    monkeypatch.setattr(replicator, "_schedule_tick", lambda: None)
+    replicator.lead(9)
+    return state, replicator
+
+
+def _offer(lineage: str, seq: int, value: int) -> dict:
+    return {
+        "type": "REPL_SNAPSHOT",
+        "offer": True,
+        "lineage": lineage,
+        "seq": seq,
+        "value": value,
+        "version": seq,
+        "kv": {},
+    }
+
+
+def test_offer_from_an_older_lineage_loses_despite_a_higher_seq(leader):
+    state, replicator = leader
+
+    # Lineage 3.5 was deposed by 2.7; its leader went on counting seqs past ours.
+    assert replicator.apply_snapshot(_offer("3.5", 100, 100))["status"] == "IGNORED"
+    assert (state.shared_value, state.shared_version) == (40, 40)
+    assert replicator.log.last_seq == 40
+
+
+def test_competing_offers_are_ordered_by_lineage_then_seq(leader):
+    state, replicator = leader
+
+    assert replicator.apply_snapshot(_offer("5.8", 12, 12))["status"] == "OK"
+    assert replicator.apply_snapshot(_offer("6.8", 11, 11))["status"] == "IGNORED"
+    assert replicator.apply_snapshot(_offer("2.7", 60, 60))["status"] == "IGNORED"
+    assert replicator.apply_snapshot(_offer("5.8", 15, 15))["status"] == "OK"
+
+    assert (state.shared_value, state.shared_version) == (15, 15)
+    assert replicator.log.last_seq == 15
@@ -0,0 +1,55 @@
+import itertools
+import socket
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def peer(monkeypatch, tmp_path):
+    """A peer that answers the HELLO with JSON and echoes every request's id back."""
+    monkeypatch.chdir(tmp_path)  # node loggers write their files to the working directory
+
+    from app.messages import decode_payload, encode_frame, encode_payload, read_frame
+
+    listener = socket.create_server(("127.0.0.1", 0))
+    seen = []
+
+    def serve():
+        conn, _ = listener.accept()
+        with conn, conn.makefile("rb") as reader:
+            while (frame := read_frame(reader)) is not None:
+                request_id, payload = frame
+                seen.append(request_id)
+                reply = {"codec": "json"} if decode_payload(payload).get("type") == "HELLO" else {"status": "OK"}
+                conn.sendall(encode_frame(request_id, encode_payload(reply)))
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield listener.getsockname(), seen
+    listener.close()
+
+
+def test_request_ids_wrap_past_hello_and_pending_ids(peer):
+    from concurrent.futures import Future
+
+    from app.messages import HELLO_REQUEST_ID, MAX_REQUEST_ID
+    from app.socket_client import PeerConnection
+
+    addr, seen = peer
+    conn = PeerConnection(addr, timeout=2)
+    try:
+        waiting = Future()
+        conn._pending[1] = waiting  # a request still waiting on id 1 after the wrap
+        conn._ids = itertools.count(MAX_REQUEST_ID)
+
+        last = conn.submit({"type": "PING"})
+        wrapped = conn.submit({"type": "PING"})
+
+        assert last.result(timeout=2) == {"status": "OK"}
+        assert wrapped.result(timeout=2) == {"status": "OK"}
+        assert last.request_id == MAX_REQUEST_ID
+        assert wrapped.request_id == 2
+        assert seen == [HELLO_REQUEST_ID, MAX_REQUEST_ID, 2]
+        assert not waiting.done()
+    finally:
+        conn.close()
@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.fixture
+def node(monkeypatch, tmp_path):
+    """A fresh node 3 each call, so a journal can be recovered as after a restart."""
+    monkeypatch.chdir(tmp_path)  # node loggers write their files to the working directory
+
+    import app.state as global_state
+    from app.state import NodeState
+
+    def restart() -> NodeState:
+        state = NodeState(3, "http://127.0.0.1:8103", 9103)
+        monkeypatch.setattr(global_state, "state", state, raising=False)
+        return state
+
+    return restart
+
+
+def _journal(directory):
+    from app.wal import Journal
+
+    return Journal(str(directory), fsync="always", snapshot_every=1000)
+
+
+@pytest.mark.parametrize("tail", ["torn", "corrupt"])
+def test_recovery_stops_at_a_torn_or_corrupt_tail(node, tmp_path, tail):
+    from app.wal import encode_record
+
+    data = tmp_path / "data"
+    node()
+    journal = _journal(data)
+    journal.recover()
+    for version in (1, 2, 3):
+        journal.record({"op": "var", "value": version * 10, "version": version}).result()
+    journal.wal.close()
+
+    # The process died in the middle of writing version 4.
+    record = encode_record({"op": "var", "value": 40, "version": 4})
+    if tail == "torn":
+        record = record[:-3]
+    else:
+        record = record[:-1] + bytes([record[-1] ^ 0xFF])
+    with open(journal.wal.path(1), "ab") as segment:
+        segment.write(record)
+
+    state = node()
+    journal = _journal(data)
+    assert journal.recover()
+    assert (state.shared_value, state.shared_version) == (30, 3)
+    assert journal.snapshot_stats()["recovered_records"] == 3
+
+    # New writes go to a fresh segment, never behind the damaged tail.
+    assert journal.wal.segment == 2
+    journal.record({"op": "var", "value": 50, "version": 5}).result()
+    journal.wal.close()
+
+    state = node()
+    _journal(data).recover()
+    assert (state.shared_value, state.shared_version) == (50, 5)